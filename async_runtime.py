@@ -0,0 +1,81 @@
+"""One process-wide asyncio event loop for the async LLM pipeline.
+
+Streamlit runs every session in its own script thread. Calling ``asyncio.run`` there gives each session a
+private loop, and blocking ``invoke`` calls tie up a server thread per LLM request. Instead, coroutines are
+handed to a single loop running in a daemon thread, where any number of sessions wait on LLM calls
+concurrently. run() waits for one coroutine; iterate() streams an async generator back to the calling
+thread, so Streamlit elements are still created from the script thread.
+
+The caller's context variables (active trace, LLM cache bypass) are carried into the coroutine.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="optigenius-event-loop", daemon=True).start()
+    return _loop
+
+
+def _copy_outcome(task, future):
+    if future.cancelled():
+        return
+    if task.cancelled():
+        future.cancel()
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
+
+
+def submit(coro):
+    """Schedule coro on the shared loop and return a concurrent.futures.Future for its result."""
+    loop = get_loop()
+    context = contextvars.copy_context()
+    future = concurrent.futures.Future()
+
+    def start():
+        task = loop.create_task(coro, context=context)
+        task.add_done_callback(lambda done: _copy_outcome(done, future))
+        # Cancelling the future (e.g. on timeout) cancels the coroutine too.
+        future.add_done_callback(lambda done: done.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+    loop.call_soon_threadsafe(start)
+    return future
+
+
+def run(coro, timeout=None):
+    """Run coro on the shared loop and wait for its result in the calling thread."""
+    if threading.current_thread().name == "optigenius-event-loop":
+        raise RuntimeError("async_runtime.run() would block the shared event loop, await the coroutine instead")
+    future = submit(coro)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+async def _next_item(agen):
+    return await agen.__anext__()
+
+
+def iterate(agen):
+    """Yield the items of an async generator in the calling thread while it runs on the shared loop."""
+    try:
+        while True:
+            try:
+                yield run(_next_item(agen))
+            except StopAsyncIteration:
+                return
+    finally:
+        run(agen.aclose())
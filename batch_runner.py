@@ -0,0 +1,245 @@
+"""Headless batch runner pushing many scenario instances through the LangGraph pipeline.
+
+Instances come from a JSONL file or from the supply_chain_scenarios generators over a range of seeds and
+sizes. They run with bounded concurrency. --rpm caps the LLM requests per minute: every call the pipeline
+makes (code writer, report, repairs, race candidates) waits for its slot in llm_scheduler. --starts-per-minute
+additionally limits how many instances start per minute. Every result (report, generated code, timings,
+token/cost trace summary or failure) is appended to the output JSONL as soon as it finishes, and a rerun
+with the same output file skips the instances already recorded there.
+
+Examples:
+
+    python batch_runner.py --generator "Demand-Supply Matching" --seeds 0-99 \\
+        --size num_stores=3,10 --size num_plants=3,5 --concurrency 4 --rpm 90 --output runs.jsonl
+
+    python batch_runner.py --input instances.jsonl --output runs.jsonl
+
+Input JSONL lines need "scenario" and either "problem_statement" or "problem", "objective", "constraints"
+and "data" ({table name: DataFrame.to_dict(orient="split")}); "id" is optional.
+"""
+import argparse
+import collections
+import itertools
+import json
+import os
+import signal
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+import llm_scheduler
+import tracing
+from supply_chain_scenarios import GENERATORS
+
+
+class RateLimiter:
+    """Allows at most `per_minute` acquisitions in any sliding 60 second window."""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self._starts = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        if not self.per_minute:
+            return True
+        while stop_event is None or not stop_event.is_set():
+            with self._lock:
+                now = time.monotonic()
+                while self._starts and now - self._starts[0] >= 60:
+                    self._starts.popleft()
+                if len(self._starts) < self.per_minute:
+                    self._starts.append(now)
+                    return True
+                wait = 60 - (now - self._starts[0])
+            time.sleep(min(wait, 1.0))
+        return False
+
+
+def parse_seeds(text):
+    # "0-9,20,30-31" -> [0, ..., 9, 20, 30, 31]
+    seeds = []
+    for part in text.split(","):
+        if "-" in part.strip()[1:]:
+            start, end = part.split("-", 1)
+            seeds.extend(range(int(start), int(end) + 1))
+        elif part.strip():
+            seeds.append(int(part))
+    return seeds
+
+
+def parse_sizes(size_args):
+    # ["num_stores=3,10", "num_plants=5"] -> [{"num_stores": 3, "num_plants": 5}, {"num_stores": 10, ...}]
+    axes = []
+    for arg in size_args or []:
+        name, values = arg.split("=", 1)
+        axes.append([(name.strip(), int(value)) for value in values.split(",")])
+    return [dict(combination) for combination in itertools.product(*axes)]
+
+
+def generated_instances(scenarios, seeds, sizes):
+    for scenario in scenarios:
+        for params in sizes or [{}]:
+            for seed in seeds:
+                size_key = ",".join(f"{key}={value}" for key, value in sorted(params.items()))
+                yield {
+                    "id": f"{scenario}|seed={seed}|{size_key}",
+                    "scenario": scenario,
+                    "seed": seed,
+                    "params": params,
+                }
+
+
+def file_instances(path):
+    with open(path) as f:
+        for number, line in enumerate(f, start=1):
+            if line.strip():
+                instance = json.loads(line)
+                instance.setdefault("id", f"{os.path.basename(path)}:{number}")
+                yield instance
+
+
+def problem_statements_for(instance):
+    """Return the statement for the code prompts and the one with the data inline (report, fallback fixer)."""
+    from langgraph_crew import compose_problem_statement
+
+    if instance.get("problem_statement"):
+        return instance["problem_statement"], instance["problem_statement"]
+    if "data" in instance:
+        data = {name: pd.DataFrame(**table) for name, table in instance["data"].items()}
+        texts = (instance.get("problem", ""), instance.get("objective", ""), instance.get("constraints", ""))
+    else:
+        generator = GENERATORS[instance["scenario"]]
+        *texts, data = generator(seed=instance["seed"], **instance.get("params", {}))
+    return compose_problem_statement(*texts, data), compose_problem_statement(*texts, data, inline=True)
+
+
+def completed_ids(output_path, retry_failed):
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a partially written last line from an interrupted run
+            if record.get("status") == "ok" or not retry_failed:
+                done.add(record["id"])
+    return done
+
+
+def run_instance(instance, use_cache, node_config):
+    from langgraph_crew import run_scenario_graph
+
+    record = {"id": instance["id"], "scenario": instance["scenario"], "seed": instance.get("seed"),
+              "params": instance.get("params", {})}
+    start = time.perf_counter()
+    try:
+        problem_statement, inline_problem_statement = problem_statements_for(instance)
+        prepared = time.perf_counter()
+        # Batch calls queue behind whatever the app is waiting for on the same deployment.
+        with tracing.trace_run(instance["id"]) as tracer, llm_scheduler.priority(llm_scheduler.BATCH):
+            report, code = run_scenario_graph(instance["scenario"], problem_statement, use_cache=use_cache,
+                                              inline_problem_statement=inline_problem_statement, **node_config)
+        record.update({
+            "status": "ok",
+            "report": report,
+            "code": code,
+            "timings": {"prepare_seconds": prepared - start, "graph_seconds": time.perf_counter() - prepared},
+            "trace": tracer.summary(),
+        })
+    except Exception as ex:
+        record.update({"status": "error", "error": repr(ex), "traceback": traceback.format_exc()})
+    record["timings"] = dict(record.get("timings", {}), total_seconds=time.perf_counter() - start)
+    record["finished_at"] = time.time()
+    return record
+
+
+def run_batch(instances, output_path, concurrency=4, rpm=0, starts_per_minute=0, use_cache=True, retry_failed=True,
+              node_config=None):
+    done = completed_ids(output_path, retry_failed)
+    pending = [instance for instance in instances if instance["id"] not in done]
+    print(f"{len(done)} instances already completed, {len(pending)} to run")
+
+    if rpm:
+        # Each instance makes several LLM calls, so the request budget is enforced per call, not per instance.
+        llm_scheduler.configure(tokens_per_minute=llm_scheduler.get_scheduler().tokens_per_minute,
+                                requests_per_minute=rpm)
+    limiter = RateLimiter(starts_per_minute)
+    stop_event = threading.Event()
+    write_lock = threading.Lock()
+    counts = collections.Counter()
+    out = open(output_path, "a")
+
+    def guarded(instance):
+        if not limiter.acquire(stop_event):
+            return None
+        record = run_instance(instance, use_cache, node_config or {})
+        # Written from the worker so instances still running at an interrupt are kept too.
+        with write_lock:
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            print(f"[{sum(counts.values())}/{len(pending)}] {record['id']}: {record['status']} "
+                  f"({record['timings']['total_seconds']:.1f} s)")
+        return record
+
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    if in_main_thread:
+        previous_handler = signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = [executor.submit(guarded, instance) for instance in pending]
+        for _ in as_completed(futures):
+            if stop_event.is_set():
+                break
+    except KeyboardInterrupt:
+        print("Interrupted, waiting for running instances; rerun the same command to resume.")
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        out.close()
+        if in_main_thread:
+            signal.signal(signal.SIGTERM, previous_handler)
+    return dict(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSONL file with one instance per line")
+    source.add_argument("--generator", action="append", choices=sorted(GENERATORS),
+                        help="Scenario generator to sample instances from (repeatable)")
+    parser.add_argument("--seeds", default="42", help="Seeds for generated instances, e.g. 0-99 (default: 42)")
+    parser.add_argument("--size", action="append",
+                        help="Generator size parameter values, e.g. num_stores=3,10 (repeatable, crossed)")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="Instances running at once (default: 4)")
+    parser.add_argument("--rpm", type=int, default=0,
+                        help="Max LLM requests per minute across all instances, 0 = OPTIGENIUS_LLM_RPM")
+    parser.add_argument("--starts-per-minute", type=int, default=0,
+                        help="Max instances started per minute, 0 = unlimited")
+    parser.add_argument("--candidates", type=int, default=1, help="Race this many code candidates per instance")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+    parser.add_argument("--skip-failed", action="store_true",
+                        help="On resume, do not retry instances that failed in an earlier run")
+    args = parser.parse_args()
+
+    if args.input:
+        instances = list(file_instances(args.input))
+    else:
+        instances = list(generated_instances(args.generator, parse_seeds(args.seeds), parse_sizes(args.size)))
+
+    node_config = {"candidates": args.candidates} if args.candidates > 1 else {}
+    counts = run_batch(instances, args.output, concurrency=args.concurrency, rpm=args.rpm,
+                       starts_per_minute=args.starts_per_minute, use_cache=not args.no_cache,
+                       retry_failed=not args.skip_failed, node_config=node_config)
+    print(f"Batch finished: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Rows per second of every scenario generator at increasing instance sizes.
+
+The size is the number of entities on the scalable axis (customers, stores, suppliers, products); the
+other axis is kept small, as in the app. Rows are counted over all tables a generator returns. With
+--threads N each size is also generated from N threads at once and checked to be identical per seed.
+
+    python -m benchmarks.bench_generators --sizes 1000,100000,1000000 --output generator_bench.json
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from supply_chain_scenarios import GENERATORS
+
+SCALED_PARAMS = {
+    "Customer Order Fulfillment": lambda n: {"num_customers": n, "num_warehouses": 5},
+    "Demand-Supply Matching": lambda n: {"num_stores": n, "num_plants": 5},
+    "Supplier Risk Assessment": lambda n: {"num_suppliers": n},
+    "Demand Forecasting": lambda n: {"num_products": n},
+    "Inventory Optimization": lambda n: {"num_products": n, "num_warehouses": 5},
+    "Transportation Optimization": lambda n: {"num_customers": n, "num_warehouses": 5},
+}
+
+
+def total_rows(data_in_format):
+    return sum(len(df) for df in data_in_format.values())
+
+
+def same_data(left, right):
+    return left.keys() == right.keys() and all(left[name].equals(right[name]) for name in left)
+
+
+def bench(scenario, size, repeats, threads):
+    generator = GENERATORS[scenario]
+    params = SCALED_PARAMS[scenario](size)
+    generator(seed=0, **params)  # build the name pools outside the timing
+
+    times = []
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        _, _, _, data = generator(seed=repeat, **params)
+        times.append(time.perf_counter() - start)
+    rows = total_rows(data)
+    row = {"scenario": scenario, "size": size, "params": params, "rows": rows,
+           "best_seconds": min(times), "rows_per_second": rows / min(times)}
+
+    if threads > 1:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(lambda _: generator(seed=7, **params)[3], range(threads)))
+        elapsed = time.perf_counter() - start
+        row["threaded_rows_per_second"] = rows * threads / elapsed
+        row["threads_consistent"] = all(same_data(results[0], result) for result in results[1:])
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--scenario", action="append", choices=sorted(GENERATORS), help="Default: all")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent generator calls to check, 1 = off")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    rows = []
+    for scenario in args.scenario or GENERATORS:
+        for size in [int(size) for size in args.sizes.split(",")]:
+            row = bench(scenario, size, args.repeats, args.threads)
+            rows.append(row)
+            threaded = (f"  {args.threads} threads {row['threaded_rows_per_second']:12,.0f} rows/s"
+                        f"{'' if row['threads_consistent'] else '  INCONSISTENT'}") if args.threads > 1 else ""
+            print(f"{scenario:28s} {size:>9,} {row['rows']:>10,} rows  {row['best_seconds'] * 1000:9.1f} ms  "
+                  f"{row['rows_per_second']:12,.0f} rows/s{threaded}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
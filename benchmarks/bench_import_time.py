@@ -0,0 +1,132 @@
+"""Track cold-start latency: import time of each module and the first render of streamlit_app.py.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in sys.modules. Module timings are
+taken with streamlit, pandas and numpy already imported, since every app process loads those anyway. The
+figure is the module's own cost including what it pulls in. The app timing covers the first
+AppTest run of streamlit_app.py: all imports plus the first script run. The script also lists which heavy
+packages the first render loaded. With --baseline it prints the change against an earlier --output file.
+
+    python -m benchmarks.bench_import_time --repeats 5 --output import_time.json
+    python -m benchmarks.bench_import_time --baseline import_time.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "utils", "langgraph_crew", "native_models", "sensitivity", "incremental", "execution_pool", "solvers",
+    "sparse_lp", "code_validator", "csv_ingest", "data_files", "data_serializer", "llm_cache", "llm_client",
+    "llm_scheduler", "tracing", "async_runtime", "graph_registry", "supply_chain_scenarios",
+    "supply_chain_scenarios.cache",
+]
+# Packages that should only load once the code path needing them runs.
+HEAVY_PACKAGES = ["langgraph", "langchain_openai", "openai", "langchain_experimental", "textgrad", "autogen",
+                  "scipy", "langsmith", "langchain_core", "tiktoken", "highspy"]
+PRELOADED = ["streamlit", "pandas", "numpy"]
+OFFLINE_SECRETS = {"openai_api_key": "offline", "azure_endpoint": "http://127.0.0.1:9", "api_version": "2024-02-01",
+                   "deployment_name": "offline"}
+
+# Dummy secrets in a scratch working directory; benchmarks.fake_llm is not used as it imports LangChain itself.
+MODULE_SCRIPT = """
+import importlib, json, os, sys, tempfile, time
+sys.path.insert(0, {root!r})
+os.environ.setdefault("OPTIGENIUS_LLM_CACHE", "off")
+os.chdir(tempfile.mkdtemp(prefix="optigenius-bench-"))
+os.makedirs(".streamlit")
+with open(os.path.join(".streamlit", "secrets.toml"), "w") as f:
+    f.write("".join(f"{{key}} = {{value!r}}\\n" for key, value in {secrets!r}.items()))
+for name in {preloaded!r}:
+    importlib.import_module(name)
+start = time.perf_counter()
+importlib.import_module({module!r})
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+APP_SCRIPT = """
+import json, os, sys, time
+os.environ.setdefault("OPTIGENIUS_LLM_CACHE", "off")
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(os.path.join({root!r}, "streamlit_app.py"), default_timeout=300)
+app.secrets.update({secrets!r})
+app.run()
+seconds = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"seconds": seconds, "exceptions": [str(e.value) for e in app.exception], "heavy_loaded": loaded}}))
+"""
+
+
+def _run(script):
+    completed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=REPO_ROOT)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure_module(module, repeats):
+    script = MODULE_SCRIPT.format(root=REPO_ROOT, preloaded=PRELOADED, module=module, secrets=OFFLINE_SECRETS)
+    runs = [_run(script) for _ in range(repeats)]
+    errors = [run["error"] for run in runs if "error" in run]
+    if errors:
+        return {"name": module, "error": errors[0]}
+    return {"name": module, "median_seconds": statistics.median(run["seconds"] for run in runs)}
+
+
+def measure_app(repeats):
+    script = APP_SCRIPT.format(root=REPO_ROOT, heavy=HEAVY_PACKAGES, secrets=OFFLINE_SECRETS)
+    runs = [_run(script) for _ in range(repeats)]
+    errors = [run["error"] for run in runs if "error" in run]
+    if errors:
+        return {"name": "streamlit_app (first render)", "error": errors[0]}
+    return {
+        "name": "streamlit_app (first render)",
+        "median_seconds": statistics.median(run["seconds"] for run in runs),
+        "exceptions": runs[0]["exceptions"],
+        "heavy_loaded": runs[0]["heavy_loaded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--modules", help="Comma separated modules, default: all app modules")
+    parser.add_argument("--skip-app", action="store_true", help="Only time the module imports")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    modules = args.modules.split(",") if args.modules else MODULES
+    results = [] if args.skip_app else [measure_app(args.repeats)]
+    results += [measure_module(module, args.repeats) for module in modules]
+
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = {row["name"]: row.get("median_seconds") for row in json.load(f)["results"]}
+
+    for row in results:
+        if "error" in row:
+            print(f"{row['name']:32s} failed: {row['error']}")
+            continue
+        line = f"{row['name']:32s} {row['median_seconds'] * 1000:8.1f} ms"
+        if baseline.get(row["name"]):
+            line += f"  ({(row['median_seconds'] - baseline[row['name']]) * 1000:+8.1f} ms vs baseline)"
+        print(line)
+    app = results[0] if not args.skip_app else None
+    if app and "error" not in app:
+        print(f"Heavy packages loaded by the first render: {', '.join(app['heavy_loaded']) or 'none'}")
+        if app["exceptions"]:
+            print(f"The first render raised: {app['exceptions']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
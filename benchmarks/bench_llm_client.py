@@ -0,0 +1,215 @@
+"""Exercise the shared LLM client (llm_client.py) against a local stand-in for Azure OpenAI.
+
+The stand-in answers chat completion requests after a configurable latency. It sends a slow tail on
+--slow-rate of the requests and fails --error-rate of them with 429 or 503. The same batch of concurrent
+chat calls runs with hedging off and on. For each mode the script reports success rate, latency
+percentiles, and the client's retry and hedge counters, next to the number of requests the server saw.
+
+    python -m benchmarks.bench_llm_client --requests 400 --concurrency 16 --error-rate 0.05 --slow-rate 0.05
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    # Many concurrent clients connect at once, the default backlog of 5 would reset connections.
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StandInServer:
+    """Minimal Azure OpenAI chat completions endpoint on 127.0.0.1.
+
+    With requests_per_minute set it also enforces a quota like Azure does, over 10 second windows, answering
+    429 with a Retry-After once it is used up.
+    """
+
+    def __init__(self, latency, slow_rate, slow_latency, error_rate, seed=0, requests_per_minute=0):
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests_per_minute = requests_per_minute
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+        self._quota_window = (0.0, 0)
+        self.server = _Server(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _over_quota(self):
+        # Seconds until the next 10 second window if this request is over the quota, else None.
+        if not self.requests_per_minute:
+            return None
+        with self.lock:
+            now = time.monotonic()
+            window_start, count = self._quota_window
+            if now - window_start >= 10:
+                window_start, count = now, 0
+            if count >= self.requests_per_minute / 6:
+                self.throttled += 1
+                return window_start + 10 - now
+            self._quota_window = (window_start, count + 1)
+        return None
+
+    def _draw(self):
+        with self.lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            slow = self.random.random() < self.slow_rate
+            self.errors += failed
+        return failed, slow
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body, headers=()):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                with stand_in.lock:
+                    stand_in.connections.add(self.client_address)
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                retry_after = stand_in._over_quota()
+                if retry_after is not None:
+                    self._reply(429, {"error": {"code": "429", "message": "Rate limit exceeded"}},
+                                [("Retry-After", str(max(1, round(retry_after))))])
+                    return
+                failed, slow = stand_in._draw()
+                time.sleep(stand_in.slow_latency if slow else stand_in.latency)
+                if failed:
+                    status = stand_in.random.choice([429, 503])
+                    self._reply(status, {"error": {"code": str(status), "message": "stand-in failure"}},
+                                [("Retry-After", "0")] if status == 429 else [])
+                    return
+                self._reply(200, {
+                    "id": "chatcmpl-stand-in", "object": "chat.completion", "created": int(time.time()),
+                    "model": "gpt-4o",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "OK"}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+                })
+
+        return Handler
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.errors = 0
+            self.throttled = 0
+            self.connections.clear()
+            self._quota_window = (0.0, 0)
+
+    def close(self):
+        self.server.shutdown()
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def run_mode(llm, server, hedge, requests, concurrency):
+    import llm_client
+
+    os.environ["OPTIGENIUS_LLM_HEDGE"] = "on" if hedge else "off"
+    llm_client.reset_stats()
+    server.reset()
+
+    def one(number):
+        start = time.perf_counter()
+        try:
+            llm.invoke(f"Request {number}")
+            ok = True
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies = [seconds for ok, seconds in outcomes if ok]
+    stats = llm_client.client_stats()
+    return {
+        "mode": "hedging on" if hedge else "hedging off",
+        "success_rate": len(latencies) / requests,
+        "wall_seconds": wall,
+        "p50_seconds": statistics.median(latencies) if latencies else None,
+        "p95_seconds": percentile(latencies, 0.95) if latencies else None,
+        "p99_seconds": percentile(latencies, 0.99) if latencies else None,
+        "retries": stats["retries"],
+        "hedges": stats["hedges"],
+        "hedge_wins": stats["hedge_wins"],
+        "server_requests": server.requests,
+        "server_errors": server.errors,
+        "server_connections": len(server.connections),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="Usual server latency in seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Share of requests in the slow tail")
+    parser.add_argument("--slow-latency", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Share of requests failed with 429/503")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    server = StandInServer(args.latency, args.slow_rate, args.slow_latency, args.error_rate)
+    os.environ.update({
+        "AZURE_OPENAI_ENDPOINT": server.endpoint,
+        "AZURE_OPENAI_API_KEY": "stand-in",
+        "AZURE_OPENAI_API_VERSION": "2024-02-01",
+        "AZURE_OPENAI_CHAT_DEPLOYMENT_NAME": "stand-in",
+        "OPTIGENIUS_LLM_CACHE": "off",
+    })
+    import llm_client
+
+    llm = llm_client.get_azure_llm()
+    results = [run_mode(llm, server, hedge, args.requests, args.concurrency) for hedge in (False, True)]
+    server.close()
+
+    for row in results:
+        print(f"{row['mode']:12s} success {row['success_rate']:.1%}  p50 {row['p50_seconds']:.3f} s  "
+              f"p95 {row['p95_seconds']:.3f} s  p99 {row['p99_seconds']:.3f} s  retries {row['retries']}  "
+              f"hedges {row['hedges']} (won {row['hedge_wins']})  server requests {row['server_requests']} "
+              f"over {row['server_connections']} connections")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
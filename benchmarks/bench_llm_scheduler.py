@@ -0,0 +1,114 @@
+"""Compare LLM calls with and without the token-bucket scheduler (llm_scheduler.py) against a quota.
+
+A local stand-in for Azure OpenAI (see bench_llm_client.py) enforces a requests-per-minute quota over 10
+second windows. A backlog of batch calls is submitted first and interactive calls follow shortly after,
+all from --concurrency threads. Without the scheduler every call goes straight out and retries its 429s;
+with it the calls queue for the quota and interactive ones go first. The script reports the 429s the server
+sent, success rate and latency percentiles per priority, and the scheduler's queue statistics.
+
+    python -m benchmarks.bench_llm_scheduler --quota-rpm 600 --batch 120 --interactive 30 --concurrency 32
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_llm_client import StandInServer, percentile
+
+
+def latency_summary(outcomes):
+    latencies = [seconds for ok, seconds in outcomes if ok]
+    return {
+        "success_rate": len(latencies) / len(outcomes) if outcomes else None,
+        "p50_seconds": statistics.median(latencies) if latencies else None,
+        "p95_seconds": percentile(latencies, 0.95) if latencies else None,
+    }
+
+
+def run_mode(llm, server, scheduled, args):
+    import llm_client
+    import llm_scheduler
+
+    llm_scheduler.configure(tokens_per_minute=0, requests_per_minute=args.quota_rpm if scheduled else 0)
+    llm_client.reset_stats()
+    server.reset()
+
+    def one(level, number):
+        start = time.perf_counter()
+        try:
+            with llm_scheduler.priority(level):
+                llm.invoke(f"{llm_scheduler.PRIORITY_NAMES[level]} request {number}")
+            ok = True
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        batch = [executor.submit(one, llm_scheduler.BATCH, number) for number in range(args.batch)]
+        time.sleep(args.interactive_delay)
+        interactive = [executor.submit(one, llm_scheduler.INTERACTIVE, number) for number in range(args.interactive)]
+        batch = [future.result() for future in batch]
+        interactive = [future.result() for future in interactive]
+    wall = time.perf_counter() - start
+
+    stats = llm_scheduler.scheduler_stats()
+    return {
+        "mode": "scheduled" if scheduled else "unscheduled",
+        "wall_seconds": wall,
+        "server_429s": server.throttled,
+        "retries": llm_client.client_stats()["retries"],
+        "interactive": latency_summary(interactive),
+        "batch": latency_summary(batch),
+        "wait_p95_seconds": stats["wait_p95_seconds"],
+        "wait_max_seconds": stats["wait_max_seconds"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quota-rpm", type=int, default=600, help="Requests per minute the stand-in allows")
+    parser.add_argument("--batch", type=int, default=120, help="Batch calls submitted first")
+    parser.add_argument("--interactive", type=int, default=30, help="Interactive calls submitted after them")
+    parser.add_argument("--interactive-delay", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2, help="Server latency in seconds")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    server = StandInServer(args.latency, 0.0, args.latency, 0.0, requests_per_minute=args.quota_rpm)
+    os.environ.update({
+        "AZURE_OPENAI_ENDPOINT": server.endpoint,
+        "AZURE_OPENAI_API_KEY": "stand-in",
+        "AZURE_OPENAI_API_VERSION": "2024-02-01",
+        "AZURE_OPENAI_CHAT_DEPLOYMENT_NAME": "stand-in",
+        "OPTIGENIUS_LLM_CACHE": "off",
+        "OPTIGENIUS_LLM_HEDGE": "off",
+    })
+    import llm_client
+
+    llm = llm_client.get_azure_llm()
+    results = []
+    for scheduled in (False, True):
+        results.append(run_mode(llm, server, scheduled, args))
+        # Let the stand-in's quota window roll over between modes.
+        time.sleep(10)
+    server.close()
+
+    for row in results:
+        print(f"{row['mode']:12s} {row['wall_seconds']:6.2f} s  server 429s {row['server_429s']:4d}  "
+              f"retries {row['retries']:4d}  queue wait p95 {row['wait_p95_seconds']:.2f} s")
+        for level in ("interactive", "batch"):
+            summary = row[level]
+            print(f"  {level:12s} success {summary['success_rate']:.1%}  "
+                  f"p50 {summary['p50_seconds'] or 0:.2f} s  p95 {summary['p95_seconds'] or 0:.2f} s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
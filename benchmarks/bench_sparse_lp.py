@@ -0,0 +1,89 @@
+"""Compare PuLP loop construction with sparse matrix assembly for transportation LPs.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sparse_lp --sizes 10000,100000,1000000 --solve
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pulp
+
+import sparse_lp
+
+
+def random_instance(num_variables, num_sources=100, seed=42):
+    rng = np.random.default_rng(seed)
+    num_sinks = max(1, num_variables // num_sources)
+    cost = rng.uniform(1, 10, size=(num_sinks, num_sources))
+    demand = rng.integers(100, 500, size=num_sinks)
+    # Keep the instance feasible so solve times are comparable.
+    supply = np.full(num_sources, demand.sum() * 1.2 / num_sources)
+    return cost, demand, supply
+
+
+def build_with_pulp_loops(cost, demand, supply):
+    # Mirrors the way generated code builds the model.
+    num_sinks, num_sources = cost.shape
+    prob = pulp.LpProblem("transport", pulp.LpMinimize)
+    x = pulp.LpVariable.dicts("x", (range(num_sinks), range(num_sources)), lowBound=0)
+    prob += pulp.lpSum(cost[i][j] * x[i][j] for i in range(num_sinks) for j in range(num_sources))
+    for i in range(num_sinks):
+        prob += pulp.lpSum(x[i][j] for j in range(num_sources)) >= demand[i]
+    for j in range(num_sources):
+        prob += pulp.lpSum(x[i][j] for i in range(num_sinks)) <= supply[j]
+    return prob
+
+
+def run(sizes, solve, pulp_max_variables):
+    results = []
+    for size in sizes:
+        cost, demand, supply = random_instance(size)
+        row = {"variables": int(cost.size)}
+
+        start = time.perf_counter()
+        sparse_lp.build_transport_matrices(cost, demand, supply)
+        row["sparse_build_seconds"] = time.perf_counter() - start
+
+        if cost.size <= pulp_max_variables:
+            start = time.perf_counter()
+            prob = build_with_pulp_loops(cost, demand, supply)
+            row["pulp_build_seconds"] = time.perf_counter() - start
+            row["build_speedup"] = row["pulp_build_seconds"] / row["sparse_build_seconds"]
+            if solve:
+                start = time.perf_counter()
+                prob.solve(pulp.PULP_CBC_CMD(msg=False))
+                row["pulp_solve_seconds"] = time.perf_counter() - start
+                row["pulp_objective"] = pulp.value(prob.objective)
+            del prob
+
+        if solve:
+            result = sparse_lp.solve_transport(cost, demand, supply)
+            row["sparse_solve_seconds"] = result["solve_seconds"]
+            row["sparse_objective"] = result["objective"]
+
+        print(json.dumps(row))
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma separated variable counts (default: %(default)s)")
+    parser.add_argument("--solve", action="store_true", help="Also solve each instance")
+    parser.add_argument("--pulp-max-variables", type=int, default=1000000,
+                        help="Skip PuLP construction above this many variables (default: %(default)s)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run([int(size) for size in args.sizes.split(",")], args.solve, args.pulp_max_variables)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Offline stand-in for the Azure chat model used by utils.py and langgraph_crew.py.
+
+FakeChatModel answers code-writing prompts with a canned PuLP program and everything else (reports,
+explanations, fixes) with a canned report, each after a configurable latency. Generated code is checked by
+code_validator locally, so no structured-output reviewer is needed. install_fake_llm() makes it the shared
+chat model so the pipeline can be measured without Azure.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CANNED_CODE = '''```python
+import pulp
+
+supply = {"Plant_A": 300, "Plant_B": 250}
+demand = {"Store_1": 200, "Store_2": 150, "Store_3": 120}
+cost = {("Plant_A", "Store_1"): 4, ("Plant_A", "Store_2"): 6, ("Plant_A", "Store_3"): 9,
+        ("Plant_B", "Store_1"): 5, ("Plant_B", "Store_2"): 3, ("Plant_B", "Store_3"): 7}
+
+prob = pulp.LpProblem("Demand_Supply_Matching", pulp.LpMinimize)
+x = pulp.LpVariable.dicts("ship", cost.keys(), lowBound=0)
+prob += pulp.lpSum(cost[route] * x[route] for route in cost)
+for store, units in demand.items():
+    prob += pulp.lpSum(x[(plant, store)] for plant in supply) >= units
+for plant, units in supply.items():
+    prob += pulp.lpSum(x[(plant, store)] for store in demand) <= units
+prob.solve(pulp.PULP_CBC_CMD(msg=False))
+
+print("Status:", pulp.LpStatus[prob.status])
+for route in cost:
+    print(route, x[route].varValue)
+print("Total Cost:", pulp.value(prob.objective))
+```'''
+
+CANNED_REPORT = (
+    "<h3>Optimization Results</h3><p>All store demand is met at the minimum total distribution cost. "
+    "Plant_A serves Store_1, Plant_B serves Store_2 and both plants share Store_3.</p>"
+)
+
+
+def _is_code_prompt(text):
+    return "PuLP library" in text and "Write code here" in text
+
+
+class FakeChatModel(BaseChatModel):
+    latency: float = 0.0
+    code: str = CANNED_CODE
+    report: str = CANNED_REPORT
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-chat-model"
+
+    def _reply(self, messages):
+        self.calls += 1
+        text = "\n".join(str(message.content) for message in messages)
+        content = self.code if _is_code_prompt(text) else self.report
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(
+            content=content,
+            usage_metadata={"input_tokens": len(text) // 4, "output_tokens": len(content) // 4,
+                            "total_tokens": (len(text) + len(content)) // 4},
+        ))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+def prepare_offline_environment():
+    """Let the app modules import without real secrets or network and without touching the LLM cache.
+
+    llm_client reads st.secrets when it creates the chat model, so dummy secrets are written to a scratch
+    working directory.
+    """
+    os.environ.setdefault("OPTIGENIUS_LLM_CACHE", "off")
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    scratch = tempfile.mkdtemp(prefix="optigenius-bench-")
+    os.makedirs(os.path.join(scratch, ".streamlit"))
+    with open(os.path.join(scratch, ".streamlit", "secrets.toml"), "w") as f:
+        f.write('openai_api_key = "offline"\nazure_endpoint = "http://127.0.0.1:9"\n'
+                'api_version = "2024-02-01"\ndeployment_name = "offline"\n')
+    os.chdir(scratch)
+    return scratch
+
+
+def install_fake_llm(latency=0.0):
+    """Make FakeChatModel the shared chat model and drop chains built with the real model."""
+    import graph_registry
+    import llm_client
+
+    fake = FakeChatModel(latency=latency)
+    llm_client.set_azure_llm(fake)
+    graph_registry.clear()
+    return fake
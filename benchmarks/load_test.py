@@ -0,0 +1,105 @@
+"""Load test of the LangGraph pipeline: blocking runs on a thread pool vs async runs on the shared loop.
+
+Runs --sessions concurrent optimizations offline against FakeChatModel with a fixed LLM latency. The
+blocking mode gives each run a thread from a pool of --threads (the Streamlit server threads). The async
+mode schedules every run on the shared event loop with ainvoke. Reports throughput and latency percentiles
+for both.
+
+    python -m benchmarks.load_test --sessions 48 --threads 8 --llm-latency 0.5 --output load_test.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_llm import prepare_offline_environment, install_fake_llm
+
+SCENARIO = "Demand-Supply Matching"
+PROBLEM = "Match plant supply to store demand at minimum distribution cost."
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def summarize(mode, latencies, wall_seconds):
+    return {
+        "mode": mode,
+        "runs": len(latencies),
+        "wall_seconds": wall_seconds,
+        "runs_per_second": len(latencies) / wall_seconds,
+        "p50_seconds": statistics.median(latencies),
+        "p95_seconds": percentile(latencies, 0.95),
+        "max_seconds": max(latencies),
+    }
+
+
+def run_blocking(sessions, threads, candidates):
+    import langgraph_crew
+
+    def one(_):
+        start = time.perf_counter()
+        langgraph_crew.run_scenario_graph(SCENARIO, PROBLEM, candidates=candidates)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(one, range(sessions)))
+    return summarize(f"blocking, {threads} threads", latencies, time.perf_counter() - start)
+
+
+def run_async(sessions, candidates):
+    import async_runtime
+    import langgraph_crew
+
+    async def one():
+        start = time.perf_counter()
+        await langgraph_crew.arun_scenario_graph(SCENARIO, PROBLEM, candidates=candidates)
+        return time.perf_counter() - start
+
+    async def all_sessions():
+        return await asyncio.gather(*(one() for _ in range(sessions)))
+
+    start = time.perf_counter()
+    latencies = async_runtime.run(all_sessions())
+    return summarize("async, shared event loop", latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=48, help="Concurrent optimizations")
+    parser.add_argument("--threads", type=int, default=8, help="Thread pool size of the blocking mode")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Simulated seconds per LLM call")
+    parser.add_argument("--candidates", type=int, default=1)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    prepare_offline_environment()
+    os.environ.setdefault("OPTIGENIUS_TRACE_FORMAT", "off")
+    install_fake_llm(args.llm_latency)
+
+    import execution_pool
+    import langgraph_crew
+
+    execution_pool.get_pool().run("pass")
+    # Warm both graphs so compiling is not measured.
+    langgraph_crew.run_scenario_graph(SCENARIO, PROBLEM, candidates=args.candidates)
+    run_async(1, args.candidates)
+
+    results = [run_blocking(args.sessions, args.threads, args.candidates), run_async(args.sessions, args.candidates)]
+    for row in results:
+        print(f"{row['mode']:28s} {row['runs']:4d} runs in {row['wall_seconds']:6.2f} s  "
+              f"{row['runs_per_second']:6.2f} runs/s  p50 {row['p50_seconds']:.2f} s  p95 {row['p95_seconds']:.2f} s")
+    print(f"Throughput gain: {results[1]['runs_per_second'] / results[0]['runs_per_second']:.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""End-to-end benchmark suite that runs offline against FakeChatModel.
+
+Covers graph construction, every node in langgraph_crew.py, the code executor, the scenario generators at
+several sizes, native solver time and a full graph run. LLM calls take a fixed, configurable latency, and
+each node result also reports its overhead (measured time minus simulated LLM time), so regressions in our
+own code show up separately from LLM latency.
+
+    python -m benchmarks.run_benchmarks --llm-latency 0.05 --output bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+
+from benchmarks.fake_llm import prepare_offline_environment, install_fake_llm
+
+GENERATOR_SIZES = {
+    "Customer Order Fulfillment": lambda n: {"num_customers": n, "num_warehouses": max(2, n // 10)},
+    "Demand-Supply Matching": lambda n: {"num_stores": n, "num_plants": max(2, n // 10)},
+    "Supplier Risk Assessment": lambda n: {"num_suppliers": n},
+    "Demand Forecasting": lambda n: {"num_products": n},
+    "Inventory Optimization": lambda n: {"num_products": n, "num_warehouses": max(2, n // 10)},
+    "Transportation Optimization": lambda n: {"num_customers": n, "num_warehouses": max(2, n // 10)},
+}
+
+
+def measure(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "repeats": repeats,
+        "mean_seconds": statistics.mean(times),
+        "median_seconds": statistics.median(times),
+        "min_seconds": min(times),
+        "max_seconds": max(times),
+    }
+
+
+def bench_graph(results, repeats):
+    import graph_registry
+    import langgraph_crew
+
+    results.append({"name": "graph.build", **measure(langgraph_crew.build_graph, repeats)})
+    results.append({"name": "graph.build.candidates_3",
+                    **measure(lambda: langgraph_crew.build_graph(candidates=3), repeats)})
+    langgraph_crew.get_graph("benchmark")
+    results.append({"name": "graph.lookup_cached", **measure(lambda: langgraph_crew.get_graph("benchmark"),
+                                                               repeats * 100)})
+    graph_registry.clear()
+
+
+def bench_nodes(results, repeats, fake, problem_statement):
+    import langgraph_crew
+
+    base_state = {"optimization_task": "Demand-Supply Matching", "problem_statement": problem_statement}
+    code_state = langgraph_crew.evaluator_node(langgraph_crew.generate_pulp_code_for_problem(dict(base_state)))
+    answer_state = dict(code_state, optimization_answer="Total Cost: 2130.0")
+
+    nodes = [
+        ("code_writer", langgraph_crew.generate_pulp_code_for_problem, base_state, 1),
+        ("evaluator_node", langgraph_crew.evaluator_node, code_state, 0),
+        ("code_reviewer", langgraph_crew.code_reviewer, code_state, 0),
+        ("code_fixer", langgraph_crew.fix_code, code_state, 1),
+        ("code_executor", langgraph_crew.code_executor, code_state, 0),
+        ("expert_report_writer", langgraph_crew.report_writer, answer_state, 1),
+    ]
+    for name, node, state, llm_calls in nodes:
+        node(dict(state))  # warm chains and executor workers
+        row = measure(lambda: node(dict(state)), repeats)
+        row["llm_seconds_per_call"] = llm_calls * fake.latency
+        row["overhead_mean_seconds"] = row["mean_seconds"] - llm_calls * fake.latency
+        results.append({"name": f"node.{name}", **row})
+
+
+def bench_executor(results, repeats):
+    import execution_pool
+    from benchmarks.fake_llm import CANNED_CODE
+
+    pool = execution_pool.get_pool()
+    pool.run("pass")  # wait until at least one worker is warm
+    results.append({"name": "executor.canned_pulp_code",
+                    **measure(lambda: execution_pool.execute(CANNED_CODE), repeats)})
+    results.append({"name": "executor.noop", **measure(lambda: pool.run("pass"), repeats)})
+
+
+def bench_generators(results, repeats, sizes):
+    from supply_chain_scenarios import GENERATORS
+
+    for scenario, size_params in GENERATOR_SIZES.items():
+        for size in sizes:
+            params = size_params(size)
+            row = measure(lambda: GENERATORS[scenario](**params), repeats)
+            results.append({"name": f"generator.{scenario}", "size": size, "params": params, **row})
+
+
+def bench_solver(results, repeats, sizes):
+    import native_models
+    from supply_chain_scenarios import GENERATORS
+
+    for scenario in native_models.NATIVE_BUILDERS:
+        for size in sizes:
+            params = GENERATOR_SIZES[scenario](size)
+            _, _, constraints, data = GENERATORS[scenario](**params)
+            status = {}
+
+            def solve():
+                status["status"] = native_models.solve_scenario(scenario, data, constraints)["status"]
+
+            row = measure(solve, repeats)
+            results.append({"name": f"solver.{scenario}", "size": size, "params": params,
+                            "status": status["status"], **row})
+
+
+def bench_end_to_end(results, repeats, fake, problem_statement):
+    import langgraph_crew
+
+    for candidates in (1, 3):
+        langgraph_crew.run_scenario_graph("Demand-Supply Matching", problem_statement, candidates=candidates)
+        calls_before = fake.calls
+        row = measure(lambda: langgraph_crew.run_scenario_graph("Demand-Supply Matching", problem_statement,
+                                                                candidates=candidates), repeats)
+        calls_per_run = (fake.calls - calls_before) / repeats
+        row["llm_calls_per_run"] = calls_per_run
+        row["overhead_mean_seconds"] = row["mean_seconds"] - calls_per_run * fake.latency
+        results.append({"name": f"graph.end_to_end.candidates_{candidates}", **row})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Simulated seconds per LLM call")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--sizes", default="5,50,500", help="Generator/solver instance sizes")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file for the results")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    prepare_offline_environment()
+    fake = install_fake_llm(latency=args.llm_latency)
+
+    from langgraph_crew import compose_problem_statement
+    from supply_chain_scenarios import GENERATORS
+
+    problem_statement = compose_problem_statement(*GENERATORS["Demand-Supply Matching"]())
+
+    results = []
+    bench_graph(results, args.repeats)
+    bench_nodes(results, args.repeats, fake, problem_statement)
+    bench_executor(results, args.repeats)
+    bench_generators(results, args.repeats, sizes)
+    bench_solver(results, args.repeats, sizes)
+    bench_end_to_end(results, args.repeats, fake, problem_statement)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "llm_latency_seconds": args.llm_latency,
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for row in results:
+        overhead = f"  overhead {row['overhead_mean_seconds'] * 1000:8.2f} ms" if "overhead_mean_seconds" in row else ""
+        size = f" [{row['size']}]" if "size" in row else ""
+        print(f"{row['name'] + size:55s} mean {row['mean_seconds'] * 1000:9.2f} ms{overhead}")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
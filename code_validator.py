@@ -0,0 +1,160 @@
+"""Local static checks of generated PuLP code, in place of an LLM review call.
+
+validate_code() parses and compiles the program and checks that:
+- every imported module can be found, down to the full dotted name;
+- every name it reads is bound somewhere;
+- PuLP is imported;
+- a solve call exists;
+- results are printed.
+
+It takes milliseconds and never runs the code. The verdict is a dict with ``valid``, ``errors``,
+``warnings`` and ``seconds``. Name resolution is deliberately lenient: a name bound anywhere in the
+program counts as defined everywhere, so only names that can never exist are reported.
+"""
+import ast
+import builtins
+import functools
+import importlib.machinery
+import importlib.util
+import sys
+import time
+
+import execution_pool
+
+SOLVE_FUNCTIONS = {"solve", "solveWith", "actualSolve"}
+OUTPUT_FUNCTIONS = {"print", "display", "pprint"}
+# Names the execution namespace provides besides the builtins.
+PREDEFINED_NAMES = {"__name__", "__file__", "__builtins__"}
+
+
+@functools.lru_cache(maxsize=None)
+def _module_available(name):
+    # Resolves the full dotted name without running any package __init__ that is not already loaded:
+    # submodules of an unloaded package are looked up on the parent's search path instead.
+    parent, _, _ = name.rpartition(".")
+    try:
+        if not parent or parent in sys.modules:
+            return importlib.util.find_spec(name) is not None
+        if not _module_available(parent):
+            return False
+        parts = name.split(".")
+        path = None
+        for index in range(len(parts)):
+            spec = importlib.machinery.PathFinder.find_spec(".".join(parts[:index + 1]), path)
+            if spec is None:
+                return False
+            path = spec.submodule_search_locations
+        return True
+    except (ImportError, ValueError):
+        return False
+
+
+def _star_names(module_name):
+    # Names a "from module import *" brings in. Only modules already loaded in this process are listed,
+    # generated code never gets to import anything here; any other module leaves the names unresolvable.
+    module = sys.modules.get(module_name)
+    if module is None:
+        return None
+    names = getattr(module, "__all__", None)
+    return frozenset(names if names is not None else (name for name in dir(module) if not name.startswith("_")))
+
+
+def _bound_names(tree):
+    bound = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, ast.alias):
+            if node.name != "*":
+                bound.add(node.asname or node.name.split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            bound.add(node.rest)
+    return bound
+
+
+def _call_name(node):
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+def validate_code(text):
+    """Check generated code (markdown fences allowed) without running it."""
+    start = time.perf_counter()
+    code = execution_pool.extract_code(text)
+    errors = []
+    warnings = []
+
+    if not code.strip():
+        errors.append("No code found")
+        return {"valid": False, "errors": errors, "warnings": warnings, "seconds": time.perf_counter() - start}
+
+    try:
+        tree = ast.parse(code, filename="generated_code.py")
+        compile(tree, "generated_code.py", "exec")
+    except SyntaxError as ex:
+        errors.append(f"Syntax error on line {ex.lineno}: {ex.msg}")
+        return {"valid": False, "errors": errors, "warnings": warnings, "seconds": time.perf_counter() - start}
+
+    imported = set()
+    defined = _bound_names(tree) | set(dir(builtins)) | PREDEFINED_NAMES
+    resolvable = True
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules = [node.module]
+            if any(alias.name == "*" for alias in node.names):
+                names = _star_names(node.module)
+                if names is None:
+                    resolvable = False
+                else:
+                    defined |= names
+        else:
+            continue
+        for module in modules:
+            imported.add(module.split(".")[0])
+            if not _module_available(module):
+                errors.append(f"Module '{module}' is not installed")
+
+    if resolvable:
+        undefined = {}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in defined:
+                undefined.setdefault(node.id, node.lineno)
+        errors.extend(f"Undefined name '{name}' on line {line}" for name, line in undefined.items())
+
+    calls = {_call_name(node) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    if "pulp" not in imported:
+        errors.append("PuLP is not imported")
+    if not calls & SOLVE_FUNCTIONS:
+        errors.append("The model is never solved (no solve call)")
+    if not calls & OUTPUT_FUNCTIONS:
+        errors.append("Results are never printed")
+    if "solvers" not in imported:
+        warnings.append("Does not use solvers.solve(), the solver runs without a time limit")
+
+    return {"valid": not errors, "errors": errors, "warnings": warnings, "seconds": time.perf_counter() - start}
+
+
+def format_verdict(verdict):
+    if verdict["valid"]:
+        text = f"Code validation passed in {verdict['seconds'] * 1000:.1f} ms"
+    else:
+        text = f"Code validation failed in {verdict['seconds'] * 1000:.1f} ms: " + "; ".join(verdict["errors"])
+    if verdict["warnings"]:
+        text += " (warnings: " + "; ".join(verdict["warnings"]) + ")"
+    return text
@@ -0,0 +1,140 @@
+"""Memory-bounded ingestion of uploaded CSV files for the Custom Scenario.
+
+Files are parsed in blocks with the pyarrow CSV reader and streamed block by block into a scratch Arrow file.
+Repetitive text columns then become categoricals; the types are chosen on the memory-mapped scratch file and
+the blocks rewritten with them. Numbers keep their 64-bit types: the tables go straight to generated pandas
+and PuLP code, where narrow integers would silently wrap around on sums, products and differences. Parsing therefore holds a few blocks in memory instead of the whole file. The compact
+result is cached as Parquet under its content hash (OPTIGENIUS_UPLOAD_CACHE, default .cache/uploads), so a
+file uploaded again, in any session, is loaded from there instead of being parsed. The returned DataFrame is
+of course the whole (compact) table, and the pandas fallback for files pyarrow cannot type from their first
+block still reads them whole. describe_tables() gives a schema-plus-statistics summary for prompts in place
+of raw rows.
+"""
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "uploads")
+BLOCK_BYTES = 16 * 1024 * 1024
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+PANDAS_CHUNK_ROWS = 200_000
+# Text columns with at most this share of distinct values are stored as categoricals.
+CATEGORY_MAX_RATIO = 0.5
+SUMMARY_TOP_VALUES = 3
+
+
+def file_digest(fileobj):
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(HASH_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _write_blocks(fileobj, path):
+    # Streams the file block by block into an Arrow IPC file; column types are inferred from the first block.
+    reader = pv.open_csv(fileobj, read_options=pv.ReadOptions(block_size=BLOCK_BYTES))
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+
+
+def _read_pandas_chunks(fileobj):
+    # Fallback for files whose later rows do not fit the types inferred from the first block.
+    fileobj.seek(0)
+    df = pd.concat(pd.read_csv(fileobj, chunksize=PANDAS_CHUNK_ROWS), ignore_index=True)
+    for column in df.columns[df.dtypes == object]:
+        # Chunks may disagree on a column's type (numbers in one, text in another), keep those as text.
+        df[column] = df[column].astype(str).where(df[column].notna())
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _compact_type(column):
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        if len(column) and pc.count_distinct(column).as_py() <= CATEGORY_MAX_RATIO * len(column):
+            return pa.dictionary(pa.int32(), column.type)
+    return column.type
+
+
+def compact_table(table):
+    """Dictionary-encode the repetitive string columns of an Arrow table."""
+    columns = [column.cast(_compact_type(column)) for column in table.columns]
+    return pa.table(columns, names=table.column_names)
+
+
+def _compact_parquet(source, target):
+    # The IPC file is memory-mapped, so choosing the column types reads it from the page cache instead of
+    # allocating it; the blocks are then cast and written to Parquet one at a time.
+    with pa.memory_map(source) as mapped:
+        reader = pa.ipc.open_file(mapped)
+        table = reader.read_all()
+        schema = pa.schema([field.with_type(_compact_type(column))
+                            for field, column in zip(table.schema, table.columns)])
+        with pq.ParquetWriter(target, schema) as writer:
+            for index in range(reader.num_record_batches):
+                writer.write_batch(reader.get_batch(index).cast(schema))
+
+
+def _cache_dir():
+    return os.environ.get("OPTIGENIUS_UPLOAD_CACHE", DEFAULT_CACHE_DIR)
+
+
+def ingest_csv(fileobj, digest=None):
+    """Return a compact DataFrame for a binary CSV file object, parsing each distinct file only once."""
+    digest = digest or file_digest(fileobj)
+    path = os.path.join(_cache_dir(), f"{digest}.parquet")
+    if os.path.exists(path):
+        table = pq.read_table(path)
+    else:
+        os.makedirs(_cache_dir(), exist_ok=True)
+        # Sessions are threads of one process, so every upload gets its own scratch files.
+        raw_fd, raw_path = tempfile.mkstemp(suffix=".raw", dir=_cache_dir())
+        tmp_fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=_cache_dir())
+        os.close(raw_fd)
+        os.close(tmp_fd)
+        fileobj.seek(0)
+        try:
+            try:
+                _write_blocks(fileobj, raw_path)
+                _compact_parquet(raw_path, tmp_path)
+            except pa.ArrowInvalid as ex:
+                print(f"pyarrow could not parse the CSV in blocks ({ex}), reading it with pandas")
+                pq.write_table(compact_table(_read_pandas_chunks(fileobj)), tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            for scratch in (raw_path, tmp_path):
+                if os.path.exists(scratch):
+                    os.remove(scratch)
+        table = pq.read_table(path)
+
+    return table.to_pandas()
+
+
+def describe_table(name, df):
+    lines = [f"## {name} ({len(df)} rows x {df.shape[1]} columns)"]
+    for column in df.columns:
+        series = df[column]
+        nulls = int(series.isna().sum())
+        text = f"- {column} [{series.dtype}]"
+        if nulls:
+            text += f", {nulls} missing"
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            text += f": min {series.min():g}, mean {series.mean():g}, max {series.max():g}"
+        else:
+            counts = series.value_counts()
+            top = ", ".join(f"{value} ({count})" for value, count in counts.head(SUMMARY_TOP_VALUES).items())
+            text += f": {len(counts)} distinct, most common {top}"
+        lines.append(text)
+    return "\n".join(lines)
+
+
+def describe_tables(data_in_format):
+    """Schema-plus-statistics summary of every table, used in prompts instead of raw rows."""
+    return "\n\n".join(describe_table(name, df) for name, df in data_in_format.items())
@@ -0,0 +1,178 @@
+"""Hand scenario data to generated code as Parquet files instead of inlining it in the prompt.
+
+write_data_files() stores every ``data_in_format`` table as a Parquet file under ``data/<content hash>`` in
+the execution work directory (the cwd of the execution pool workers). The code-writing prompts then only
+carry each table's schema, a few preview rows and a loader stub, so prompt size no longer grows with the
+instance. Identical data maps to the same directory, so repeated runs neither rewrite files nor change the
+prompt (and its LLM cache key). Directories not written or reused for OPTIGENIUS_DATA_FILES_TTL_HOURS are
+removed again by prune_data_files(), which write_data_files() runs every few minutes.
+"""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+import data_serializer
+import execution_pool
+
+DATA_SUBDIR = "data"
+DEFAULT_REFERENCE_CELLS = 2000
+PREVIEW_ROWS = 3
+# Wide tables (e.g. cost matrices) list only their first columns.
+MAX_LISTED_COLUMNS = 12
+DEFAULT_TTL_HOURS = 24
+PRUNE_INTERVAL_SECONDS = 600
+
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+
+def _table_frame(df):
+    # Parquet needs string column names; a meaningful index is stored as regular column(s).
+    levels = 0
+    if not isinstance(df.index, pd.RangeIndex):
+        levels = df.index.nlevels
+        df = df.reset_index()
+    df = df.copy()
+    df.columns = [str(column) for column in df.columns]
+    return df, list(df.columns[:levels])
+
+
+def _file_name(position, name):
+    safe = "".join(char if char.isalnum() else "_" for char in name).strip("_").lower()
+    return f"{position:02d}_{safe or 'table'}.parquet"
+
+
+def write_data_files(data_in_format, work_dir=None):
+    """Write the tables as Parquet and return a manifest describing them (paths relative to work_dir)."""
+    work_dir = work_dir or execution_pool.configured_work_dir()
+    tables = []
+    payloads = []
+    digest = hashlib.sha256()
+    for position, (name, df) in enumerate(data_in_format.items()):
+        frame, index_columns = _table_frame(df)
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer, engine="pyarrow", index=False)
+        payload = buffer.getvalue()
+        file_name = _file_name(position, name)
+        digest.update(name.encode() + b"\0" + payload)
+        payloads.append((file_name, payload))
+        tables.append({
+            "name": name,
+            "file": file_name,
+            "rows": len(frame),
+            "index": index_columns,
+            "columns": [(column, str(dtype)) for column, dtype in frame.dtypes.items()],
+        })
+
+    relative_dir = f"{DATA_SUBDIR}/{digest.hexdigest()[:16]}"
+    target = os.path.join(work_dir, relative_dir)
+    if os.path.isdir(target):
+        # Reused data counts as fresh, so pruning never removes what a current session still points at.
+        os.utime(target)
+    else:
+        parent = os.path.join(work_dir, DATA_SUBDIR)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+        for file_name, payload in payloads:
+            with open(os.path.join(staging, file_name), "wb") as f:
+                f.write(payload)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Another run wrote the same data first.
+            for file_name, _ in payloads:
+                os.remove(os.path.join(staging, file_name))
+            os.rmdir(staging)
+    _maybe_prune(work_dir)
+    return {"dir": relative_dir, "tables": tables}
+
+
+def prune_data_files(work_dir=None, max_age_seconds=None):
+    """Remove data directories (and abandoned staging directories) older than the TTL; returns how many."""
+    work_dir = work_dir or execution_pool.configured_work_dir()
+    if max_age_seconds is None:
+        max_age_seconds = float(os.environ.get("OPTIGENIUS_DATA_FILES_TTL_HOURS", DEFAULT_TTL_HOURS)) * 3600
+    parent = os.path.join(work_dir, DATA_SUBDIR)
+    if not os.path.isdir(parent):
+        return 0
+    removed = 0
+    now = time.time()
+    for entry in os.scandir(parent):
+        try:
+            if entry.is_dir() and now - entry.stat().st_mtime > max_age_seconds:
+                shutil.rmtree(entry.path)
+                removed += 1
+        except OSError:
+            # Removed concurrently by another process.
+            pass
+    return removed
+
+
+def _maybe_prune(work_dir):
+    global _last_prune
+    with _prune_lock:
+        if time.monotonic() - _last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        _last_prune = time.monotonic()
+    prune_data_files(work_dir)
+
+
+def loader_stub(manifest):
+    lines = [
+        "import pandas as pd",
+        "",
+        f'DATA_DIR = "{manifest["dir"]}"',
+        "data = {",
+    ]
+    for table in manifest["tables"]:
+        reader = f'pd.read_parquet(f"{{DATA_DIR}}/{table["file"]}")'
+        if table["index"]:
+            index = table["index"][0] if len(table["index"]) == 1 else table["index"]
+            reader += f".set_index({index!r})"
+        lines.append(f'    {table["name"]!r}: {reader},')
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def describe_data_files(data_in_format, manifest, preview_rows=PREVIEW_ROWS):
+    """Prompt text with each table's schema, a short preview and the loader stub."""
+    parts = ["The data is stored in Parquet files. Do not retype the values in the code, load them at run "
+             "time with exactly this code and read every number from the `data` tables:",
+             "```python\n" + loader_stub(manifest) + "\n```"]
+    for table in manifest["tables"]:
+        # Exact column names (unlike the compact inline form) since the code has to index by them.
+        frame, _ = _table_frame(data_in_format[table["name"]].head(preview_rows))
+        columns = [(column, dtype) for column, dtype in table["columns"] if column not in table["index"]]
+        listed = ", ".join(f"{column} [{dtype}]" for column, dtype in columns[:MAX_LISTED_COLUMNS])
+        if len(columns) > MAX_LISTED_COLUMNS:
+            dtypes = sorted({dtype for _, dtype in columns[MAX_LISTED_COLUMNS:]})
+            listed += f", ... {len(columns) - MAX_LISTED_COLUMNS} more columns [{', '.join(dtypes)}]"
+            frame = frame.iloc[:, :len(table["index"]) + MAX_LISTED_COLUMNS]
+        index = f", index: {', '.join(table['index'])}" if table["index"] else ""
+        parts.append(f"## data[{table['name']!r}] ({table['rows']} rows x {len(columns)} columns{index})\n"
+                     f"columns: {listed}\nfirst rows:\n{frame.to_csv(index=False, lineterminator=chr(10))}")
+    return "\n\n".join(parts)
+
+
+def use_reference(data_in_format):
+    mode = os.environ.get("OPTIGENIUS_DATA_BY_REFERENCE", "auto")
+    if mode == "never":
+        return False
+    if mode == "always":
+        return True
+    cells = sum(df.size for df in data_in_format.values())
+    return cells > int(os.environ.get("OPTIGENIUS_DATA_REFERENCE_CELLS", DEFAULT_REFERENCE_CELLS))
+
+
+def code_prompt_data(data):
+    """Data text for prompts that produce executable code: a file reference for large tables, inline otherwise."""
+    if isinstance(data, dict) and data and all(isinstance(df, pd.DataFrame) for df in data.values()) \
+            and use_reference(data):
+        return describe_data_files(data, write_data_files(data))
+    return data_serializer.prompt_data(data)
@@ -0,0 +1,164 @@
+"""Compact, token-budgeted text form of the ``data_in_format`` tables that go into LLM prompts.
+
+Each table becomes a short header line plus CSV with rounded numbers. A unit suffix shared by every column
+(e.g. " (Distribution Cost USD)") is written once in the header instead of on every column. The result is
+measured with tiktoken; when it exceeds the token budget the largest tables are cut down to their first rows
+plus summary statistics until it fits. The rows that fit are estimated from the tokens per row of a small
+sample first, so a large upload is never rendered or tokenized in full.
+"""
+import io
+import os
+import re
+import threading
+
+import pandas as pd
+
+DEFAULT_TOKEN_BUDGET = 6000
+DEFAULT_PRECISION = 2
+TOKEN_MODEL = "gpt-4o"
+SUFFIX_PATTERN = re.compile(r"^(.*\S)\s*\(([^()]+)\)$")
+# Wider tables only get overall statistics when summarised.
+MAX_SUMMARY_COLUMNS = 12
+# Rows rendered per table to estimate its tokens per row.
+SAMPLE_ROWS = 50
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        # Callers from several threads at once load it only once.
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.encoding_for_model(TOKEN_MODEL)
+                except Exception as ex:
+                    # tiktoken downloads its vocabulary on first use, fall back to an estimate when offline.
+                    print(f"tiktoken unavailable ({ex!r}), estimating tokens as characters / 4")
+                    _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _truncate(text, token_budget):
+    encoding = _get_encoding()
+    if encoding:
+        return encoding.decode(encoding.encode(text)[:token_budget])
+    return text[:token_budget * 4]
+
+
+def _common_suffix(columns):
+    # "Plant_A (Distribution Cost USD)", "Plant_B (Distribution Cost USD)" -> "Distribution Cost USD"
+    if len(columns) < 2:
+        return None
+    suffixes = set()
+    for column in columns:
+        match = SUFFIX_PATTERN.match(str(column))
+        if match is None:
+            return None
+        suffixes.add(match.group(2))
+    return suffixes.pop() if len(suffixes) == 1 else None
+
+
+def compact_table(df, precision=DEFAULT_PRECISION):
+    """Return (frame, note): the table with a shared column suffix stripped and numbers rounded."""
+    df = df.copy()
+    note = ""
+    suffix = _common_suffix(list(df.columns))
+    if suffix is not None:
+        df.columns = [SUFFIX_PATTERN.match(str(column)).group(1) for column in df.columns]
+        note = f"values in {suffix}"
+    if not isinstance(df.index, pd.RangeIndex):
+        df = df.reset_index()
+    float_columns = df.select_dtypes(include="float").columns
+    df[float_columns] = df[float_columns].round(precision)
+    return df, note
+
+
+def _summary(df):
+    numeric = df.select_dtypes(include="number")
+    if numeric.empty:
+        return ""
+    if len(numeric.columns) > MAX_SUMMARY_COLUMNS:
+        values = numeric.to_numpy()
+        return f"all values: min {values.min():g}, mean {values.mean():g}, max {values.max():g}"
+    return "; ".join(f"{column}: min {numeric[column].min():g}, mean {numeric[column].mean():g}, "
+                     f"max {numeric[column].max():g}" for column in numeric.columns)
+
+
+def _render_table(name, df, note, max_rows=None):
+    rows, columns = df.shape
+    header = f"## {name} ({rows} rows x {columns} columns{', ' + note if note else ''})"
+    shown = df if max_rows is None or max_rows >= rows else df.head(max_rows)
+    buffer = io.StringIO()
+    if max_rows is None or max_rows > 0:
+        shown.to_csv(buffer, index=False, lineterminator="\n")
+    text = header + "\n" + buffer.getvalue()
+    if len(shown) < rows:
+        text += f"... {rows - len(shown)} more rows omitted\n"
+        summary = _summary(df)
+        if summary:
+            text += f"summary: {summary}\n"
+    return text
+
+
+def serialize_data(data_in_format, token_budget=None, precision=DEFAULT_PRECISION):
+    """Serialize a {table name: DataFrame} dict for a prompt within token_budget tokens."""
+    if token_budget is None:
+        token_budget = int(os.environ.get("OPTIGENIUS_DATA_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+    tables = {name: compact_table(df, precision) for name, df in data_in_format.items()}
+    limits = {name: None for name in tables}
+
+    def render():
+        return "\n".join(_render_table(name, df, note, limits[name]) for name, (df, note) in tables.items())
+
+    def shown():
+        return {name: len(df) if limits[name] is None else limits[name] for name, (df, _) in tables.items()}
+
+    def halve_largest():
+        # Halve the rows shown of the table currently taking the most cells; False once nothing is left.
+        rows = shown()
+        name = max(rows, key=lambda table: rows[table] * max(1, tables[table][0].shape[1]))
+        if rows[name] == 0:
+            return False
+        limits[name] = rows[name] // 2
+        return True
+
+    # Cut down on estimates first: fixed text (header, column names, summary) plus sampled tokens per row.
+    fixed_tokens, row_tokens = {}, {}
+    for name, (df, note) in tables.items():
+        sample = df.head(SAMPLE_ROWS)
+        columns_tokens = count_tokens(sample.head(0).to_csv(index=False, lineterminator="\n"))
+        fixed_tokens[name] = count_tokens(_render_table(name, df, note, 0)) + columns_tokens
+        row_tokens[name] = (count_tokens(sample.to_csv(index=False, lineterminator="\n")) - columns_tokens) / \
+            max(1, len(sample))
+    while sum(fixed_tokens[name] + rows * row_tokens[name] for name, rows in shown().items()) > token_budget:
+        if not halve_largest():
+            break
+
+    text = render()
+    tokens = count_tokens(text)
+    # The sample can underestimate later rows, keep halving on the measured text.
+    while tokens > token_budget:
+        if not halve_largest():
+            text = _truncate(text, token_budget)
+            break
+        text = render()
+        tokens = count_tokens(text)
+    return text
+
+
+def prompt_data(data, token_budget=None):
+    # Prompts accept either ready text or the dict of DataFrames from the scenario generators / CSV uploads.
+    if isinstance(data, dict) and all(isinstance(df, pd.DataFrame) for df in data.values()):
+        return serialize_data(data, token_budget)
+    return data
@@ -0,0 +1,346 @@
+"""Pool of warm, long-lived Python worker processes for executing generated PuLP code.
+
+Each worker imports PuLP, NumPy and pandas once at start-up and then runs jobs in a fresh namespace, so
+small solves no longer pay for a new interpreter and its imports. A job that exceeds its timeout gets its
+worker killed and replaced. Jobs from many users run in parallel, one per worker.
+
+Fresh globals do not undo changes a job makes to the process: solver settings or monkeypatches on the warm
+modules, sys.path and environment edits. A worker that sees such a change after a job retires, and every
+worker retires after OPTIGENIUS_EXEC_MAX_JOBS jobs, so leftovers from one session cannot leak far.
+"""
+import atexit
+import contextlib
+import io
+import multiprocessing.context
+import os
+import queue
+import re
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import types
+
+DEFAULT_WORK_DIR = "code_temp"
+DEFAULT_TIMEOUT = 10
+DEFAULT_MAX_JOBS = 50
+WARM_MODULES = ("pulp", "numpy", "pandas", "solvers")
+CANCEL_POLL_SECONDS = 0.05
+# A cancelled job may still finish within this window, which keeps its worker warm instead of killing it.
+CANCEL_GRACE_SECONDS = 1.0
+
+CODE_BLOCK_PATTERN = re.compile(r"```[ \t]*(?:python|py|Python)?[ \t]*\n(.*?)```", re.DOTALL)
+
+
+def extract_code(text):
+    # LLM replies usually wrap the program in markdown fences, run only the code blocks when there are any.
+    blocks = CODE_BLOCK_PATTERN.findall(text or "")
+    return "\n\n".join(blocks) if blocks else (text or "")
+
+
+OBJECTIVE_PATTERN = re.compile(
+    r"(?i)(?:objective|total[\w ]*(?:cost|profit|value)|optimal value)[^0-9\n-]*(-?\d[\d,]*(?:\.\d+)?(?:e[-+]?\d+)?)"
+)
+
+
+def parse_objective(output):
+    """Return the objective value printed by generated code, or None when there is none to parse."""
+    if not output or re.search(r"(?i)\b(infeasible|unbounded|not solved)\b", output):
+        return None
+    match = OBJECTIVE_PATTERN.search(output)
+    if match is None:
+        return None
+    try:
+        return float(match.group(1).replace(",", ""))
+    except ValueError:
+        return None
+
+
+_main_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def hidden_main_module():
+    """Hide the parent's __main__ from a process being spawned, so it does not re-run the parent's script.
+
+    Streamlit runs the app as __main__, so every spawned child would otherwise import and run the whole app.
+    Only the launch of one child is covered (see CleanMainProcess). A concurrent Streamlit script run that
+    installs its own __main__ meanwhile is kept, not reverted, and the yielded dict reports it as disturbed.
+    """
+    with _main_lock:
+        main = sys.modules.get("__main__")
+        placeholder = types.ModuleType("__main__")
+        sys.modules["__main__"] = placeholder
+        swap = {"disturbed": False}
+        try:
+            yield swap
+        finally:
+            if sys.modules.get("__main__") is placeholder:
+                sys.modules["__main__"] = main
+            else:
+                swap["disturbed"] = True
+
+
+class CleanMainProcess(multiprocessing.context.SpawnProcess):
+    # The swap happens in the spawn bootstrap itself, for exactly as long as the child's launch data is built.
+    @staticmethod
+    def _Popen(process_obj):
+        while True:
+            with hidden_main_module() as swap:
+                popen = multiprocessing.context.SpawnProcess._Popen(process_obj)
+            if not swap["disturbed"]:
+                return popen
+            # Another session's script became __main__ during the launch, the child may have been told to run it.
+            popen.kill()
+            popen.wait()
+
+
+class CleanMainContext(multiprocessing.context.SpawnContext):
+    """spawn start method whose children never run the parent's __main__; pass it as mp_context."""
+    Process = CleanMainProcess
+
+
+CLEAN_MAIN_CONTEXT = CleanMainContext()
+
+
+def _process_state():
+    # What a job can change that outlives its namespace: attributes of the warm modules (monkeypatched
+    # functions, module level settings), the default solver's options, the import path and the environment.
+    attributes = {}
+    for name in WARM_MODULES:
+        if name in sys.modules:
+            attributes.update({(name, key): id(value) for key, value in vars(sys.modules[name]).items()})
+    default_solver = getattr(sys.modules.get("pulp"), "LpSolverDefault", None)
+    if default_solver is not None:
+        attributes.update({("LpSolverDefault", key): id(value) for key, value in vars(default_solver).items()})
+    return attributes, list(sys.path), dict(os.environ)
+
+
+def _state_changed(before):
+    attributes, path, environ = _process_state()
+    # Attributes a job added (e.g. a submodule imported for the first time) are harmless, changed ones are not.
+    return (any(attributes.get(key) != value for key, value in before[0].items())
+            or path != before[1] or environ != before[2])
+
+
+@contextlib.contextmanager
+def _captured_output():
+    # Solvers such as CBC run as subprocesses writing to file descriptors 1 and 2, which redirect_stdout does
+    # not see. Both descriptors and the Python streams point at one file, so the output keeps its order.
+    with tempfile.TemporaryFile() as captured:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved = os.dup(1), os.dup(2)
+        os.dup2(captured.fileno(), 1)
+        os.dup2(captured.fileno(), 2)
+        stream = io.TextIOWrapper(io.FileIO(captured.fileno(), "w", closefd=False), errors="replace",
+                                  line_buffering=True)
+        result = {}
+        try:
+            with contextlib.redirect_stdout(stream), contextlib.redirect_stderr(stream):
+                yield result
+        finally:
+            stream.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+            captured.seek(0)
+            result["output"] = captured.read().decode(errors="replace")
+
+
+def _worker_main(conn, work_dir, max_jobs=DEFAULT_MAX_JOBS):
+    for module in WARM_MODULES:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+    os.makedirs(work_dir, exist_ok=True)
+    work_dir = os.path.abspath(work_dir)
+    state = _process_state()
+    jobs = 0
+
+    while True:
+        try:
+            code = conn.recv()
+        except EOFError:
+            break
+        if code is None:
+            break
+
+        os.chdir(work_dir)
+        # Fresh globals for every job, only the imported modules survive between jobs.
+        namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+        exitcode = 0
+        with _captured_output() as captured:
+            try:
+                exec(compile(code, "generated_code.py", "exec"), namespace)
+            except SystemExit as ex:
+                exitcode = ex.code if isinstance(ex.code, int) else (0 if ex.code is None else 1)
+            except BaseException as ex:
+                # Skip this module's frame so the traceback starts in the generated code.
+                traceback.print_exception(type(ex), ex, ex.__traceback__.tb_next)
+                exitcode = 1
+        namespace.clear()
+        jobs += 1
+        retire = jobs >= max_jobs or _state_changed(state)
+        conn.send((exitcode, captured["output"], retire))
+        if retire:
+            break
+
+
+class ExecutionPool:
+    def __init__(self, size=None, work_dir=DEFAULT_WORK_DIR, timeout=DEFAULT_TIMEOUT, max_jobs=DEFAULT_MAX_JOBS):
+        self.size = size or os.cpu_count() or 1
+        self.work_dir = work_dir
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self.retired = 0
+        # spawn keeps workers independent of the threads running in the parent (e.g. Streamlit).
+        self._context = CLEAN_MAIN_CONTEXT
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(self._start_worker())
+
+    def _start_worker(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn, self.work_dir, self.max_jobs),
+                                        daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    @staticmethod
+    def _stop_worker(worker):
+        process, conn = worker
+        if process.is_alive():
+            process.kill()
+        process.join()
+        conn.close()
+
+    def run(self, code, timeout=None, cancel_event=None):
+        """Execute code in a warm worker and return exit code, output and queue/run timings.
+
+        Setting cancel_event (a threading.Event) aborts the job and replaces its worker.
+        """
+        if self._closed:
+            raise RuntimeError("Execution pool is shut down")
+        timeout = timeout or self.timeout
+
+        submitted = time.perf_counter()
+        worker = self._checkout(cancel_event)
+        started = time.perf_counter()
+        if worker is not None and cancel_event is not None and cancel_event.is_set():
+            self._idle.put(worker)
+            worker = None
+        if worker is None:
+            return {"exitcode": -1, "output": "Cancelled: code execution was aborted",
+                    "queue_seconds": started - submitted, "run_seconds": 0.0}
+        try:
+            process, conn = worker
+            if not process.is_alive():
+                self._stop_worker(worker)
+                worker = process, conn = self._start_worker()
+
+            conn.send(code)
+            if self._wait(conn, timeout, cancel_event):
+                exitcode, output, retire = conn.recv()
+                if retire:
+                    # The worker exits after this reply; start a clean one in its place.
+                    self.retired += 1
+                    self._stop_worker(worker)
+                    worker = self._start_worker()
+            else:
+                self._stop_worker(worker)
+                worker = self._start_worker()
+                if cancel_event is not None and cancel_event.is_set():
+                    exitcode, output = -1, "Cancelled: code execution was aborted"
+                else:
+                    exitcode, output = 124, f"Timeout: code execution exceeded {timeout} seconds"
+        except (EOFError, OSError) as ex:
+            # The worker died mid-job (e.g. segfault in a solver), replace it.
+            self._stop_worker(worker)
+            worker = self._start_worker()
+            exitcode, output = 1, f"Worker process crashed: {ex!r}"
+        finally:
+            self._idle.put(worker)
+
+        return {
+            "exitcode": exitcode,
+            "output": output,
+            "queue_seconds": started - submitted,
+            "run_seconds": time.perf_counter() - started,
+        }
+
+    def _checkout(self, cancel_event):
+        # Jobs cancelled while still queued never reach (and never have to kill) a worker.
+        if cancel_event is None:
+            return self._idle.get()
+        while not cancel_event.is_set():
+            try:
+                return self._idle.get(timeout=CANCEL_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return None
+
+    @staticmethod
+    def _wait(conn, timeout, cancel_event):
+        if cancel_event is None:
+            return conn.poll(timeout)
+        deadline = time.perf_counter() + timeout
+        while not cancel_event.is_set():
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            if conn.poll(min(remaining, CANCEL_POLL_SECONDS)):
+                return True
+        return conn.poll(min(CANCEL_GRACE_SECONDS, max(0.0, deadline - time.perf_counter())))
+
+    def shutdown(self):
+        self._closed = True
+        while True:
+            try:
+                process, conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            process.join(timeout=1)
+            self._stop_worker((process, conn))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configured_work_dir():
+    return os.environ.get("OPTIGENIUS_EXEC_WORK_DIR", DEFAULT_WORK_DIR)
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExecutionPool(
+                size=int(os.environ.get("OPTIGENIUS_EXEC_WORKERS", 0)) or None,
+                work_dir=configured_work_dir(),
+                timeout=float(os.environ.get("OPTIGENIUS_EXEC_TIMEOUT", DEFAULT_TIMEOUT)),
+                max_jobs=int(os.environ.get("OPTIGENIUS_EXEC_MAX_JOBS", DEFAULT_MAX_JOBS)),
+            )
+            atexit.register(_pool.shutdown)
+    return _pool
+
+
+def format_reply(result):
+    # Same shape as the reply of the previous autogen code executor agent.
+    status = "execution succeeded" if result["exitcode"] == 0 else "execution failed"
+    return f"exitcode: {result['exitcode']} ({status})\nCode output: {result['output']}"
+
+
+def execute(code, timeout=None):
+    return format_reply(get_pool().run(extract_code(code), timeout=timeout))
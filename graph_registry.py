@@ -0,0 +1,110 @@
+"""Process-wide registry of compiled LangGraph workflows and prebuilt prompt chains.
+
+Graphs are keyed by scenario and node configuration and compiled lazily, once per
+process. Build times ("startup") and per-request lookup/invoke times are recorded
+so the latency saved by reusing compiled graphs is visible through get_timings().
+"""
+import threading
+import time
+from collections import deque
+
+MAX_REQUEST_TIMINGS = 1000
+
+_lock = threading.RLock()
+_graphs = {}
+_chains = {}
+_build_timings = []
+_request_timings = deque(maxlen=MAX_REQUEST_TIMINGS)
+
+
+def _freeze(value):
+    # Node configurations may contain dicts/lists, turn them into hashable tuples.
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(val) for val in value)
+    return value
+
+
+def graph_key(scenario, node_config=None):
+    return scenario, _freeze(node_config or {})
+
+
+def _get_or_build(store, kind, key, builder):
+    item = store.get(key)
+    if item is not None:
+        return item
+
+    with _lock:
+        # Another thread may have built it while we were waiting for the lock.
+        item = store.get(key)
+        if item is None:
+            start = time.perf_counter()
+            item = builder()
+            seconds = time.perf_counter() - start
+            store[key] = item
+            _build_timings.append({"kind": kind, "key": repr(key), "seconds": seconds})
+            print(f"Built {kind} {key!r} in {seconds * 1000:.1f} ms")
+    return item
+
+
+def get_graph(key, builder):
+    return _get_or_build(_graphs, "graph", key, builder)
+
+
+def get_chain(name, builder):
+    return _get_or_build(_chains, "chain", name, builder)
+
+
+def record_request(key, lookup_seconds, invoke_seconds):
+    _request_timings.append({
+        "key": repr(key),
+        "lookup_seconds": lookup_seconds,
+        "invoke_seconds": invoke_seconds,
+    })
+
+
+def _summary(values):
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def get_timings():
+    """Return graph/chain build times and per-key request timing summaries (seconds)."""
+    with _lock:
+        builds = list(_build_timings)
+    requests = list(_request_timings)
+
+    per_key = {}
+    for timing in requests:
+        per_key.setdefault(timing["key"], []).append(timing)
+
+    return {
+        "startup": {
+            "builds": builds,
+            "total_seconds": sum(build["seconds"] for build in builds),
+        },
+        "requests": {
+            key: {
+                "lookup": _summary([t["lookup_seconds"] for t in timings]),
+                "invoke": _summary([t["invoke_seconds"] for t in timings]),
+            }
+            for key, timings in per_key.items()
+        },
+    }
+
+
+def clear():
+    with _lock:
+        _graphs.clear()
+        _chains.clear()
+        _build_timings.clear()
+        _request_timings.clear()
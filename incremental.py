@@ -0,0 +1,119 @@
+"""Re-solve after edits that only change numbers, without rebuilding the model or regenerating code.
+
+Every session keeps its last native PuLP model together with the structure of the data it was built from
+(table names, shapes, labels and column names, everything except the numeric values). When the next
+Optimize run has the same structure, the new costs, demands and capacities are written into that model
+and it is re-solved with a warm start. For generated code that read its data from Parquet files, the same
+code is re-run on the new files, but only when the numbers actually changed and the code passes the static
+validator; the app says so in the report. Anything structural (other tables, rows, labels, or edited problem text
+beyond its numbers) still goes through model building or code generation.
+
+``state`` is any dict-like per-session store, ``st.session_state`` in the app.
+"""
+import hashlib
+import re
+import time
+
+import pandas as pd
+
+import code_validator
+import data_files
+import execution_pool
+import native_models
+
+NATIVE_STATE_KEY = "native_model"
+CODE_STATE_KEY = "generated_model"
+NUMBER_PATTERN = re.compile(r"-?\d+(?:[.,]\d+)*")
+DATA_DIR_PATTERN = re.compile(r'DATA_DIR = "([^"]+)"')
+
+
+def text_structure(text):
+    # The text with every number replaced, so edits to numbers alone compare equal.
+    return " ".join(NUMBER_PATTERN.sub("#", text or "").split())
+
+
+def same_structure(texts, other_texts):
+    return [text_structure(text) for text in texts] == [text_structure(text) for text in other_texts]
+
+
+def data_structure(data_in_format):
+    """Hash of everything in the tables except their numeric values."""
+    digest = hashlib.sha256()
+    for name, df in data_in_format.items():
+        labels = df.drop(columns=df.select_dtypes("number").columns)
+        digest.update(repr((name, df.shape, [str(column) for column in df.columns],
+                            [str(dtype.kind) for dtype in df.dtypes])).encode())
+        digest.update(pd.util.hash_pandas_object(labels, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def solve_native(state, scenario, data_in_format, constraint=""):
+    """Solve a built-in scenario, updating the session's last model in place when only numbers changed.
+
+    The result has ``incremental`` set when the previous model was reused.
+    """
+    if native_models.uses_sparse_model(scenario, data_in_format):
+        # Sparse instances hold no PuLP model to update, building them is already cheap.
+        state.pop(NATIVE_STATE_KEY, None)
+        result = native_models.solve_scenario(scenario, data_in_format, constraint)
+        result["incremental"] = False
+        return result
+
+    key = (scenario, data_structure(data_in_format))
+    last = state.get(NATIVE_STATE_KEY)
+    start = time.perf_counter()
+    if last is not None and last["key"] == key:
+        model = last["model"]
+        native_models.update_model(scenario, model, data_in_format, constraint)
+        incremental = True
+    else:
+        model = native_models.build_model(scenario, data_in_format, constraint)
+        state[NATIVE_STATE_KEY] = {"key": key, "model": model}
+        incremental = False
+    build_seconds = time.perf_counter() - start
+
+    result = native_models.solve_model(model, warm_start=incremental)
+    result["build_seconds"] = build_seconds
+    result["incremental"] = incremental
+    print(f"Native {scenario} model: {'update' if incremental else 'build'} {build_seconds * 1000:.1f} ms, "
+          f"solve {result['solve_seconds'] * 1000:.1f} ms, status {result['status']}")
+    return result
+
+
+def remember_generated_code(state, scenario, texts, data_in_format, code):
+    # Only code that loads its data from the Parquet files can be pointed at new data.
+    match = DATA_DIR_PATTERN.search(code or "")
+    if match is None or not data_in_format or not data_files.use_reference(data_in_format):
+        state.pop(CODE_STATE_KEY, None)
+        return
+    state[CODE_STATE_KEY] = {
+        "key": (scenario, tuple(texts), data_structure(data_in_format)),
+        "code": code,
+        "data_dir": match.group(1),
+    }
+
+
+def rerun_generated_code(state, scenario, texts, data_in_format):
+    """Run the session's last generated code on new data of the same structure.
+
+    Returns (code, execution output), or None when the code has to be generated again. The problem texts
+    must be unchanged, since numbers taken from them may be written into the code. Unchanged data returns
+    None as well: the same input goes down the same path as the first time instead of running code the
+    user has not seen run.
+    """
+    last = state.get(CODE_STATE_KEY)
+    if last is None or not data_in_format or last["key"] != (scenario, tuple(texts), data_structure(data_in_format)):
+        return None
+
+    manifest = data_files.write_data_files(data_in_format)
+    # The directory is named after the data's content hash, the same name means the same numbers.
+    if manifest["dir"] == last["data_dir"]:
+        return None
+    if not code_validator.validate_code(last["code"])["valid"]:
+        return None
+    code = last["code"].replace(f'DATA_DIR = "{last["data_dir"]}"', f'DATA_DIR = "{manifest["dir"]}"')
+    result = execution_pool.get_pool().run(execution_pool.extract_code(code))
+    if result["exitcode"] != 0:
+        return None
+    last.update(code=code, data_dir=manifest["dir"])
+    return code, result["output"]
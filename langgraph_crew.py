@@ -1,42 +1,33 @@
-from langchain_openai import AzureChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from langgraph.graph import StateGraph, END
 from typing import TypedDict
-from langchain_experimental.utilities import PythonREPL
-from langchain_core.pydantic_v1 import BaseModel, Field
-import streamlit as st
-from autogen import ConversableAgent
-from autogen.coding import LocalCommandLineCodeExecutor
-from textgrad.engine import get_engine
-from textgrad import Variable
-from textgrad.optimizer import TextualGradientDescent
-from textgrad.loss import TextLoss
-import textgrad as tg
 import os
-
-os.environ["AZURE_OPENAI_API_KEY"] = st.secrets["openai_api_key"]
-os.environ["AZURE_OPENAI_ENDPOINT"] = st.secrets["azure_endpoint"]
-os.environ["AZURE_OPENAI_API_VERSION"] = st.secrets["api_version"]
-os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT_NAME"] = st.secrets["deployment_name"]
-os.environ["OPENAI_MODEL_NAME"] = "gpt-4o"
-os.environ["AZURE_OPENAI_API_BASE"] = st.secrets["azure_endpoint"]
-
-# Initialize Azure OpenAI LLM
-azure_llm = AzureChatOpenAI(
-    openai_api_version=st.secrets["api_version"],
-    azure_deployment=st.secrets["deployment_name"],
-    model="gpt-4o"
-)
-
-python_repl = PythonREPL()
+import time
+import asyncio
+import functools
+import threading
+import async_runtime
+import graph_registry
+import code_validator
+import data_files
+import data_serializer
+import execution_pool
+import tracing
+import llm_cache
+import llm_client
+import llm_scheduler
 
 
 class AgentState(TypedDict):
     optimization_task: str  # what is the task to perform e.g customer order fullfillment,
     problem_statement: str  # Full statement with problem,objective,constraint
+    inline_problem_statement: str  # Same statement with the data inline, for prompts that do not write code
     python_pulp_code: str  # Code in python pulp
     optimization_answer: str  # Answer to the statement
     report: str  # Report
+    candidate_stats: dict  # Outcome of racing several code candidates (candidates mode only)
+    code_review: dict  # Verdict of the local code validator
+    execution: dict  # Exit code and output of the last code execution
+    repair_stats: dict  # Attempts, tokens and seconds spent repairing failed code
 
 
 # """
@@ -51,7 +42,17 @@ class AgentState(TypedDict):
 #     2. Write Python code and nothing else.
 # """
 
-def generate_pulp_code_for_problem(state: AgentState) -> AgentState:
+CANDIDATE_TEMPERATURE = 0.7
+# Repair budgets, overridable with OPTIGENIUS_REPAIR_RETRIES, OPTIGENIUS_REPAIR_TOKENS and OPTIGENIUS_REPAIR_SECONDS.
+DEFAULT_REPAIR_RETRIES = 2
+DEFAULT_REPAIR_TOKENS = 12000
+DEFAULT_REPAIR_SECONDS = 60
+# Only the end of a long traceback or output goes back to the model.
+REPAIR_ERROR_LINES = 25
+REPAIR_ERROR_CHARS = 3000
+
+
+def _build_code_writer_chain(**llm_kwargs):
     sys_prompt = """
     Act as a Python developer. Write a code to solve optimization task using PuLP library.
     Must ensure that the code is properly formatted and wrapped according to Python REPL executor.
@@ -59,6 +60,8 @@ def generate_pulp_code_for_problem(state: AgentState) -> AgentState:
     Always recheck the code to fix error. 
     If there is an error arise in your code i will fine you 1000$ and will sue you.
     Just output code and nothing else.
+    Solve the model with `import solvers` and `solvers.solve(prob)` instead of `prob.solve()`; it picks the
+    solver and time limit, and prints the status and objective value.
 
     Following is the optimization task:
     Optimization Task:
@@ -81,9 +84,14 @@ def generate_pulp_code_for_problem(state: AgentState) -> AgentState:
         ]
     )
 
+    llm = llm_client.get_azure_llm()
+    return prompt | (llm.bind(**llm_kwargs) if llm_kwargs else llm)
+
+
+def generate_pulp_code_for_problem(state: AgentState) -> AgentState:
     problem_statement = state["problem_statement"]
     optimization_task = state["optimization_task"]
-    chain = prompt | azure_llm
+    chain = graph_registry.get_chain("code_writer", _build_code_writer_chain)
 
     code = chain.invoke(
         {
@@ -97,31 +105,49 @@ def generate_pulp_code_for_problem(state: AgentState) -> AgentState:
     return state
 
 
-def code_executor(state: AgentState) -> AgentState:
-    try:
-        # Create a temporary directory to store the code files.
-        temp_dir = "code_temp"
+async def agenerate_pulp_code_for_problem(state: AgentState) -> AgentState:
+    chain = graph_registry.get_chain("code_writer", _build_code_writer_chain)
+    code = await chain.ainvoke(
+        {
+            "optimization_task": state["optimization_task"],
+            "problem_statement": state["problem_statement"]
+        }
+    )
+    state["python_pulp_code"] = code.content
+    return state
 
-        # Create a local command line code executor.
-        executor = LocalCommandLineCodeExecutor(
-            timeout=10,  # Timeout for each code execution in seconds.
-            work_dir=temp_dir,  # Use the temporary directory to store the code files.
-        )
 
-        # Create an agent with code executor configuration.
-        code_executor_agent = ConversableAgent(
-            "code_executor_agent",
-            llm_config=False,  # Turn off LLM for this agent.
-            code_execution_config={"executor": executor},  # Use the local command line code executor.
-        )
+def _record_execution(state, result):
+    tracing.record_step("executor", "code_executor", result["run_seconds"], result["queue_seconds"],
+                        exitcode=result["exitcode"])
+    reply = execution_pool.format_reply(result)
+    state["execution"] = {"exitcode": result["exitcode"], "output": result["output"]}
+    state["optimization_answer"] = reply
+    print(reply)
+    if result["exitcode"] != 0:
+        _record_failure(state)
+    elif state.get("repair_stats"):
+        _record_failure(state)["outcome"] = "repaired"
+    return state
+
+
+def _record_execution_error(state, ex):
+    print(f"Exception arised in code executer node: {ex}")
+    # Recorded as a failed run so the repair loop (or code fixer) still produces an answer.
+    state["execution"] = {"exitcode": 1, "output": f"Code executor error: {ex!r}"}
+    state["optimization_answer"] = execution_pool.format_reply(state["execution"])
+    _record_failure(state)
+    return state
 
+
+def code_executor(state: AgentState) -> AgentState:
+    try:
+        # Runs in a warm worker process of the shared execution pool (work dir "code_temp", 10 s timeout).
         code = state["python_pulp_code"]
-        reply = code_executor_agent.generate_reply(messages=[{"role": "user", "content": code}])
-        state["optimization_answer"] = reply
-        print(reply)
-        return state
+        result = execution_pool.get_pool().run(execution_pool.extract_code(code))
+        return _record_execution(state, result)
     except Exception as ex:
-        print(f"Exception arised in code executer node: {ex}")
+        return _record_execution_error(state, ex)
 
     # try:
     #     pulp_code = state["python_pulp_code"]
@@ -132,6 +158,263 @@ def code_executor(state: AgentState) -> AgentState:
     #     print(f"Exception arised in code executer node: {ex}")
 
 
+async def acode_executor(state: AgentState) -> AgentState:
+    loop = asyncio.get_running_loop()
+    try:
+        # Waiting for a worker happens in a thread, the event loop keeps serving other sessions.
+        code = execution_pool.extract_code(state["python_pulp_code"])
+        result = await loop.run_in_executor(None, execution_pool.get_pool().run, code)
+        return _record_execution(state, result)
+    except Exception as ex:
+        return _record_execution_error(state, ex)
+
+
+def _candidate_chain(index):
+    # Candidate 0 is the regular code writer, the others sample with their own seed so they differ
+    # (and are cached separately).
+    if index == 0:
+        return graph_registry.get_chain("code_writer", _build_code_writer_chain)
+    return graph_registry.get_chain(
+        f"code_writer.candidate_{index}",
+        lambda: _build_code_writer_chain(seed=index, temperature=CANDIDATE_TEMPERATURE)
+    )
+
+
+async def _race_code_candidates(state, candidates):
+    loop = asyncio.get_running_loop()
+    pool = execution_pool.get_pool()
+    cancel_event = threading.Event()
+    inputs = {"optimization_task": state["optimization_task"], "problem_statement": state["problem_statement"]}
+
+    level = llm_scheduler.current_priority()
+
+    async def attempt(index):
+        # Only the first candidate is needed, it keeps the caller's priority; the others are speculative and
+        # yield to interactive calls.
+        with llm_scheduler.priority(level if index == 0 else llm_scheduler.BATCH):
+            response = await _candidate_chain(index).ainvoke(inputs)
+        code = response.content
+        verdict = code_validator.validate_code(code)
+        if not verdict["valid"]:
+            # Not worth a worker: the program could never run cleanly.
+            print(f"Code candidate {index}: {code_validator.format_verdict(verdict)}")
+            return index, code, verdict, None, None
+        result = await loop.run_in_executor(
+            None, functools.partial(pool.run, execution_pool.extract_code(code), cancel_event=cancel_event)
+        )
+        tracing.record_step("executor", f"code_candidate_{index}", result["run_seconds"], result["queue_seconds"],
+                            exitcode=result["exitcode"])
+        objective = execution_pool.parse_objective(result["output"]) if result["exitcode"] == 0 else None
+        return index, code, verdict, result, objective
+
+    tasks = [asyncio.ensure_future(attempt(index)) for index in range(candidates)]
+    winner = None
+    codes = []
+    failed = []
+    failures = 0
+    for finished in asyncio.as_completed(tasks):
+        try:
+            index, code, verdict, result, objective = await finished
+        except Exception as ex:
+            failures += 1
+            print(f"Exception arised in code candidate: {ex}")
+            continue
+        codes.append(code)
+        if objective is not None:
+            winner = index, code, result, objective
+            break
+        failed.append((code, verdict, result))
+        failures += 1
+
+    # First clean run wins: stop pending generations and abort executions still running.
+    cancel_event.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return winner, codes, failed, failures
+
+
+def race_code_candidates(state: AgentState, candidates=3) -> AgentState:
+    """Generate several programs concurrently, run them in parallel and keep the first clean solve."""
+    start = time.perf_counter()
+    return _apply_race_outcome(state, candidates, start, async_runtime.run(_race_code_candidates(state, candidates)))
+
+
+async def arace_code_candidates(state: AgentState, candidates=3) -> AgentState:
+    start = time.perf_counter()
+    return _apply_race_outcome(state, candidates, start, await _race_code_candidates(state, candidates))
+
+
+def _apply_race_outcome(state, candidates, start, outcome):
+    winner, codes, failed, failures = outcome
+    stats = {"candidates": candidates, "failures": failures, "winner": None,
+             "seconds": time.perf_counter() - start}
+    if winner is not None:
+        index, code, result, objective = winner
+        state["python_pulp_code"] = code
+        state["optimization_answer"] = execution_pool.format_reply(result)
+        stats.update({"winner": index, "objective": objective})
+    elif failed:
+        # The first failure is what the repair loop starts from.
+        code, verdict, result = failed[0]
+        state["python_pulp_code"] = code
+        state["code_review"] = verdict
+        if result is not None:
+            state["execution"] = {"exitcode": result["exitcode"], "output": result["output"]}
+        _record_failure(state)
+    else:
+        state["python_pulp_code"] = codes[0] if codes else ""
+    state["candidate_stats"] = stats
+    print(f"Code candidates: {stats}")
+    return state
+
+
+def route_race_result(state: AgentState) -> str:
+    # Without a clean run the failed code is repaired, or the code fixer answers once the budget is spent.
+    if state.get("candidate_stats", {}).get("winner") is not None:
+        return "expert_report_writer"
+    if _can_repair(state):
+        return "code_repair"
+    return "code_fixer"
+
+
+def repair_budget():
+    return {
+        "retries": int(os.environ.get("OPTIGENIUS_REPAIR_RETRIES", DEFAULT_REPAIR_RETRIES)),
+        "tokens": int(os.environ.get("OPTIGENIUS_REPAIR_TOKENS", DEFAULT_REPAIR_TOKENS)),
+        "seconds": float(os.environ.get("OPTIGENIUS_REPAIR_SECONDS", DEFAULT_REPAIR_SECONDS)),
+    }
+
+
+def _record_failure(state):
+    # Called by nodes (routing functions can not update the state). The wall clock budget runs from the
+    # first failure and covers repairs and re-executions.
+    if not state.get("repair_stats"):
+        state["repair_stats"] = {"attempts": 0, "tokens": 0, "seconds": 0.0, "errors": [], "outcome": None,
+                                 "started": time.perf_counter()}
+    stats = state["repair_stats"]
+    stats["seconds"] = time.perf_counter() - stats["started"]
+    return stats
+
+
+def _exhausted_budget(stats):
+    budget = repair_budget()
+    used = {"retries": stats["attempts"], "tokens": stats["tokens"],
+            "seconds": time.perf_counter() - stats["started"]}
+    for name in ("retries", "tokens", "seconds"):
+        if used[name] >= budget[name]:
+            return name
+    return None
+
+
+def _can_repair(state):
+    stats = state.get("repair_stats")
+    return bool(stats) and _exhausted_budget(stats) is None
+
+
+def trim_error(output, max_lines=REPAIR_ERROR_LINES, max_chars=REPAIR_ERROR_CHARS):
+    # The last traceback says what went wrong; earlier output rarely helps and costs tokens.
+    lines = (output or "").strip().splitlines()
+    starts = [number for number, line in enumerate(lines) if line.startswith("Traceback")]
+    if starts:
+        lines = lines[starts[-1]:]
+    if len(lines) > max_lines:
+        lines = ["..."] + lines[-max_lines:]
+    text = "\n".join(lines)
+    return text if len(text) <= max_chars else "..." + text[-max_chars:]
+
+
+def _failure_description(state):
+    review = state.get("code_review") or {}
+    if review and not review.get("valid"):
+        return "Static checks failed:\n" + "\n".join(f"- {error}" for error in review["errors"])
+    execution = state.get("execution") or {}
+    if execution.get("exitcode"):
+        return f"Execution failed with exit code {execution['exitcode']}:\n{trim_error(execution['output'])}"
+    return f"The program ran but printed no objective value:\n{trim_error(execution.get('output'))}"
+
+
+def _build_code_repair_chain():
+    system = """
+    Act as a Python developer. A program that solves an optimization task using PuLP library failed.
+    Fix the cause of the error below and keep everything else the same.
+    Solve the model with `import solvers` and `solvers.solve(prob)` and print the status and objective value.
+    Just output the complete corrected code and nothing else."""
+
+    human_message = """
+    Optimization Task:
+    {task}
+
+    Problem Statement, Objective, Constraint:
+    {problem}
+
+    Code:
+    {code}
+
+    Error:
+    {error}
+
+    Fixed Code:
+    [Write code here]
+    """
+    prompt = ChatPromptTemplate.from_messages(
+        [("system", system), ("human", human_message)]
+    )
+
+    return prompt | llm_client.get_azure_llm()
+
+
+def _repair_inputs(state, error):
+    return {
+        "task": state["optimization_task"],
+        "problem": state["problem_statement"],
+        "code": execution_pool.extract_code(state["python_pulp_code"]),
+        "error": error,
+    }
+
+
+def repair_code(state: AgentState) -> AgentState:
+    error = _failure_description(state)
+    chain = graph_registry.get_chain("code_repair", _build_code_repair_chain)
+    start = time.perf_counter()
+    response = chain.invoke(_repair_inputs(state, error))
+    return _apply_repair(state, error, response, time.perf_counter() - start)
+
+
+async def arepair_code(state: AgentState) -> AgentState:
+    error = _failure_description(state)
+    chain = graph_registry.get_chain("code_repair", _build_code_repair_chain)
+    start = time.perf_counter()
+    response = await chain.ainvoke(_repair_inputs(state, error))
+    return _apply_repair(state, error, response, time.perf_counter() - start)
+
+
+def _apply_repair(state, error, response, seconds):
+    stats = _record_failure(state)
+    usage = getattr(response, "usage_metadata", None) or {}
+    tokens = usage.get("total_tokens") or data_serializer.count_tokens(
+        state["problem_statement"] + state["python_pulp_code"] + error + response.content)
+    stats["attempts"] += 1
+    stats["tokens"] += tokens
+    stats["errors"].append(error.splitlines()[-1][:200])
+    stats["seconds"] = time.perf_counter() - stats["started"]
+    tracing.record_step("repair", "code_repair", seconds, attempt=stats["attempts"], tokens=tokens)
+    print(f"Code repair attempt {stats['attempts']}: {tokens} tokens, {seconds:.2f} s, fixing: {stats['errors'][-1]}")
+
+    state["python_pulp_code"] = response.content
+    state["execution"] = {}
+    return state
+
+
+def route_execution_result(state: AgentState) -> str:
+    execution = state.get("execution") or {}
+    if execution.get("exitcode") == 0:
+        return "expert_report_writer"
+    if _can_repair(state):
+        return "code_repair"
+    return "code_fixer"
+
+
 # def report_writer(state: AgentState) -> AgentState:
 #     sys_prompt = """
 #     You are an expert in writing reports in such a way that any one who reads it can easily understand it.
@@ -189,7 +472,7 @@ def code_executor(state: AgentState) -> AgentState:
 #
 #     return state
 
-def report_writer(state: AgentState) -> AgentState:
+def _build_report_writer_chain():
     sys_prompt = """
     You are an expert in writing reports in such a way that any one who reads it can easily understand it.
     Please use proper formatting and easy to understand vocabulary to write a report. Always use plain english and 
@@ -221,10 +504,19 @@ def report_writer(state: AgentState) -> AgentState:
         ]
     )
 
-    problem_statement = state["problem_statement"]
+    return prompt | llm_client.get_azure_llm()
+
+
+def _inline_problem_statement(state):
+    # Large tables reach the code as Parquet files; the report and the fallback fixer need the numbers.
+    return state.get("inline_problem_statement") or state["problem_statement"]
+
+
+def report_writer(state: AgentState) -> AgentState:
+    problem_statement = _inline_problem_statement(state)
     optimization_task = state["optimization_task"]
     code_result = state["optimization_answer"]
-    chain = prompt | azure_llm
+    chain = graph_registry.get_chain("report_writer", _build_report_writer_chain)
 
     code = chain.invoke(
         {
@@ -240,78 +532,30 @@ def report_writer(state: AgentState) -> AgentState:
     return state
 
 
-class CodeReviewGrade(BaseModel):
-    """Binary score for Reviewing Score."""
-
-    # binary_score: str = Field(
-    #     description="The article is about football transfers, 'yes' or 'no'"
-    # )
-
-    binary_score: str = Field(
-        description="The code is correct and include all relevant libraries and there is no syntax and logical error, "
-                    "'yes' or 'no'"
-    )
-
-
-def code_reviewer(state: AgentState) -> AgentState:
-    system = """
-    You are an expert in python code reviewer. I will give you a code which is solving an optimization
-    problem using python and PuLP library. 
-
-    Please review the code and check that if the code 
-
-    1. includes all the relevant libraries.
-    2. No syntax error in it.
-    3. No logical error in it.
-    5. Proper print statements are used to output.
-
-    Provide a binary score 'yes' or 'no' to indicate if the code is reviewed or not."""
-
-    human_message = """    
-    Code:
-    {code}
-
-    Binary Score:
-    """
-    grade_prompt = ChatPromptTemplate.from_messages(
-        [("system", system), ("human", human_message)]
-    )
-
-    optimization_problem = state["optimization_task"]
-    problem_statement = state["problem_statement"]
-    code = state["python_pulp_code"]
-
-    structured_llm_grader = azure_llm.with_structured_output(CodeReviewGrade)
-
-    evaluator = grade_prompt | structured_llm_grader
-    result = evaluator.invoke(
+async def areport_writer(state: AgentState) -> AgentState:
+    chain = graph_registry.get_chain("report_writer", _build_report_writer_chain)
+    await chain.ainvoke(
         {
-            "optimization_problem": optimization_problem,
-            "problem_statement": problem_statement,
-            "code": code
+            "optimization": state["optimization_task"],
+            "problem": _inline_problem_statement(state),
+            "result": state["optimization_answer"]
         }
     )
-    print(f"\nScore: {result.binary_score}\n")
-    if result.binary_score == "yes":
-        # return "code_executor"
-        return "code_fixer"
-    else:
-        # print("---" * 50)
-        # print(code)
-        # print("---" * 50)
-        return "code_fixer"
+    state["report"] = state["optimization_answer"]
+    return state
 
 
-def fix_code(state: AgentState) -> AgentState:
-    # optimization_task: str  # what is the task to perform e.g customer order fullfillment,
-    # problem_statement: str  # Full statement with problem,objective,constraint
-    # python_pulp_code: str  # Code in python pulp
-    # optimization_answer: str  # Answer to the statement
-    # report: str  # Report
+def code_reviewer(state: AgentState) -> str:
+    # Routes on the local validator's verdict: only code that can run goes to the executor, the rest is
+    # repaired while the budget lasts.
+    if state.get("code_review", {}).get("valid"):
+        return "code_executor"
+    if _can_repair(state):
+        return "code_repair"
+    return "code_fixer"
 
-    optimization_task = state["optimization_task"]
-    problem_statement = state["problem_statement"]
 
+def _build_code_fixer_chain():
     system = """
     I want you to act like an Expert Mathematics and Linear Programming Expert who solves optimization
     problems computationally and the calculations are perfect everytime you solve something.
@@ -335,7 +579,21 @@ def fix_code(state: AgentState) -> AgentState:
         [("system", system), ("human", human_message)]
     )
 
-    evaluator = grade_prompt | azure_llm
+    return grade_prompt | llm_client.get_azure_llm()
+
+
+def fix_code(state: AgentState) -> AgentState:
+    # optimization_task: str  # what is the task to perform e.g customer order fullfillment,
+    # problem_statement: str  # Full statement with problem,objective,constraint
+    # python_pulp_code: str  # Code in python pulp
+    # optimization_answer: str  # Answer to the statement
+    # report: str  # Report
+
+    optimization_task = state["optimization_task"]
+    problem_statement = _inline_problem_statement(state)
+    _mark_repair_exhausted(state)
+
+    evaluator = graph_registry.get_chain("code_fixer", _build_code_fixer_chain)
 
     result = evaluator.invoke(
         {
@@ -433,97 +691,246 @@ def fix_code(state: AgentState) -> AgentState:
 #     return state
 
 
+def _mark_repair_exhausted(state):
+    if state.get("repair_stats"):
+        stats = _record_failure(state)
+        stats["outcome"] = f"{_exhausted_budget(stats) or 'repair'} budget exhausted"
+
+
+async def afix_code(state: AgentState) -> AgentState:
+    _mark_repair_exhausted(state)
+    evaluator = graph_registry.get_chain("code_fixer", _build_code_fixer_chain)
+    result = await evaluator.ainvoke({"task": state["optimization_task"],
+                                      "problem": _inline_problem_statement(state)})
+    state["optimization_answer"] = result.content
+    return state
+
+
 def evaluator_node(state: AgentState) -> AgentState:
-    print(f"Evaluating the Code.....")
+    verdict = code_validator.validate_code(state["python_pulp_code"])
+    tracing.record_step("validator", "code_validator", verdict["seconds"], 0.0, valid=verdict["valid"])
+    print(code_validator.format_verdict(verdict))
+    state["code_review"] = verdict
+    if not verdict["valid"]:
+        _record_failure(state)
     return state
 
 
-def get_graph():
+async def aevaluator_node(state: AgentState) -> AgentState:
+    # Validation takes milliseconds, running it inline is cheaper than a thread hop.
+    return evaluator_node(state)
+
+
+def compose_problem_statement(problem_statement, objective, constraints, data_in_format, inline=False):
+    # The graph takes one text with problem, objective, constraints and data (see AgentState).
+    if isinstance(constraints, (list, tuple)):
+        constraints = "\n".join(constraints)
+    # Large tables are handed to the generated code as Parquet files, small ones stay inline. With inline=True
+    # the data is the token-budgeted text instead, for prompts that have to read the numbers themselves.
+    data = data_serializer.prompt_data(data_in_format) if inline else data_files.code_prompt_data(data_in_format)
+    return (f"Problem Statement:\n{problem_statement}\n\nObjective:\n{objective}\n\n"
+            f"Constraints:\n{constraints}\n\nData:\n{data}")
+
+
+DEFAULT_GRAPH_SCENARIO = "default"
+SCENARIOS = ["Customer Order Fulfillment", "Demand-Supply Matching", "Supplier Risk Assessment", "Demand Forecasting"]
+
+
+NODE_FUNCTIONS = {
+    "code_writer": generate_pulp_code_for_problem,
+    "code_executor": code_executor,
+    "expert_report_writer": report_writer,
+    "evaluator_node": evaluator_node,
+    "code_fixer": fix_code,
+    "code_reviewer": code_reviewer,
+    "code_repair": repair_code,
+    "code_racer": race_code_candidates,
+}
+
+# Same graph for ainvoke: LLM calls are awaited and code execution waits in a thread, so one event loop
+# serves many runs at once. Routing functions are pure and shared.
+ASYNC_NODE_FUNCTIONS = dict(
+    NODE_FUNCTIONS,
+    code_writer=agenerate_pulp_code_for_problem,
+    code_executor=acode_executor,
+    expert_report_writer=areport_writer,
+    evaluator_node=aevaluator_node,
+    code_fixer=afix_code,
+    code_repair=arepair_code,
+    code_racer=arace_code_candidates,
+)
+
+
+def build_graph(nodes=None, candidates=1, asynchronous=False):
+    # nodes can override any default node callable by name, e.g. {"code_executor": my_executor}
+    # candidates > 1 races that many generated programs instead of writing and reviewing a single one.
+    # asynchronous builds the graph from the async nodes, to be run with ainvoke.
+    node_functions = dict(ASYNC_NODE_FUNCTIONS if asynchronous else NODE_FUNCTIONS)
+    node_functions.update(nodes or {})
+
+    if candidates > 1:
+        return _build_racing_graph(node_functions, candidates)
+
+    from langgraph.graph import StateGraph, END
+
     workflow = StateGraph(AgentState)
-    workflow.add_node("code_writer", generate_pulp_code_for_problem)
-    workflow.add_node("code_executor", code_executor)
-    workflow.add_node("expert_report_writer", report_writer)
-    workflow.add_node("evaluator_node", evaluator_node)
-    workflow.add_node("code_fixer", fix_code)
+    workflow.add_node("code_writer", node_functions["code_writer"])
+    workflow.add_node("code_executor", node_functions["code_executor"])
+    workflow.add_node("expert_report_writer", node_functions["expert_report_writer"])
+    workflow.add_node("evaluator_node", node_functions["evaluator_node"])
+    workflow.add_node("code_fixer", node_functions["code_fixer"])
 
     workflow.set_entry_point("code_writer")
 
     workflow.add_edge("code_writer", "evaluator_node")
     # workflow.add_edge("code_writer", "code_executor")
-    workflow.add_conditional_edges(
-        "evaluator_node", code_reviewer, {"code_executor": "code_executor", "code_fixer": "code_fixer"}
-    )
+    _add_repair_loop(workflow, node_functions)
 
     workflow.add_edge("code_fixer", "expert_report_writer")
-    workflow.add_edge("code_executor", "expert_report_writer")
     workflow.add_edge("expert_report_writer", END)
     app = workflow.compile()
     return app
 
 
-def custom_order_fulfillment(secnario, problem_statement):
-    graph = get_graph()
-    initial_state = {"problem_statement": problem_statement,
-                     "optimization_task": secnario}
-    result = graph.invoke(initial_state)
-    return result["report"], result["python_pulp_code"]
+def _add_repair_loop(workflow, node_functions):
+    # evaluator -> executor -> report, with failed checks or runs going through code_repair and back to the
+    # evaluator until the repair budget is spent, then to the code fixer.
+    workflow.add_node("code_repair", node_functions["code_repair"])
+    workflow.add_conditional_edges(
+        "evaluator_node", node_functions["code_reviewer"],
+        {"code_executor": "code_executor", "code_repair": "code_repair", "code_fixer": "code_fixer"}
+    )
+    workflow.add_conditional_edges(
+        "code_executor", route_execution_result,
+        {"expert_report_writer": "expert_report_writer", "code_repair": "code_repair", "code_fixer": "code_fixer"}
+    )
+    workflow.add_edge("code_repair", "evaluator_node")
 
 
-def demand_supply_matching(secnario, problem_statement):
-    graph = get_graph()
-    initial_state = {"problem_statement": problem_statement,
-                     "optimization_task": secnario}
-    result = graph.invoke(initial_state)
-    return result["report"], result["python_pulp_code"]
+def _build_racing_graph(node_functions, candidates):
+    from langgraph.graph import StateGraph, END
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("code_racer", functools.partial(node_functions["code_racer"], candidates=candidates))
+    workflow.add_node("expert_report_writer", node_functions["expert_report_writer"])
+    workflow.add_node("code_fixer", node_functions["code_fixer"])
+    workflow.add_node("evaluator_node", node_functions["evaluator_node"])
+    workflow.add_node("code_executor", node_functions["code_executor"])
+
+    workflow.set_entry_point("code_racer")
+    workflow.add_conditional_edges(
+        "code_racer", route_race_result,
+        {"expert_report_writer": "expert_report_writer", "code_repair": "code_repair", "code_fixer": "code_fixer"}
+    )
+    _add_repair_loop(workflow, node_functions)
+    workflow.add_edge("code_fixer", "expert_report_writer")
+    workflow.add_edge("expert_report_writer", END)
+    return workflow.compile()
+
+
+def get_graph(scenario=DEFAULT_GRAPH_SCENARIO, **node_config):
+    # Compiled graphs are cached process wide, so only the first request per configuration pays for compiling.
+    key = graph_registry.graph_key(scenario, node_config)
+    return graph_registry.get_graph(key, lambda: build_graph(**node_config))
 
 
-def supplier_risk_optimization(secnario, problem_statement):
-    graph = get_graph()
+def warm_up_graphs(scenarios=None):
+    for scenario in scenarios or SCENARIOS:
+        get_graph(scenario)
+    return graph_registry.get_timings()["startup"]
+
+
+def run_scenario_graph(secnario, problem_statement, use_cache=True, inline_problem_statement=None, **node_config):
+    start = time.perf_counter()
+    graph = get_graph(secnario, **node_config)
+    lookup_done = time.perf_counter()
+
     initial_state = {"problem_statement": problem_statement,
+                     "inline_problem_statement": inline_problem_statement or problem_statement,
                      "optimization_task": secnario}
-    result = graph.invoke(initial_state)
-    return result["report"], result["python_pulp_code"]
+    with llm_cache.bypass(not use_cache), tracing.trace_run(f"graph:{secnario}"):
+        result = graph.invoke(initial_state)
+    return _finish_graph_request(secnario, node_config, result, start, lookup_done)
+
 
+async def arun_scenario_graph(secnario, problem_statement, use_cache=True, inline_problem_statement=None,
+                              **node_config):
+    """Async run_scenario_graph: awaits graph.ainvoke, so many runs share one event loop."""
+    start = time.perf_counter()
+    node_config["asynchronous"] = True
+    graph = get_graph(secnario, **node_config)
+    lookup_done = time.perf_counter()
 
-def demand_forecasting_optimization(secnario, problem_statement):
-    graph = get_graph()
     initial_state = {"problem_statement": problem_statement,
+                     "inline_problem_statement": inline_problem_statement or problem_statement,
                      "optimization_task": secnario}
-    result = graph.invoke(initial_state)
+    with llm_cache.bypass(not use_cache), tracing.trace_run(f"graph:{secnario}"):
+        result = await graph.ainvoke(initial_state)
+    return _finish_graph_request(secnario, node_config, result, start, lookup_done)
+
+
+def _finish_graph_request(secnario, node_config, result, start, lookup_done):
+    invoke_seconds = time.perf_counter() - lookup_done
+    if result.get("repair_stats"):
+        repair = result["repair_stats"]
+        print(f"Code repair for {secnario}: {repair['attempts']} attempts, {repair['tokens']} tokens, "
+              f"{repair['seconds']:.2f} s, {repair['outcome']}")
+    graph_registry.record_request(graph_registry.graph_key(secnario, node_config), lookup_done - start,
+                                  invoke_seconds)
+    print(f"Graph request for {secnario}: lookup {(lookup_done - start) * 1000:.2f} ms, "
+          f"invoke {invoke_seconds:.2f} s")
     return result["report"], result["python_pulp_code"]
 
 
-def generate_report_for_scenario(scenario, problem_statement):
+def custom_order_fulfillment(secnario, problem_statement, use_cache=True):
+    return run_scenario_graph(secnario, problem_statement, use_cache=use_cache)
+
+
+def demand_supply_matching(secnario, problem_statement, use_cache=True):
+    return run_scenario_graph(secnario, problem_statement, use_cache=use_cache)
+
+
+def supplier_risk_optimization(secnario, problem_statement, use_cache=True):
+    return run_scenario_graph(secnario, problem_statement, use_cache=use_cache)
+
+
+def demand_forecasting_optimization(secnario, problem_statement, use_cache=True):
+    return run_scenario_graph(secnario, problem_statement, use_cache=use_cache)
+
+
+def generate_report_for_scenario(scenario, problem_statement, use_cache=True):
     report = "Default Report"
     code = "Defaul Code"
     if scenario == "Customer Order Fulfillment":
-        report, code = custom_order_fulfillment(scenario, problem_statement)
+        report, code = custom_order_fulfillment(scenario, problem_statement, use_cache=use_cache)
     elif scenario == "Demand-Supply Matching":
-        report, code = demand_supply_matching(scenario, problem_statement)
+        report, code = demand_supply_matching(scenario, problem_statement, use_cache=use_cache)
     elif scenario == "Supplier Risk Assessment":
-        report, code = supplier_risk_optimization(scenario, problem_statement)
+        report, code = supplier_risk_optimization(scenario, problem_statement, use_cache=use_cache)
     elif scenario == "Demand Forecasting":
-        report, code = supplier_risk_optimization(scenario, problem_statement)
+        report, code = supplier_risk_optimization(scenario, problem_statement, use_cache=use_cache)
 
     return report, code
 
 
-def execute_code(code):
-    temp_dir = "code_temp"
-    # Create a local command line code executor.
-    executor = LocalCommandLineCodeExecutor(
-        timeout=10,  # Timeout for each code execution in seconds.
-        work_dir=temp_dir,  # Use the temporary directory to store the code files.
-    )
+async def agenerate_report_for_scenario(scenario, problem_statement, use_cache=True):
+    if scenario not in SCENARIOS:
+        return "Default Report", "Defaul Code"
+    return await arun_scenario_graph(scenario, problem_statement, use_cache=use_cache)
 
-    # Create an agent with code executor configuration.
-    code_executor_agent = ConversableAgent(
-        "code_executor_agent",
-        llm_config=False,  # Turn off LLM for this agent.
-        code_execution_config={"executor": executor},  # Use the local command line code executor.
-    )
-    reply = code_executor_agent.generate_reply(messages=[{"role": "user", "content": code}])
-    return reply
+
+def generate_report_on_shared_loop(scenario, problem_statement, use_cache=True, timeout=None):
+    # Blocking entry point for script threads: the run itself is multiplexed on the shared event loop.
+    return async_runtime.run(agenerate_report_for_scenario(scenario, problem_statement, use_cache=use_cache),
+                             timeout=timeout)
+
+
+def get_graph_timings():
+    return graph_registry.get_timings()
+
+
+def execute_code(code):
+    return execution_pool.execute(code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+"""Persistent, content-addressed cache for LLM responses.
+
+Responses are stored in SQLite keyed on a SHA-256 of the rendered prompt and the LLM configuration string
+(model, deployment and sampling parameters), so byte-identical calls - common because the scenario generators
+are seeded - come back from disk instead of Azure. Entries expire after a TTL and the least recently used ones
+are evicted once the cache exceeds its size limits.
+
+The cache plugs into LangChain chat models (``AzureChatOpenAI(cache=get_llm_cache())``). Use ``bypass()``
+to skip the lookup for individual calls; fresh responses are still stored.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite")
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 10000
+
+# Cached values are our own serialized generations, silence LangChain's notices about loads().
+warnings.filterwarnings("ignore", message=r"The function `loads` is in beta")
+warnings.filterwarnings("ignore", message=r"The default value of `allowed_objects`")
+
+_bypass = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass(enabled=True):
+    """Skip cache lookups for LLM calls made inside this block."""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+class SQLiteLLMCache(BaseCache):
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.counters = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        if _bypass.get():
+            with self._lock:
+                self.counters["bypassed"] += 1
+            return None
+
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            value, created = row
+            if self.ttl_seconds and now - created > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.counters["misses"] += 1
+                self.counters["evictions"] += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.counters["hits"] += 1
+
+        return [loads(generation) for generation in json.loads(value)]
+
+    def update(self, prompt, llm_string, return_val):
+        value = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (self._key(prompt, llm_string), value, len(value), now, now),
+            )
+            self.counters["stores"] += 1
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        evicted = 0
+        if self.ttl_seconds:
+            evicted += self._conn.execute(
+                "DELETE FROM llm_cache WHERE created < ?", (now - self.ttl_seconds,)
+            ).rowcount
+
+        count, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        while count > 1 and (count > self.max_entries or total_bytes > self.max_bytes):
+            # Drop the least recently used tenth (at least one entry) and re-check.
+            batch = max(1, count // 10, count - self.max_entries)
+            evicted += self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed ASC LIMIT ?)",
+                (batch,),
+            ).rowcount
+            count, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        self.counters["evictions"] += evicted
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            stats = dict(self.counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "entries": entries,
+            "bytes": total_bytes,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+        })
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the process-wide cache, or None when disabled with OPTIGENIUS_LLM_CACHE=off."""
+    global _cache
+    path = os.environ.get("OPTIGENIUS_LLM_CACHE", DEFAULT_CACHE_PATH)
+    if path.lower() in ("", "0", "off", "false"):
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteLLMCache(
+                path=path,
+                ttl_seconds=float(os.environ.get("OPTIGENIUS_LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                max_bytes=int(float(os.environ.get("OPTIGENIUS_LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2 ** 20))
+                              * 2 ** 20),
+                max_entries=int(os.environ.get("OPTIGENIUS_LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            )
+    return _cache
+
+
+def cache_stats():
+    cache = get_llm_cache()
+    return cache.stats() if cache is not None else {}
@@ -0,0 +1,386 @@
+"""Shared Azure OpenAI client: one keep-alive connection pool, timeouts, retries and optional hedging.
+
+get_azure_llm() returns the process-wide AzureChatOpenAI. It is configured from the AZURE_OPENAI_*
+variables; the first call fills in the ones not set from the app's st.secrets. All chat models created with
+create_azure_llm() send their requests through the same pair of httpx clients (sync and async). The
+transport under those clients:
+- retries 429 and 5xx responses, and connections that could not be opened or were dropped, with
+  jittered exponential backoff (Retry-After is honoured);
+- with OPTIGENIUS_LLM_HEDGE=on, sends a duplicate of a non-streaming request once it has been outstanding
+  for longer than the p95 of recently observed latencies, and keeps whichever answer arrives first.
+
+Before each attempt the request waits for its token and request budget in llm_scheduler. A hedge is only
+sent when budget is free right away. The OpenAI SDK's own retries are turned off so the two layers do not
+multiply. Pointing AZURE_OPENAI_ENDPOINT at a local stand-in server (see benchmarks/bench_llm_client.py)
+exercises the whole path without Azure.
+
+Settings: OPTIGENIUS_LLM_CONNECT_TIMEOUT, OPTIGENIUS_LLM_READ_TIMEOUT, OPTIGENIUS_LLM_MAX_CONNECTIONS,
+OPTIGENIUS_LLM_RETRIES, OPTIGENIUS_LLM_HEDGE.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import httpx
+
+import llm_cache
+import llm_scheduler
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 120.0
+DEFAULT_MAX_CONNECTIONS = 50
+DEFAULT_RETRIES = 3
+KEEPALIVE_SECONDS = 60.0
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 20.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Connections that could not be opened or were dropped (e.g. a stale keep-alive connection). Read timeouts
+# are not retried, the request already waited for the full timeout.
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadError, httpx.WriteError,
+                httpx.RemoteProtocolError)
+# Latencies kept for the p95, and how many are needed before hedging starts.
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+# Environment variables the chat model reads, and the st.secrets keys the app stores them under.
+SECRET_VARIABLES = {
+    "AZURE_OPENAI_API_KEY": "openai_api_key",
+    "AZURE_OPENAI_ENDPOINT": "azure_endpoint",
+    "AZURE_OPENAI_API_BASE": "azure_endpoint",
+    "AZURE_OPENAI_API_VERSION": "api_version",
+    "AZURE_OPENAI_CHAT_DEPLOYMENT_NAME": "deployment_name",
+}
+
+_clients = {}
+_llm = None
+_lock = threading.Lock()
+_counters = {"requests": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0}
+_latencies = deque(maxlen=LATENCY_WINDOW)
+_hedge_executor = None
+
+
+def _setting(name, default):
+    return float(os.environ.get(name, default))
+
+
+def hedging_enabled():
+    return os.environ.get("OPTIGENIUS_LLM_HEDGE", "off").lower() in ("1", "on", "true", "yes")
+
+
+def _count(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def _record_latency(seconds):
+    with _lock:
+        _latencies.append(seconds)
+
+
+def latency_p95():
+    """p95 of the recent request latencies, or None before enough requests were seen."""
+    with _lock:
+        if len(_latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(_latencies)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+def backoff_seconds(attempt, response=None):
+    # Full jitter: anywhere between 0 and the exponential cap, so throttled callers spread out.
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            delay = max(delay, min(BACKOFF_MAX_SECONDS, float(retry_after)))
+        except ValueError:
+            pass
+    return delay
+
+
+def _can_hedge(request):
+    # Streaming responses are consumed as they arrive and cannot be raced.
+    if not hedging_enabled() or request.method != "POST":
+        return False
+    try:
+        return not json.loads(request.content or b"{}").get("stream")
+    except ValueError:
+        return False
+
+
+def _throttle(response, delay):
+    # Our budget estimate was off (or other clients share the deployment): hold everyone back, not just us.
+    if response.status_code == 429:
+        llm_scheduler.get_scheduler().throttle(delay)
+
+
+def _is_stream(response):
+    return response.headers.get("content-type", "").startswith("text/event-stream")
+
+
+def _get_hedge_executor():
+    global _hedge_executor
+    with _lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=int(_setting("OPTIGENIUS_LLM_MAX_CONNECTIONS",
+                                                                        DEFAULT_MAX_CONNECTIONS)),
+                                                 thread_name_prefix="optigenius-llm-hedge")
+    return _hedge_executor
+
+
+def _close_quietly(future):
+    if future.exception() is None:
+        future.result().close()
+
+
+class RetryTransport(httpx.BaseTransport):
+    """Sync transport adding retries and hedged requests on top of a pooled HTTPTransport."""
+
+    def __init__(self, transport, retries):
+        self.transport = transport
+        self.retries = retries
+
+    def _timed(self, request):
+        start = time.perf_counter()
+        response = self.transport.handle_request(request)
+        if _is_stream(response):
+            return response
+        # Read the body here, so the latency covers the whole answer and a hedged loser can be dropped.
+        response.read()
+        if response.status_code < 400:
+            _record_latency(time.perf_counter() - start)
+        return response
+
+    def _hedged(self, request, tokens, delay):
+        executor = _get_hedge_executor()
+        primary = executor.submit(self._timed, request)
+        done, _ = wait([primary], timeout=delay)
+        if done or not llm_scheduler.get_scheduler().try_acquire(tokens):
+            return primary.result()
+        _count("hedges")
+        hedge = executor.submit(self._timed, request)
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = primary if primary in done else hedge
+        if winner.exception() is not None:
+            # The first one to finish failed, the other one may still succeed.
+            winner = hedge if winner is primary else primary
+        loser = hedge if winner is primary else primary
+        loser.add_done_callback(_close_quietly)
+        if winner is hedge:
+            _count("hedge_wins")
+        return winner.result()
+
+    def _send(self, request, tokens):
+        delay = latency_p95() if _can_hedge(request) else None
+        if delay is None:
+            return self._timed(request)
+        return self._hedged(request, tokens, delay)
+
+    def handle_request(self, request):
+        _count("requests")
+        tokens = llm_scheduler.estimate_request_tokens(request.content)
+        attempt = 0
+        while True:
+            # Every attempt counts against the quota, retries queue like new requests.
+            llm_scheduler.acquire(tokens)
+            try:
+                response = self._send(request, tokens)
+            except RETRY_ERRORS:
+                if attempt >= self.retries:
+                    _count("failures")
+                    raise
+                time.sleep(backoff_seconds(attempt))
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    if response.status_code >= 400:
+                        _count("failures")
+                    return response
+                response.close()
+                delay = backoff_seconds(attempt, response)
+                _throttle(response, delay)
+                time.sleep(delay)
+            attempt += 1
+            _count("retries")
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of RetryTransport; the losing hedge is cancelled instead of left to finish."""
+
+    def __init__(self, transport, retries):
+        self.transport = transport
+        self.retries = retries
+
+    async def _timed(self, request):
+        start = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        if _is_stream(response):
+            return response
+        await response.aread()
+        if response.status_code < 400:
+            _record_latency(time.perf_counter() - start)
+        return response
+
+    async def _hedged(self, request, tokens, delay):
+        primary = asyncio.ensure_future(self._timed(request))
+        done, _ = await asyncio.wait([primary], timeout=delay)
+        if done or not llm_scheduler.get_scheduler().try_acquire(tokens):
+            return await primary
+        _count("hedges")
+        hedge = asyncio.ensure_future(self._timed(request))
+        pending = {primary, hedge}
+        failed = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Both may finish in the same round; a success wins over a failure whichever comes first.
+                succeeded = [task for task in (primary, hedge) if task in done and task.exception() is None]
+                if succeeded:
+                    winner = succeeded[0]
+                    for task in succeeded[1:]:
+                        await task.result().aclose()
+                    if winner is hedge:
+                        _count("hedge_wins")
+                    return winner.result()
+                failed = failed or next(iter(done))
+            # Every attempt failed.
+            return failed.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send(self, request, tokens):
+        delay = latency_p95() if _can_hedge(request) else None
+        if delay is None:
+            return await self._timed(request)
+        return await self._hedged(request, tokens, delay)
+
+    async def handle_async_request(self, request):
+        _count("requests")
+        tokens = llm_scheduler.estimate_request_tokens(request.content)
+        attempt = 0
+        while True:
+            await llm_scheduler.aacquire(tokens)
+            try:
+                response = await self._send(request, tokens)
+            except RETRY_ERRORS:
+                if attempt >= self.retries:
+                    _count("failures")
+                    raise
+                await asyncio.sleep(backoff_seconds(attempt))
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    if response.status_code >= 400:
+                        _count("failures")
+                    return response
+                await response.aclose()
+                delay = backoff_seconds(attempt, response)
+                _throttle(response, delay)
+                await asyncio.sleep(delay)
+            attempt += 1
+            _count("retries")
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def request_timeout():
+    return httpx.Timeout(_setting("OPTIGENIUS_LLM_READ_TIMEOUT", DEFAULT_READ_TIMEOUT),
+                         connect=_setting("OPTIGENIUS_LLM_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT))
+
+
+def _pool_limits():
+    max_connections = int(_setting("OPTIGENIUS_LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                        keepalive_expiry=KEEPALIVE_SECONDS)
+
+
+def get_http_clients():
+    """Return the process-wide (httpx.Client, httpx.AsyncClient) pair."""
+    with _lock:
+        if not _clients:
+            retries = int(_setting("OPTIGENIUS_LLM_RETRIES", DEFAULT_RETRIES))
+            limits = _pool_limits()
+            _clients["sync"] = httpx.Client(
+                timeout=request_timeout(),
+                transport=RetryTransport(httpx.HTTPTransport(limits=limits), retries))
+            _clients["async"] = httpx.AsyncClient(
+                timeout=request_timeout(),
+                transport=AsyncRetryTransport(httpx.AsyncHTTPTransport(limits=limits), retries))
+    return _clients["sync"], _clients["async"]
+
+
+def create_azure_llm(**kwargs):
+    """A new AzureChatOpenAI on the shared HTTP clients; kwargs override the defaults."""
+    from langchain_openai import AzureChatOpenAI
+
+    http_client, http_async_client = get_http_clients()
+    settings = {
+        "openai_api_version": os.environ.get("AZURE_OPENAI_API_VERSION"),
+        "azure_deployment": os.environ.get("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME"),
+        "model": os.environ.get("OPENAI_MODEL_NAME", "gpt-4o"),
+        "cache": llm_cache.get_llm_cache(),
+        "timeout": request_timeout(),
+        "max_retries": 0,
+        "http_client": http_client,
+        "http_async_client": http_async_client,
+    }
+    settings.update(kwargs)
+    return AzureChatOpenAI(**settings)
+
+
+def _environment_from_secrets():
+    # The app keeps its Azure settings in st.secrets; variables already set (batch jobs, benchmarks) win.
+    import streamlit as st
+
+    try:
+        values = {name: st.secrets[key] for name, key in SECRET_VARIABLES.items()}
+    except (FileNotFoundError, KeyError):
+        return
+    for name, value in values.items():
+        os.environ.setdefault(name, value)
+    os.environ.setdefault("OPENAI_MODEL_NAME", "gpt-4o")
+
+
+def get_azure_llm():
+    """Return the process-wide chat model shared by utils.py and langgraph_crew.py."""
+    global _llm
+    with _lock:
+        llm = _llm
+    if llm is None:
+        _environment_from_secrets()
+        llm = create_azure_llm()
+        with _lock:
+            if _llm is None:
+                _llm = llm
+            llm = _llm
+    return llm
+
+
+def set_azure_llm(llm):
+    """Replace the process-wide chat model, e.g. with a fake one in benchmarks."""
+    global _llm
+    with _lock:
+        _llm = llm
+
+
+def client_stats():
+    with _lock:
+        stats = dict(_counters)
+        stats["latency_samples"] = len(_latencies)
+    stats["latency_p95_seconds"] = latency_p95()
+    stats["hedging"] = hedging_enabled()
+    return stats
+
+
+def reset_stats():
+    with _lock:
+        for name in _counters:
+            _counters[name] = 0
+        _latencies.clear()
@@ -0,0 +1,261 @@
+"""Process-wide admission control for Azure OpenAI calls: token and request budgets with priorities.
+
+Every request the shared LLM client (llm_client.py) sends first acquires its estimated tokens from a token
+bucket refilled at the deployment's tokens-per-minute quota, and one slot from a requests-per-minute bucket.
+Azure enforces quotas over short windows, so the buckets only hold BURST_SECONDS of budget and refill at
+QUOTA_SHARE of the quota; no 10 second window then sees more than its share.
+The estimate is made before sending: prompt tokens counted with tiktoken, plus max_tokens (or
+DEFAULT_COMPLETION_TOKENS), the same way Azure charges a request against its quota. When a bucket runs dry,
+callers queue by priority (interactive before batch, FIFO within a priority) instead of all going out and
+coming back as 429s. A 429 that still gets through pauses the whole queue for its Retry-After.
+
+    with llm_scheduler.priority(llm_scheduler.BATCH):
+        chain.invoke(inputs)  # waits behind interactive calls
+
+scheduler_stats() reports queue depth and wait times; waits are also recorded as "llm_queue" trace steps.
+Budgets come from OPTIGENIUS_LLM_TPM and OPTIGENIUS_LLM_RPM (0 disables a limit).
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import data_serializer
+import tracing
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+# Quota of a standard gpt-4o deployment with 30k TPM (Azure grants 6 RPM per 1000 TPM).
+DEFAULT_TOKENS_PER_MINUTE = 30000
+DEFAULT_REQUESTS_PER_MINUTE = 180
+DEFAULT_COMPLETION_TOKENS = 1000
+BURST_SECONDS = 1
+QUOTA_SHARE = 0.9
+# Per-message formatting overhead of the chat format.
+MESSAGE_OVERHEAD_TOKENS = 4
+WAIT_WINDOW = 500
+
+_priority = ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level):
+    """Queue LLM calls made inside this block with the given priority."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    """Priority LLM calls made here are queued with."""
+    return _priority.get()
+
+
+def _message_text(content):
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def estimate_request_tokens(body):
+    """Tokens a chat completions request body (bytes or dict) counts against the quota."""
+    if isinstance(body, (bytes, str)):
+        try:
+            body = json.loads(body or "{}")
+        except ValueError:
+            return DEFAULT_COMPLETION_TOKENS
+    prompt_tokens = sum(MESSAGE_OVERHEAD_TOKENS + data_serializer.count_tokens(_message_text(message.get("content")))
+                        for message in body.get("messages", []))
+    completion_tokens = body.get("max_completion_tokens") or body.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return prompt_tokens + completion_tokens
+
+
+class Scheduler:
+    def __init__(self, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self.token_rate = tokens_per_minute * QUOTA_SHARE / 60
+        self.request_rate = requests_per_minute * QUOTA_SHARE / 60
+        self.token_capacity = self.token_rate * BURST_SECONDS
+        self.request_capacity = max(1.0, self.request_rate * BURST_SECONDS)
+        self.tokens = self.token_capacity
+        self.requests = self.request_capacity
+        self.paused_until = 0.0
+        self.counters = {"granted": 0, "granted_tokens": 0, "queued": 0, "cancelled": 0, "throttled": 0}
+        self._updated = time.monotonic()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._waits = deque(maxlen=WAIT_WINDOW)
+        self._condition = threading.Condition()
+        self._dispatcher = None
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.tokens_per_minute:
+            self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_rate)
+        if self.requests_per_minute:
+            self.requests = min(self.request_capacity, self.requests + elapsed * self.request_rate)
+
+    def _seconds_until_available(self, tokens, now):
+        seconds = self.paused_until - now
+        # A request larger than the bucket goes once the bucket is full and leaves it in debt, which later
+        # requests wait out, so the average rate still holds.
+        needed = min(tokens, self.token_capacity)
+        if self.tokens_per_minute and self.tokens < needed:
+            seconds = max(seconds, (needed - self.tokens) / self.token_rate)
+        if self.requests_per_minute and self.requests < 1:
+            seconds = max(seconds, (1 - self.requests) / self.request_rate)
+        return seconds
+
+    def _take(self, tokens, priority_level, waited):
+        if self.tokens_per_minute:
+            self.tokens -= tokens
+        if self.requests_per_minute:
+            self.requests -= 1
+        self.counters["granted"] += 1
+        self.counters["granted_tokens"] += tokens
+        self._waits.append((priority_level, waited))
+
+    def submit(self, tokens, priority_level=None):
+        """Queue a request for tokens; the returned Future resolves to the seconds it waited."""
+        priority_level = _priority.get() if priority_level is None else priority_level
+        future = Future()
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            if not self._queue and self._seconds_until_available(tokens, now) <= 0:
+                self._take(tokens, priority_level, 0.0)
+                future.set_result(0.0)
+                return future
+            self.counters["queued"] += 1
+            heapq.heappush(self._queue, (priority_level, next(self._sequence), tokens, now, future))
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="optigenius-llm-scheduler",
+                                                    daemon=True)
+                self._dispatcher.start()
+            self._condition.notify()
+        return future
+
+    def _dispatch(self):
+        with self._condition:
+            while True:
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                now = time.monotonic()
+                self._refill(now)
+                priority_level, _, tokens, enqueued, future = self._queue[0]
+                if future.cancelled():
+                    heapq.heappop(self._queue)
+                    self.counters["cancelled"] += 1
+                    continue
+                # Strict priority: the head waits for its budget and nobody overtakes it.
+                seconds = self._seconds_until_available(tokens, now)
+                if seconds > 0:
+                    self._condition.wait(seconds)
+                    continue
+                heapq.heappop(self._queue)
+                if not future.set_running_or_notify_cancel():
+                    self.counters["cancelled"] += 1
+                    continue
+                self._take(tokens, priority_level, now - enqueued)
+                future.set_result(now - enqueued)
+
+    def try_acquire(self, tokens):
+        """Take the budget only if it is available right now and nobody is queued (used for hedges)."""
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            if self._queue or self._seconds_until_available(tokens, now) > 0:
+                return False
+            self._take(tokens, _priority.get(), 0.0)
+            return True
+
+    def throttle(self, seconds):
+        """Hold back every queued request for seconds, after the deployment answered with a 429."""
+        with self._condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.counters["throttled"] += 1
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            queued = [entry for entry in self._queue if not entry[4].cancelled()]
+            waits = list(self._waits)
+            stats = dict(self.counters)
+            stats.update({
+                "queue_depth": len(queued),
+                "oldest_wait_seconds": max((now - entry[3] for entry in queued), default=0.0),
+                "tokens_available": self.tokens if self.tokens_per_minute else None,
+                "requests_available": self.requests if self.requests_per_minute else None,
+                "tokens_per_minute": self.tokens_per_minute,
+                "requests_per_minute": self.requests_per_minute,
+            })
+        for level, name in PRIORITY_NAMES.items():
+            stats[f"queue_depth_{name}"] = sum(entry[0] == level for entry in queued)
+        ordered = sorted(seconds for _, seconds in waits)
+        stats["wait_mean_seconds"] = sum(ordered) / len(ordered) if ordered else 0.0
+        stats["wait_p95_seconds"] = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else 0.0
+        stats["wait_max_seconds"] = ordered[-1] if ordered else 0.0
+        return stats
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler(
+                tokens_per_minute=int(os.environ.get("OPTIGENIUS_LLM_TPM", DEFAULT_TOKENS_PER_MINUTE)),
+                requests_per_minute=int(os.environ.get("OPTIGENIUS_LLM_RPM", DEFAULT_REQUESTS_PER_MINUTE)),
+            )
+    return _scheduler
+
+
+def configure(tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+    """Replace the process-wide scheduler, e.g. after moving to a deployment with another quota."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = Scheduler(tokens_per_minute, requests_per_minute)
+    return _scheduler
+
+
+def _record_wait(tokens, waited):
+    tracing.record_step("llm_queue", PRIORITY_NAMES.get(_priority.get(), str(_priority.get())), waited, waited,
+                        tokens=tokens)
+
+
+def acquire(tokens, priority_level=None):
+    """Block until the budget for a request of tokens is granted; returns the seconds waited."""
+    waited = get_scheduler().submit(tokens, priority_level).result()
+    _record_wait(tokens, waited)
+    return waited
+
+
+async def aacquire(tokens, priority_level=None):
+    # Cancelling the awaiting task also takes the request out of the queue.
+    waited = await asyncio.wrap_future(get_scheduler().submit(tokens, priority_level))
+    _record_wait(tokens, waited)
+    return waited
+
+
+def scheduler_stats():
+    return get_scheduler().stats()
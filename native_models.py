@@ -0,0 +1,467 @@
+"""Native PuLP model builders for the built-in supply chain scenarios.
+
+Each builder turns the ``data_in_format`` dict produced by ``supply_chain_scenarios`` straight into a PuLP
+model, so the standard scenarios are solved deterministically in milliseconds. The LLM is only needed to
+narrate the result (see ``utils.explain_solution``).
+
+Demand that the data cannot cover (too little supply or capacity, or too little low-risk capacity) is left
+unmet instead of making the model infeasible: every demand row has a slack variable charged
+UNMET_PENALTY_FACTOR times the scenario's highest unit cost. The reported objective is the real cost without
+that charge, and the unmet units are listed in the result's notes and ``unmet``.
+"""
+import inspect
+import re
+import time
+
+import pandas as pd
+import pulp
+
+import solvers
+
+# Transportation style instances at least this large are assembled as sparse matrices instead of PuLP objects.
+SPARSE_MIN_VARIABLES = 20000
+MAX_RESULT_LINES = 50
+# Each unit of unmet demand costs this many times the highest unit cost, so demand is only left unmet when the
+# data leaves no way to meet it.
+UNMET_PENALTY_FACTOR = 10
+UNMET_TOLERANCE = 1e-6
+MAX_UNMET_LABELS = 5
+
+
+def _labels(df):
+    # Generators either keep names in the first (text) column or in the index.
+    first = df.iloc[:, 0]
+    if first.dtype == object or pd.api.types.is_string_dtype(first):
+        return [str(label) for label in first]
+    return [str(label) for label in df.index]
+
+
+def _values(df):
+    # The quantity is always the last column of the one-value-per-row tables.
+    return df.iloc[:, -1].astype(float).to_numpy()
+
+
+def _matrix(df):
+    return df.select_dtypes("number").astype(float).to_numpy()
+
+
+def _unmet_penalty(unit_costs):
+    return UNMET_PENALTY_FACTOR * max(float(abs(unit_costs).max()) if unit_costs.size else 0.0, 1.0)
+
+
+def _build_transport_model(name, sinks, sources, cost, demand, supply, value_label):
+    """Min-cost flow from sources to sinks: cost has one row per sink and one column per source."""
+    prob = pulp.LpProblem(name, pulp.LpMinimize)
+    flow = {
+        (i, j): pulp.LpVariable(f"flow_{i}_{j}", lowBound=0)
+        for i in range(len(sinks)) for j in range(len(sources))
+    }
+    unmet = {sink: pulp.LpVariable(f"unmet_{i}", lowBound=0) for i, sink in enumerate(sinks)}
+    penalty = _unmet_penalty(cost)
+
+    prob += pulp.lpSum(cost[i][j] * flow[i, j] for (i, j) in flow) + penalty * pulp.lpSum(unmet.values())
+
+    demand_constraints = {}
+    for i, sink in enumerate(sinks):
+        constraint = pulp.lpSum(flow[i, j] for j in range(len(sources))) + unmet[sink] >= demand[i]
+        prob += constraint, f"demand_{i}"
+        demand_constraints[sink] = prob.constraints[f"demand_{i}"]
+
+    supply_constraints = {}
+    for j, source in enumerate(sources):
+        constraint = pulp.lpSum(flow[i, j] for i in range(len(sinks))) <= supply[j]
+        prob += constraint, f"supply_{j}"
+        supply_constraints[source] = prob.constraints[f"supply_{j}"]
+
+    return {
+        "problem": prob,
+        "variables": flow,
+        "constraints": {"demand": demand_constraints, "supply": supply_constraints},
+        "unmet": unmet,
+        "unmet_penalty": penalty,
+        "rows": sinks,
+        "columns": sources,
+        "value_label": value_label,
+        "notes": _transport_notes(demand, supply),
+    }
+
+
+def _transport_notes(demand, supply):
+    if sum(demand) > sum(supply):
+        return [f"Total demand ({sum(demand):g} units) exceeds total supply ({sum(supply):g} units)."]
+    return []
+
+
+def _update_transport_model(model, sinks, sources, cost, demand, supply):
+    prob = model["problem"]
+    for (i, j), variable in model["variables"].items():
+        prob.objective[variable] = cost[i][j]
+    model["unmet_penalty"] = _unmet_penalty(cost)
+    for variable in model["unmet"].values():
+        prob.objective[variable] = model["unmet_penalty"]
+    for i in range(len(sinks)):
+        prob.constraints[f"demand_{i}"].changeRHS(demand[i])
+    for j in range(len(sources)):
+        prob.constraints[f"supply_{j}"].changeRHS(supply[j])
+    model["notes"] = _transport_notes(demand, supply)
+
+
+# name, demand table, supply table, cost table, value label
+TRANSPORT_SCENARIOS = {
+    "Customer Order Fulfillment": ("customer_order_fulfillment", "Customer Demand (Units)",
+                                   "Warehouse Supply (Units)", "Shipping Costs (USD)", "Units Shipped"),
+    "Demand-Supply Matching": ("demand_supply_matching", "Store Demand (Units)", "Plant Supply (Units)",
+                               "Distribution Costs (USD)", "Units Distributed"),
+    "Transportation Optimization": ("transportation_optimization", "Customer Demand", "Warehouse Capacities",
+                                    "Shipping Costs", "Units Shipped"),
+}
+
+
+def transport_arrays(scenario, data_in_format):
+    """Return (sinks, sources, cost, demand, supply) for a transportation style scenario."""
+    _, demand_table, supply_table, cost_table, _ = TRANSPORT_SCENARIOS[scenario]
+    demand_df = data_in_format[demand_table]
+    supply_df = data_in_format[supply_table]
+    return (_labels(demand_df), _labels(supply_df), _matrix(data_in_format[cost_table]),
+            _values(demand_df), _values(supply_df))
+
+
+def _build_scenario_transport_model(scenario, data_in_format):
+    name, _, _, _, value_label = TRANSPORT_SCENARIOS[scenario]
+    return _build_transport_model(name, *transport_arrays(scenario, data_in_format), value_label)
+
+
+def build_customer_order_fulfillment_model(data_in_format):
+    return _build_scenario_transport_model("Customer Order Fulfillment", data_in_format)
+
+
+def build_demand_supply_matching_model(data_in_format):
+    return _build_scenario_transport_model("Demand-Supply Matching", data_in_format)
+
+
+def build_transportation_model(data_in_format):
+    return _build_scenario_transport_model("Transportation Optimization", data_in_format)
+
+
+def update_transport_model(scenario, model, data_in_format):
+    _update_transport_model(model, *transport_arrays(scenario, data_in_format))
+
+
+def _inventory_arrays(data_in_format):
+    holding_df = data_in_format["Holding Costs in USD"]
+    capacities_df = data_in_format["Warehouse Capacities"]
+    return (_labels(holding_df), _labels(capacities_df), _values(holding_df), _values(capacities_df),
+            _matrix(data_in_format["Demand Forecast"]))
+
+
+def _inventory_notes(warehouses, capacities, forecast):
+    return [
+        f"Forecasted demand at {warehouse} ({forecast[:, j].sum():g} units) exceeds its capacity "
+        f"({capacities[j]:g} units)."
+        for j, warehouse in enumerate(warehouses) if forecast[:, j].sum() > capacities[j]
+    ]
+
+
+def build_inventory_model(data_in_format):
+    products, warehouses, holding_costs, capacities, forecast = _inventory_arrays(data_in_format)
+
+    prob = pulp.LpProblem("inventory_optimization", pulp.LpMinimize)
+    stock = {
+        (i, j): pulp.LpVariable(f"stock_{i}_{j}", lowBound=0)
+        for i in range(len(products)) for j in range(len(warehouses))
+    }
+    unmet = {f"{products[i]} @ {warehouses[j]}": pulp.LpVariable(f"unmet_{i}_{j}", lowBound=0) for (i, j) in stock}
+    penalty = _unmet_penalty(holding_costs)
+
+    prob += pulp.lpSum(holding_costs[i] * stock[i, j] for (i, j) in stock) + penalty * pulp.lpSum(unmet.values())
+
+    demand_constraints = {}
+    for (i, j) in stock:
+        label = f"{products[i]} @ {warehouses[j]}"
+        prob += stock[i, j] + unmet[label] >= forecast[i][j], f"demand_{i}_{j}"
+        demand_constraints[label] = prob.constraints[f"demand_{i}_{j}"]
+
+    capacity_constraints = {}
+    for j, warehouse in enumerate(warehouses):
+        prob += pulp.lpSum(stock[i, j] for i in range(len(products))) <= capacities[j], f"capacity_{j}"
+        capacity_constraints[warehouse] = prob.constraints[f"capacity_{j}"]
+
+    return {
+        "problem": prob,
+        "variables": stock,
+        "constraints": {"demand": demand_constraints, "capacity": capacity_constraints},
+        "unmet": unmet,
+        "unmet_penalty": penalty,
+        "rows": products,
+        "columns": warehouses,
+        "value_label": "Units Stocked",
+        "notes": _inventory_notes(warehouses, capacities, forecast),
+    }
+
+
+def update_inventory_model(model, data_in_format):
+    _, warehouses, holding_costs, capacities, forecast = _inventory_arrays(data_in_format)
+    prob = model["problem"]
+    for (i, j), variable in model["variables"].items():
+        prob.objective[variable] = holding_costs[i]
+        prob.constraints[f"demand_{i}_{j}"].changeRHS(forecast[i][j])
+    model["unmet_penalty"] = _unmet_penalty(holding_costs)
+    for variable in model["unmet"].values():
+        prob.objective[variable] = model["unmet_penalty"]
+    for j in range(len(warehouses)):
+        prob.constraints[f"capacity_{j}"].changeRHS(capacities[j])
+    model["notes"] = _inventory_notes(warehouses, capacities, forecast)
+
+
+def _supplier_arrays(data_in_format):
+    capacity_df = data_in_format["Supplier Capacity (Units)"]
+    return (_labels(capacity_df), _values(capacity_df), _values(data_in_format["Procurement Cost (USD/Unit)"]),
+            _values(data_in_format["Supplier Risk (Score)"]))
+
+
+def _supplier_notes(capacities, risks, demand, risk_threshold):
+    notes = []
+    if capacities.sum() < demand:
+        notes.append(f"Total supplier capacity ({capacities.sum():g} units) is below the demand ({demand:g} units).")
+    # The lowest average risk for the demand comes from filling it with the least risky suppliers first.
+    order = risks.argsort()
+    filled_before = capacities[order].cumsum() - capacities[order]
+    taken = (demand - filled_before).clip(0, capacities[order])
+    if taken.sum() > 0:
+        lowest_risk = (risks[order] * taken).sum() / taken.sum()
+        if lowest_risk > risk_threshold:
+            low_risk_capacity = capacities[risks <= risk_threshold].sum()
+            notes.append(f"Only {low_risk_capacity:g} units of capacity have a risk score at or below the threshold "
+                         f"of {risk_threshold:g}: the lowest achievable average risk for "
+                         f"{min(demand, capacities.sum()):g} units is {lowest_risk:.3f}, so only as much "
+                         f"is ordered as keeps the average risk within the threshold.")
+    return notes
+
+
+def build_supplier_risk_model(data_in_format, demand=1000, risk_threshold=0.2):
+    suppliers, capacities, costs, risks = _supplier_arrays(data_in_format)
+
+    prob = pulp.LpProblem("supplier_risk_management", pulp.LpMinimize)
+    order = {
+        (i, 0): pulp.LpVariable(f"order_{i}", lowBound=0, upBound=capacities[i])
+        for i in range(len(suppliers))
+    }
+    unmet = {"Total Demand": pulp.LpVariable("unmet", lowBound=0)}
+    penalty = _unmet_penalty(costs)
+    total = pulp.lpSum(order.values())
+
+    prob += pulp.lpSum(costs[i] * order[i, 0] for i in range(len(suppliers))) + penalty * unmet["Total Demand"]
+    prob += total + unmet["Total Demand"] >= demand, "demand"
+    # Volume weighted average risk stays below the threshold, written linearly.
+    prob += pulp.lpSum((risks[i] - risk_threshold) * order[i, 0] for i in range(len(suppliers))) <= 0, "risk"
+
+    return {
+        "problem": prob,
+        "variables": order,
+        "constraints": {"demand": {"Total Demand": prob.constraints["demand"]},
+                        "risk": {"Average Risk": prob.constraints["risk"]}},
+        "unmet": unmet,
+        "unmet_penalty": penalty,
+        "rows": suppliers,
+        "columns": ["Units Ordered"],
+        "value_label": "Units Ordered",
+        "notes": _supplier_notes(capacities, risks, demand, risk_threshold),
+    }
+
+
+def update_supplier_risk_model(model, data_in_format, demand=1000, risk_threshold=0.2):
+    _, capacities, costs, risks = _supplier_arrays(data_in_format)
+    prob = model["problem"]
+    risk = prob.constraints["risk"]
+    for (i, _), variable in model["variables"].items():
+        variable.upBound = capacities[i]
+        prob.objective[variable] = costs[i]
+        risk.expr[variable] = risks[i] - risk_threshold
+    model["unmet_penalty"] = _unmet_penalty(costs)
+    prob.objective[model["unmet"]["Total Demand"]] = model["unmet_penalty"]
+    prob.constraints["demand"].changeRHS(demand)
+    model["notes"] = _supplier_notes(capacities, risks, demand, risk_threshold)
+
+
+def supplier_risk_parameters(constraint):
+    # The generator only states demand and risk threshold in the constraint text.
+    params = {}
+    demand = re.search(r"demand of\s+([\d,.]+)\s*units", constraint or "")
+    threshold = re.search(r"risk threshold of\s+([\d.]+)", constraint or "")
+    if demand:
+        params["demand"] = float(demand.group(1).replace(",", "").rstrip("."))
+    if threshold:
+        params["risk_threshold"] = float(threshold.group(1).rstrip("."))
+    return params
+
+
+NATIVE_BUILDERS = {
+    "Customer Order Fulfillment": build_customer_order_fulfillment_model,
+    "Demand-Supply Matching": build_demand_supply_matching_model,
+    "Supplier Risk Assessment": build_supplier_risk_model,
+    "Inventory Optimization": build_inventory_model,
+    "Transportation Optimization": build_transportation_model,
+}
+
+
+def has_native_model(scenario):
+    return scenario in NATIVE_BUILDERS
+
+
+def build_model(scenario, data_in_format, constraint=""):
+    builder = NATIVE_BUILDERS[scenario]
+    if builder is build_supplier_risk_model:
+        return builder(data_in_format, **supplier_risk_parameters(constraint))
+    return builder(data_in_format)
+
+
+def update_model(scenario, model, data_in_format, constraint=""):
+    """Write new numbers (costs, demands, capacities, ...) into a model built from data of the same shape and labels."""
+    if scenario in TRANSPORT_SCENARIOS:
+        update_transport_model(scenario, model, data_in_format)
+    elif scenario == "Supplier Risk Assessment":
+        update_supplier_risk_model(model, data_in_format, **supplier_risk_parameters(constraint))
+    else:
+        update_inventory_model(model, data_in_format)
+
+
+def unmet_demand(model):
+    """Unmet units per demand label of a solved model, only the ones above the tolerance."""
+    values = {label: variable.varValue or 0.0 for label, variable in model["unmet"].items()}
+    return {label: value for label, value in values.items() if value > UNMET_TOLERANCE}
+
+
+def _unmet_notes(unmet, penalty):
+    if not unmet:
+        return []
+    listed = ", ".join(f"{label} {value:g}" for label, value in list(unmet.items())[:MAX_UNMET_LABELS])
+    if len(unmet) > MAX_UNMET_LABELS:
+        listed += f" and {len(unmet) - MAX_UNMET_LABELS} more"
+    return [f"{sum(unmet.values()):g} units of demand are left unmet ({listed}). The model charges {penalty:g} "
+            f"per unmet unit; the objective value is the cost without that charge."]
+
+
+def solve_model(model, warm_start=False):
+    prob = model["problem"]
+    # A warm start begins from the variable values left by the previous solve (CBC and Gurobi only).
+    solved = solvers.solve(prob, warm_start=warm_start, verbose=False)
+
+    # Variable values are only meaningful for an optimal solution or an incumbent found before the time limit.
+    solution = pd.DataFrame(0.0, index=model["rows"], columns=model["columns"])
+    unmet = {}
+    objective = solved["objective"]
+    if solved["has_solution"]:
+        for (i, j), variable in model["variables"].items():
+            solution.iat[i, j] = variable.varValue or 0.0
+        unmet = unmet_demand(model)
+        if objective is not None:
+            objective -= model["unmet_penalty"] * sum(unmet.values())
+
+    return {
+        "status": solved["status"],
+        "objective": objective,
+        "solution": solution,
+        "unmet": unmet,
+        "notes": model.get("notes", []) + _unmet_notes(unmet, model["unmet_penalty"]),
+        "value_label": model["value_label"],
+        "solve_seconds": solved["seconds"],
+        "solver": solved["backend"],
+    }
+
+
+def solve_transport_sparse(scenario, data_in_format):
+    # Large transportation instances skip PuLP objects entirely, see sparse_lp.
+    sinks, sources, cost, demand, supply = transport_arrays(scenario, data_in_format)
+    # Imported here: SciPy takes half a second to load and only large instances need it.
+    import sparse_lp
+
+    penalty = _unmet_penalty(cost)
+    sparse_result = sparse_lp.solve_transport(cost, demand, supply, unmet_penalty=penalty)
+
+    unmet = {sink: float(value) for sink, value in zip(sinks, sparse_result["unmet"]) if value > UNMET_TOLERANCE}
+    objective = sparse_result["objective"]
+    if objective is not None:
+        objective -= penalty * sum(unmet.values())
+
+    return {
+        "status": sparse_result["status"],
+        "objective": objective,
+        "solution": pd.DataFrame(sparse_result["flow"], index=sinks, columns=sources),
+        "unmet": unmet,
+        "notes": _transport_notes(demand, supply) + _unmet_notes(unmet, penalty),
+        "value_label": TRANSPORT_SCENARIOS[scenario][4],
+        "solve_seconds": sparse_result["solve_seconds"],
+        "build_seconds": sparse_result["build_seconds"],
+        "demand_duals": sparse_result["demand_duals"],
+        "supply_duals": sparse_result["supply_duals"],
+    }
+
+
+def _num_variables(scenario, data_in_format):
+    _, demand_table, supply_table, _, _ = TRANSPORT_SCENARIOS[scenario]
+    return len(data_in_format[demand_table]) * len(data_in_format[supply_table])
+
+
+def uses_sparse_model(scenario, data_in_format):
+    return scenario in TRANSPORT_SCENARIOS and _num_variables(scenario, data_in_format) >= SPARSE_MIN_VARIABLES
+
+
+def solve_scenario(scenario, data_in_format, constraint=""):
+    if uses_sparse_model(scenario, data_in_format):
+        result = solve_transport_sparse(scenario, data_in_format)
+        print(f"Sparse {scenario} model: build {result['build_seconds'] * 1000:.1f} ms, "
+              f"solve {result['solve_seconds'] * 1000:.1f} ms, status {result['status']}")
+        return result
+
+    start = time.perf_counter()
+    model = build_model(scenario, data_in_format, constraint)
+    build_seconds = time.perf_counter() - start
+
+    result = solve_model(model)
+    result["build_seconds"] = build_seconds
+    print(f"Native {scenario} model: build {build_seconds * 1000:.1f} ms, "
+          f"solve {result['solve_seconds'] * 1000:.1f} ms, status {result['status']}")
+    return result
+
+
+def format_result(result):
+    # Plain text version of the result for the narration prompt.
+    solution = result["solution"]
+    lines = [
+        f"Solver Status: {result['status']}",
+        f"Objective Value: {result['objective']:.2f}" if result["objective"] is not None else "Objective Value: n/a",
+    ]
+    lines.extend(f"Note: {note}" for note in result["notes"])
+    lines.append(f"{result['value_label']}:")
+
+    values = solution.stack()
+    values = values[values.abs() > 1e-9]
+    for (row, column), value in values.head(MAX_RESULT_LINES).items():
+        lines.append(f"- {row} / {column}: {value:g}" if solution.shape[1] > 1 else f"- {row}: {value:g}")
+    if len(values) > MAX_RESULT_LINES:
+        lines.append(f"- ... and {len(values) - MAX_RESULT_LINES} more non-zero values")
+    return "\n".join(lines)
+
+
+def result_to_html(result, narration=""):
+    objective = f"{result['objective']:.2f}" if result["objective"] is not None else "n/a"
+    table = result["solution"].to_html(float_format=lambda value: f"{value:g}")
+    return (
+        f"<h3>Optimization Results</h3>"
+        f"<p><b>Status:</b> {result['status']}<br><b>Objective Value:</b> {objective}</p>"
+        + "".join(f"<p>{note}</p>" for note in result["notes"]) +
+        f"<h4>{result['value_label']}</h4>{table}"
+        f"<div style='white-space: pre-wrap; margin-top: 1em;'>{narration}</div>"
+    )
+
+
+def model_source(scenario):
+    # Shown in the code panel instead of LLM generated code.
+    builder = NATIVE_BUILDERS[scenario]
+    functions = [_labels, _values, _matrix, _unmet_penalty]
+    header = f"import pandas as pd\nimport pulp\n\nUNMET_PENALTY_FACTOR = {UNMET_PENALTY_FACTOR}\n\n\n"
+    if scenario in TRANSPORT_SCENARIOS:
+        functions += [_build_transport_model, transport_arrays, _build_scenario_transport_model]
+        header += f"TRANSPORT_SCENARIOS = {TRANSPORT_SCENARIOS!r}\n\n\n"
+    functions.append(builder)
+    return header + "\n\n".join(inspect.getsource(f) for f in functions)
@@ -0,0 +1,168 @@
+"""What-if sweeps over the numbers of a built-in scenario.
+
+A sweep scales the numeric columns of ``data_in_format`` tables, either on a grid of factors per table
+(every combination) or by random per-cell noise, and solves every variant with the native model in a
+process pool. The result is a tidy DataFrame with one row per variant and constraint: the variant's
+factors, status, objective (cost without the unmet demand penalty) and unmet demand units, plus the
+constraint's shadow price, slack and whether it is binding.
+
+    variants = grid_variants({"Warehouse Supply (Units)": [0.8, 0.9, 1.0]})
+    sweep = run_sweep("Customer Order Fulfillment", data_in_format, variants)
+    objectives = objective_table(sweep)
+
+OPTIGENIUS_SWEEP_WORKERS sets the pool size (default: CPU count).
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import execution_pool
+import native_models
+import solvers
+
+# Constraints with a slack this small, relative to their right-hand side, count as binding.
+BINDING_TOLERANCE = 1e-6
+VARIANT_COLUMNS = ["variant", "status", "objective", "unmet"]
+
+_base = {}
+
+
+def grid_variants(factors):
+    """Every combination of {table name: [scale factors]}, e.g. {"Plant Supply (Units)": [0.8, 1.0]}."""
+    tables = list(factors)
+    return [{"scale": dict(zip(tables, combination))}
+            for combination in itertools.product(*(factors[table] for table in tables))]
+
+
+def random_variants(tables, samples, spread=0.2, seed=0):
+    """Variants multiplying every number of the given tables by its own factor in [1 - spread, 1 + spread]."""
+    return [{"noise": {"tables": list(tables), "spread": spread, "seed": seed + sample}}
+            for sample in range(samples)]
+
+
+def apply_variant(data_in_format, variant):
+    data = dict(data_in_format)
+    for table, factor in variant.get("scale", {}).items():
+        df = data[table].copy()
+        numeric = df.select_dtypes("number").columns
+        df[numeric] = df[numeric].astype(float) * factor
+        data[table] = df
+    noise = variant.get("noise")
+    if noise:
+        rng = np.random.default_rng(noise["seed"])
+        for table in noise["tables"]:
+            df = data[table].copy()
+            numeric = df.select_dtypes("number").columns
+            values = df[numeric].astype(float).to_numpy()
+            df[numeric] = values * rng.uniform(1 - noise["spread"], 1 + noise["spread"], values.shape)
+            data[table] = df
+    return data
+
+
+def _is_binding(slack, rhs):
+    return abs(slack) <= BINDING_TOLERANCE * max(1.0, abs(rhs))
+
+
+def _pulp_constraint_rows(model):
+    rows = []
+    for group, constraints in model["constraints"].items():
+        for label, constraint in constraints.items():
+            # value() is lhs - rhs, so its magnitude is the slack for either direction.
+            slack = abs(constraint.value() or 0.0)
+            rhs = -constraint.constant
+            rows.append({"group": group, "constraint": label, "shadow_price": constraint.pi,
+                         "slack": slack, "binding": _is_binding(slack, rhs)})
+    return rows
+
+
+def _sparse_constraint_rows(scenario, data_in_format, result):
+    sinks, sources, _, demand, supply = native_models.transport_arrays(scenario, data_in_format)
+    flow = result["solution"].to_numpy()
+    unmet = np.array([result["unmet"].get(sink, 0.0) for sink in sinks])
+    groups = [("demand", sinks, demand, flow.sum(axis=1) + unmet - demand, result["demand_duals"]),
+              ("supply", sources, supply, supply - flow.sum(axis=0), result["supply_duals"])]
+    rows = []
+    for group, labels, rhs, slack, duals in groups:
+        for position, label in enumerate(labels):
+            rows.append({"group": group, "constraint": label,
+                         "shadow_price": float(duals[position]),
+                         "slack": float(slack[position]), "binding": _is_binding(slack[position], rhs[position])})
+    return rows
+
+
+def solve_variant(scenario, data_in_format, constraint, variant):
+    """Solve one variant and return (summary, constraint rows)."""
+    data = apply_variant(data_in_format, variant)
+    if native_models.uses_sparse_model(scenario, data):
+        result = native_models.solve_transport_sparse(scenario, data)
+        rows = _sparse_constraint_rows(scenario, data, result) if result["objective"] is not None else []
+        return {"status": result["status"], "objective": result["objective"],
+                "unmet": sum(result["unmet"].values())}, rows
+
+    model = native_models.build_model(scenario, data, constraint)
+    # One thread per solve, the pool already runs one solve per core.
+    solved = solvers.solve(model["problem"], threads=1, verbose=False)
+    if not solved["has_solution"]:
+        return {"status": solved["status"], "objective": solved["objective"], "unmet": None}, []
+    unmet = sum(native_models.unmet_demand(model).values())
+    objective = solved["objective"]
+    if objective is not None:
+        objective -= model["unmet_penalty"] * unmet
+    return {"status": solved["status"], "objective": objective, "unmet": unmet}, _pulp_constraint_rows(model)
+
+
+def _init_worker(scenario, data_in_format, constraint):
+    _base.update(scenario=scenario, data=data_in_format, constraint=constraint)
+
+
+def _run_variant(variant):
+    return solve_variant(_base["scenario"], _base["data"], _base["constraint"], variant)
+
+
+def _variant_factors(variant):
+    factors = {f"scale: {table}": factor for table, factor in variant.get("scale", {}).items()}
+    if variant.get("noise"):
+        factors["noise seed"] = variant["noise"]["seed"]
+    return factors
+
+
+def run_sweep(scenario, data_in_format, variants, constraint="", workers=None):
+    """Solve every variant of a built-in scenario in a process pool and return the tidy results table."""
+    workers = workers or int(os.environ.get("OPTIGENIUS_SWEEP_WORKERS", 0)) or os.cpu_count() or 1
+    workers = min(workers, len(variants)) or 1
+    # The base data is sent to each worker once, tasks only carry the small variant descriptions.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=execution_pool.CLEAN_MAIN_CONTEXT,
+                             initializer=_init_worker, initargs=(scenario, data_in_format, constraint)) as executor:
+        outcomes = list(executor.map(_run_variant, variants, chunksize=max(1, len(variants) // (workers * 4))))
+
+    records = []
+    for number, (variant, (summary, rows)) in enumerate(zip(variants, outcomes)):
+        base = dict({"variant": number}, **_variant_factors(variant), **summary)
+        if not rows:
+            records.append(base)
+        records.extend(dict(base, **row) for row in rows)
+    return pd.DataFrame(records)
+
+
+def objective_table(sweep):
+    """One row per variant with its factors, status and objective."""
+    factors = [column for column in sweep.columns if column.startswith("scale: ") or column == "noise seed"]
+    return sweep.drop_duplicates("variant")[VARIANT_COLUMNS[:1] + factors + VARIANT_COLUMNS[1:]] \
+        .reset_index(drop=True)
+
+
+def constraint_table(sweep):
+    """Per constraint: share of variants where it binds and its mean and range of shadow prices."""
+    if "constraint" not in sweep:
+        return pd.DataFrame(columns=["group", "constraint", "binding_share", "mean_shadow_price",
+                                     "min_shadow_price", "max_shadow_price"])
+    rows = sweep.dropna(subset=["constraint"])
+    return rows.groupby(["group", "constraint"], sort=False).agg(
+        binding_share=("binding", "mean"),
+        mean_shadow_price=("shadow_price", "mean"),
+        min_shadow_price=("shadow_price", "min"),
+        max_shadow_price=("shadow_price", "max"),
+    ).reset_index()
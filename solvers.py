@@ -0,0 +1,117 @@
+"""One entry point for solving PuLP models with CBC, HiGHS or Gurobi.
+
+The backend, thread count, time limit and relative MIP gap come from arguments or from
+OPTIGENIUS_SOLVER (auto, cbc, highs, gurobi), OPTIGENIUS_SOLVER_THREADS, OPTIGENIUS_SOLVER_TIME_LIMIT and
+OPTIGENIUS_SOLVER_GAP. "auto" prefers Gurobi when gurobipy has a working license, then HiGHS, then CBC.
+The default time limit stays below the execution pool timeout, so a long solve stops with its best
+incumbent instead of being killed without an answer.
+
+Generated code uses it through the warm execution workers:
+
+    import solvers
+    result = solvers.solve(prob)
+"""
+import functools
+import os
+import time
+
+import pulp
+
+DEFAULT_EXEC_TIMEOUT = 10
+# Share of the execution timeout the solver may use, the rest is left for model building and printing.
+TIME_LIMIT_SHARE = 0.7
+BACKENDS = ("gurobi", "highs", "cbc")
+
+
+@functools.lru_cache(maxsize=None)
+def _gurobi_licensed():
+    try:
+        import gurobipy
+        gurobipy.Env().dispose()
+        return True
+    except Exception:
+        return False
+
+
+def available_backends():
+    backends = []
+    if _gurobi_licensed():
+        backends.append("gurobi")
+    if pulp.HiGHS(msg=False).available() or pulp.HiGHS_CMD(msg=False).available():
+        backends.append("highs")
+    backends.append("cbc")
+    return backends
+
+
+def default_time_limit():
+    exec_timeout = float(os.environ.get("OPTIGENIUS_EXEC_TIMEOUT", DEFAULT_EXEC_TIMEOUT))
+    return max(1.0, exec_timeout * TIME_LIMIT_SHARE)
+
+
+def _env_number(name, cast):
+    value = os.environ.get(name)
+    return cast(value) if value not in (None, "") else None
+
+
+def solver_options(backend=None, threads=None, time_limit=None, gap=None):
+    backend = (backend or os.environ.get("OPTIGENIUS_SOLVER", "auto")).lower()
+    if backend == "auto":
+        backend = available_backends()[0]
+    elif backend not in BACKENDS:
+        raise ValueError(f"Unknown solver backend {backend!r}, expected auto or one of {', '.join(BACKENDS)}")
+    return {
+        "backend": backend,
+        "threads": threads if threads is not None else _env_number("OPTIGENIUS_SOLVER_THREADS", int),
+        "time_limit": time_limit if time_limit is not None else (
+            _env_number("OPTIGENIUS_SOLVER_TIME_LIMIT", float) or default_time_limit()),
+        "gap": gap if gap is not None else _env_number("OPTIGENIUS_SOLVER_GAP", float),
+    }
+
+
+def get_solver(backend=None, threads=None, time_limit=None, gap=None, msg=False, warm_start=False):
+    """PuLP solver object for the backend and limits (arguments override the environment)."""
+    options = solver_options(backend, threads, time_limit, gap)
+    limits = {"msg": msg, "timeLimit": options["time_limit"], "gapRel": options["gap"],
+              "threads": options["threads"]}
+    if options["backend"] == "gurobi":
+        return pulp.GUROBI(warmStart=warm_start, **limits)
+    if options["backend"] == "highs":
+        if pulp.HiGHS(msg=False).available():
+            return pulp.HiGHS(**limits)
+        return pulp.HiGHS_CMD(**limits)
+    return pulp.PULP_CBC_CMD(warmStart=warm_start, **limits)
+
+
+def solve(prob, backend=None, threads=None, time_limit=None, gap=None, msg=False, warm_start=False,
+          verbose=True):
+    """Solve prob and report whether it holds a usable solution, including an incumbent cut off by the limit.
+
+    Returns a dict with status, objective (None without a solution), has_solution, proven_optimal,
+    backend and seconds.
+    """
+    solver = get_solver(backend, threads, time_limit, gap, msg, warm_start)
+    start = time.perf_counter()
+    prob.solve(solver)
+    seconds = time.perf_counter() - start
+
+    # sol_status tells an optimal solution from an incumbent found before the time limit.
+    has_solution = prob.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible)
+    proven_optimal = prob.sol_status == pulp.LpSolutionOptimal
+    if proven_optimal:
+        status = "Optimal"
+    elif has_solution:
+        status = "Feasible (limit reached, best solution found)"
+    else:
+        status = pulp.LpStatus[prob.status]
+    result = {
+        "status": status,
+        "objective": pulp.value(prob.objective) if has_solution else None,
+        "has_solution": has_solution,
+        "proven_optimal": proven_optimal,
+        "backend": solver.name,
+        "seconds": seconds,
+    }
+    if verbose:
+        objective = f"{result['objective']:g}" if has_solution else "n/a"
+        print(f"Solver {solver.name}: status {status}, objective value {objective}, {seconds:.2f} s")
+    return result
@@ -0,0 +1,82 @@
+"""Vectorized sparse assembly of transportation / matching LPs.
+
+The constraint matrix is built directly from the NumPy cost, demand and supply arrays in CSR form and solved
+with HiGHS through ``scipy.optimize.linprog``, without creating a Python object per variable. This keeps
+instances with thousands of customers and hundreds of warehouses (10^5 - 10^6 variables) tractable.
+
+Variables are the flattened ``cost`` matrix in row-major order: ``x[i * n_sources + j]`` is the flow from
+source ``j`` to sink ``i``. With an ``unmet_penalty`` one unmet-demand variable per sink follows them, charged
+that much per unit, so a shortage of supply leaves demand unmet instead of making the LP infeasible.
+"""
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import linprog
+
+LINPROG_STATUS = {
+    0: "Optimal",
+    1: "Not Solved",  # iteration or time limit reached
+    2: "Infeasible",
+    3: "Unbounded",
+    4: "Not Solved",  # numerical difficulties
+}
+
+
+def build_transport_matrices(cost, demand, supply, unmet_penalty=None):
+    """Return (c, A_ub, b_ub) for: min c.x  s.t.  sum_j x_ij >= demand_i,  sum_i x_ij <= supply_j,  x >= 0.
+
+    With unmet_penalty, demand rows become sum_j x_ij + u_i >= demand_i and c gains unmet_penalty per u_i.
+    """
+    cost = np.asarray(cost, dtype=float)
+    demand = np.asarray(demand, dtype=float)
+    supply = np.asarray(supply, dtype=float)
+    n_sinks, n_sources = cost.shape
+    n_vars = n_sinks * n_sources
+    n_unmet = n_sinks if unmet_penalty is not None else 0
+    columns = np.arange(n_vars)
+
+    # Demand rows are written as -sum_j x_ij <= -demand_i so both blocks share one A_ub.
+    demand_rows = np.repeat(np.arange(n_sinks), n_sources)
+    supply_rows = n_sinks + np.tile(np.arange(n_sources), n_sinks)
+    unmet_rows = np.arange(n_unmet)
+
+    rows = np.concatenate([demand_rows, supply_rows, unmet_rows])
+    cols = np.concatenate([columns, columns, n_vars + unmet_rows])
+    data = np.concatenate([-np.ones(n_vars), np.ones(n_vars), -np.ones(n_unmet)])
+
+    a_ub = sp.coo_matrix((data, (rows, cols)), shape=(n_sinks + n_sources, n_vars + n_unmet)).tocsr()
+    b_ub = np.concatenate([-demand, supply])
+    c = np.concatenate([cost.ravel(), np.full(n_unmet, float(unmet_penalty or 0.0))])
+    return c, a_ub, b_ub
+
+
+def solve_transport(cost, demand, supply, time_limit=None, unmet_penalty=None):
+    cost = np.asarray(cost, dtype=float)
+    n_sinks, n_sources = cost.shape
+    n_vars = n_sinks * n_sources
+
+    start = time.perf_counter()
+    c, a_ub, b_ub = build_transport_matrices(cost, demand, supply, unmet_penalty)
+    build_seconds = time.perf_counter() - start
+
+    options = {"time_limit": time_limit} if time_limit else {}
+    start = time.perf_counter()
+    res = linprog(c, A_ub=a_ub, b_ub=b_ub, bounds=(0, None), method="highs", options=options)
+    solve_seconds = time.perf_counter() - start
+
+    optimal = res.status == 0
+    duals = res.ineqlin.marginals if optimal else None
+    return {
+        "status": LINPROG_STATUS.get(res.status, "Undefined"),
+        "objective": float(res.fun) if optimal else None,
+        "flow": res.x[:n_vars].reshape(n_sinks, n_sources) if optimal else np.zeros((n_sinks, n_sources)),
+        # Unmet units per sink; the objective includes their penalty.
+        "unmet": res.x[n_vars:] if optimal and unmet_penalty is not None else np.zeros(n_sinks),
+        # Shadow prices of demand (>=) and supply (<=) rows in the original orientation.
+        "demand_duals": -duals[:n_sinks] if optimal else None,
+        "supply_duals": duals[n_sinks:] if optimal else None,
+        "build_seconds": build_seconds,
+        "solve_seconds": solve_seconds,
+        "message": res.message,
+    }
@@ -1,14 +1,18 @@
+import html
+import os
+import sys
+import numpy as np
 import streamlit as st
 import pandas as pd
 from streamlit_ace import st_ace
-from utils import generate_optimization, explain_solution, solve_optimization_problem, generate_pulp_code_for_problem
-from supply_chain_scenarios.custom_order_fullfilment import generate_customer_order_fulfillment_predictions
-from supply_chain_scenarios.demand_supply_matching import generate_demand_supply_matching_predictions
-from supply_chain_scenarios.supplier_risk_management import generate_supplier_risk_predictions
-from supply_chain_scenarios.demand_forecasting import generate_demand_forecasting_predictions
-from supply_chain_scenarios.inventory_optimization import generate_inventory_optimization_predictions
-from supply_chain_scenarios.transportation_optimization import generate_transportation_optimization_predictions
-from langgraph_crew import execute_code
+from supply_chain_scenarios import GENERATORS
+from supply_chain_scenarios.cache import cached_predictions, scenario_cache_stats
+
+# Everything that pulls in LangChain, PuLP or pyarrow is imported by the callback or fragment that needs it,
+# so a cold start only loads Streamlit, pandas and the scenario generators.
+
+# st.dataframe sends the whole table to the browser on every run, larger tables are shown a page at a time.
+TABLE_PAGE_ROWS = int(os.environ.get("OPTIGENIUS_TABLE_PAGE_ROWS", 1000))
 
 
 def get_dummy_predictions(scenario):
@@ -18,18 +22,9 @@ def get_dummy_predictions(scenario):
         data_in_format = {}
 
         with st.spinner('Predictions are being fetched...'):
-            if scenario == "Customer Order Fulfillment":
-                problem, objective, constraint, data_in_format = generate_customer_order_fulfillment_predictions()
-            elif scenario == "Demand-Supply Matching":
-                problem, objective, constraint, data_in_format = generate_demand_supply_matching_predictions()
-            elif scenario == "Supplier Risk Assessment":
-                problem, objective, constraint, data_in_format = generate_supplier_risk_predictions()
-            elif scenario == "Demand Forecasting":
-                problem, objective, constraint, data_in_format = generate_demand_forecasting_predictions()
-            elif scenario == "Inventory Optimization":
-                problem, objective, constraint, data_in_format = generate_inventory_optimization_predictions()
-            elif scenario == "Transportation Optimization":
-                problem, objective, constraint, data_in_format = generate_transportation_optimization_predictions()
+            # Shared by all sessions: the same seeded data is generated once per process.
+            if scenario in GENERATORS:
+                problem, objective, constraint, data_in_format = cached_predictions(scenario)
 
         # Store the predictions in session state to avoid refetching on button press
         st.session_state["predicted_data"] = {
@@ -44,6 +39,212 @@ def get_dummy_predictions(scenario):
         st.session_state["predicted_data"]["constraint"], st.session_state["predicted_data"]["data_in_format"]
 
 
+def stream_llm_optimization(scenario, problem_statement, objective, constraints, data_in_format, use_cache):
+    # Report and code are requested concurrently on the shared event loop, whichever finishes first is shown
+    # right away. Results are consumed here so Streamlit elements are created from the script thread.
+    # utils (LangChain, the LLM client) is only imported once the first optimization runs, not on every cold start.
+    from async_runtime import iterate
+    from csv_ingest import describe_tables
+    from data_files import use_reference
+    from utils import optimize_concurrently
+
+    st.session_state["optimize_errors"] = {}
+    # Tables too large for the prompt reach the code as files and the report as schema plus statistics.
+    report_data = describe_tables(data_in_format) if data_in_format and use_reference(data_in_format) else None
+    for name, value, error in iterate(optimize_concurrently(scenario, problem_statement, objective, constraints,
+                                                            data_in_format, use_cache=use_cache,
+                                                            report_data=report_data)):
+        if error is not None:
+            st.session_state[name] = ""
+            st.session_state["optimize_errors"][name] = str(error)
+            st.error(f"Generating the {name} failed: {error}")
+            continue
+
+        st.session_state[name] = value
+        st.success(f"The {name} is ready.")
+        if name == "report":
+            st.html(value)
+        else:
+            st.code(value, language="python")
+
+
+def show_table(df, key):
+    if len(df) <= TABLE_PAGE_ROWS:
+        st.dataframe(df)
+        return
+    pages = -(-len(df) // TABLE_PAGE_ROWS)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=key)
+    first = (page - 1) * TABLE_PAGE_ROWS
+    st.caption(f"Rows {first + 1} to {min(first + TABLE_PAGE_ROWS, len(df))} of {len(df)}")
+    st.dataframe(df.iloc[first:first + TABLE_PAGE_ROWS])
+
+
+@st.fragment
+def data_viewer(scenario, data_in_format):
+    # Display the data (for both predefined and custom scenarios)
+    with st.expander("Click here to view the data"):
+        if data_in_format:
+            for name, df in data_in_format.items():
+                st.subheader(f"{name}")
+                show_table(df, key=f"page:{scenario}:{name}")
+        else:
+            st.write("No data available. Please select a scenario or upload data.")
+
+
+@st.fragment
+def optimize_controls(scenario, data_in_format, problem_statement, objective, constraints, use_llm_cache):
+    st.subheader("Optimization Problem")
+    problem_statement_area = st.text_area("Problem Statement", problem_statement, height=200)
+    objective_area = st.text_area("Objective", objective, height=200)
+    constraint_area = st.text_area("Constraint", constraints, height=200)
+    # The sensitivity panel solves with the constraints as edited here.
+    st.session_state["constraint_area"] = constraint_area
+
+    # Add spinner on optimization
+    if st.button("Optimize"):
+        from incremental import same_structure, solve_native, remember_generated_code, rerun_generated_code
+        from native_models import has_native_model, format_result, result_to_html, model_source
+        from tracing import trace_run
+        from utils import explain_solution
+
+        st.session_state["optimize_notice"] = ""
+        # Progress and streamed previews go in a placeholder that is cleared once the panels below have the results.
+        progress = st.empty()
+        with progress.container(), st.spinner("Calculating... Please wait..."), \
+                trace_run(f"streamlit:{scenario}") as tracer:
+            # Built-in scenarios whose problem definition changed at most in its numbers are solved natively,
+            # reusing the session's last model when the data only changed in its numbers. The LLM only narrates.
+            texts = (problem_statement_area, objective_area, constraint_area)
+            if has_native_model(scenario) and data_in_format and \
+                    same_structure(texts, (problem_statement, objective, constraints)):
+                result = solve_native(st.session_state, scenario, data_in_format, constraint_area)
+                narration = explain_solution(
+                    f"{problem_statement_area}\nObjective: {objective_area}\nConstraints: {constraint_area}",
+                    format_result(result),
+                    use_cache=use_llm_cache
+                )
+                st.session_state["report"] = result_to_html(result, narration)
+                st.session_state["code"] = model_source(scenario)
+                st.session_state["optimize_errors"] = {}
+            elif (rerun := rerun_generated_code(st.session_state, scenario, texts, data_in_format)) is not None:
+                # Same problem and data layout as the last generated code, only the numbers changed: run it again.
+                st.session_state["optimize_notice"] = \
+                    "Re-ran the previous generated program on updated data, summarising its results."
+                code, output = rerun
+                narration = explain_solution(
+                    f"{problem_statement_area}\nObjective: {objective_area}\nConstraints: {constraint_area}",
+                    output,
+                    use_cache=use_llm_cache
+                )
+                st.session_state["report"] = (
+                    "<p><em>Re-ran the previously generated program (see the code panel) on the updated data."
+                    "</em></p>"
+                    f"<h3>Optimization Results</h3><pre>{html.escape(output)}</pre>"
+                    f"<div style='white-space: pre-wrap; margin-top: 1em;'>{narration}</div>"
+                )
+                st.session_state["code"] = code
+                st.session_state["optimize_errors"] = {}
+            else:
+                stream_llm_optimization(scenario, problem_statement_area, objective_area, constraint_area,
+                                        data_in_format, use_llm_cache)
+                remember_generated_code(st.session_state, scenario, texts, data_in_format,
+                                        st.session_state.get("code", ""))
+        st.session_state["trace"] = {"summary": tracer.summary(), "records": tracer.records}
+        progress.empty()
+
+    if st.session_state.get("optimize_notice"):
+        st.info(st.session_state["optimize_notice"])
+    for name, error in st.session_state.get("optimize_errors", {}).items():
+        st.error(f"Generating the {name} failed: {error}")
+
+    # The result panels are nested fragments drawn after the click is handled, so an Optimize redraws them without
+    # rerunning the app; their own widgets rerun only themselves.
+    code_editor()
+    report_panel()
+    trace_panel()
+
+
+@st.fragment
+def code_editor():
+    # Code display expander
+    with st.expander("Click Here To View Code"):
+        code = st.session_state.get("code", "")
+        code = st_ace(value=code, language="python", theme="monokai", height=500)
+
+
+@st.fragment
+def report_panel():
+    # Report display expander
+    with st.expander("Click Here To View Optimization Report"):
+        report = st.session_state.get("report", "")
+        # The report is empty before the first Optimize and after a failed report call, and st.html rejects
+        # an empty body.
+        if report:
+            st.html(report)
+        else:
+            st.write("Run Optimize to generate a report.")
+
+
+@st.fragment
+def trace_panel():
+    # Latency, token and cost breakdown of the last Optimize run
+    with st.expander("Pipeline trace"):
+        trace = st.session_state.get("trace")
+        if trace:
+            summary = trace["summary"]
+            st.caption(f"Run {summary['trace_id']}: {summary['wall_seconds']:.2f} s, "
+                       f"{summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion tokens, "
+                       f"~${summary['cost_usd']:.4f}, {summary['llm_queue_seconds']:.2f} s queued for the LLM quota")
+            columns = ["kind", "name", "node", "start_seconds", "queue_seconds", "wall_seconds", "prompt_tokens",
+                       "completion_tokens", "cost_usd", "status"]
+            st.dataframe(pd.DataFrame(trace["records"]).reindex(columns=columns).sort_values("start_seconds"),
+                         hide_index=True)
+        else:
+            st.write("Run Optimize to record a trace.")
+
+
+@st.fragment
+def sensitivity_panel(scenario, data_in_format):
+    from native_models import has_native_model
+    from sensitivity import grid_variants, random_variants, run_sweep, objective_table, constraint_table
+
+    # What-if sweep: scale the numbers of some tables and solve every variant in parallel
+    if not has_native_model(scenario) or not data_in_format:
+        return
+    with st.expander("Sensitivity analysis"):
+        sweep_tables = st.multiselect("Tables to vary", list(data_in_format), default=list(data_in_format)[:1])
+        sweep_mode = st.radio("Variants", ["Grid of scale factors", "Random sample"], horizontal=True)
+        if sweep_mode == "Grid of scale factors":
+            low, high = st.slider("Change (%)", -50, 50, (-20, 20), step=5)
+            steps = st.number_input("Steps per table", min_value=2, max_value=11, value=5)
+            variants = grid_variants({table: list(np.round(np.linspace(1 + low / 100, 1 + high / 100, steps), 4))
+                                      for table in sweep_tables})
+        else:
+            samples = st.number_input("Samples", min_value=2, max_value=500, value=20)
+            spread = st.slider("Spread (%)", 5, 50, 20, step=5)
+            variants = random_variants(sweep_tables, samples, spread=spread / 100)
+
+        if st.button("Run sweep", disabled=not sweep_tables):
+            with st.spinner(f"Solving {len(variants)} variants..."):
+                st.session_state["sweep"] = {"scenario": scenario,
+                                             "results": run_sweep(scenario, data_in_format, variants,
+                                                                  st.session_state.get("constraint_area", ""))}
+
+        if st.session_state.get("sweep", {}).get("scenario") == scenario:
+            sweep = st.session_state["sweep"]["results"]
+            objectives = objective_table(sweep)
+            factor_columns = [column for column in objectives.columns if column.startswith("scale: ")]
+            if len(factor_columns) == 1:
+                # Chart field names can not contain ":", the table name stays in the table below.
+                st.line_chart(objectives.rename(columns={factor_columns[0]: "scale factor"}),
+                              x="scale factor", y="objective")
+            else:
+                st.bar_chart(objectives, x="variant", y="objective")
+            st.dataframe(objectives, hide_index=True)
+            st.subheader("Binding constraints and shadow prices")
+            st.dataframe(constraint_table(sweep).sort_values("binding_share", ascending=False), hide_index=True)
+
+
 # Set up the layout
 st.set_page_config(layout="wide")
 
@@ -59,6 +260,19 @@ with st.sidebar:
         key="scenario"
     )
 
+    use_llm_cache = st.checkbox("Reuse cached LLM responses", value=True, key="use_llm_cache")
+    # The LLM modules load with the first Optimize; until then there is nothing to report and no reason to import.
+    stats = sys.modules["llm_cache"].cache_stats() if "llm_cache" in sys.modules else {}
+    if stats:
+        st.caption(f"LLM cache: {stats['hits']} hits / {stats['misses']} misses, {stats['entries']} entries")
+    if "llm_scheduler" in sys.modules:
+        queue = sys.modules["llm_scheduler"].scheduler_stats()
+        st.caption(f"LLM queue: {queue['queue_depth']} waiting ({queue['queue_depth_batch']} batch), "
+                   f"wait p95 {queue['wait_p95_seconds']:.1f} s, max {queue['wait_max_seconds']:.1f} s")
+    scenario_stats = scenario_cache_stats()
+    st.caption(f"Scenario data cache: {scenario_stats['hits']} hits / {scenario_stats['misses']} misses, "
+               f"{scenario_stats['bytes'] / 1024 / 1024:.1f} of {scenario_stats['max_bytes'] / 1024 / 1024:.0f} MB")
+
 st.markdown(
     "<h2 style='text-align: center;'>Opti<span style='color: orange;'>Genius</span></h2>",
     unsafe_allow_html=True
@@ -90,10 +304,19 @@ else:
         uploaded_files = st.file_uploader("Upload CSV files", accept_multiple_files=True, type=["csv"])
 
         if uploaded_files:
+            from csv_ingest import ingest_csv
+
+            # Files already ingested in this session are reused on reruns, new ones go through the upload cache.
+            ingested = st.session_state.get("custom_uploads", {})
+            current = {}
             st.session_state["custom_data_in_format"] = {}
-            for uploaded_file in uploaded_files:
-                df = pd.read_csv(uploaded_file)
-                st.session_state["custom_data_in_format"][uploaded_file.name] = df
+            with st.spinner("Reading uploaded files..."):
+                for uploaded_file in uploaded_files:
+                    key = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+                    df = ingested[key] if key in ingested else ingest_csv(uploaded_file)
+                    current[key] = df
+                    st.session_state["custom_data_in_format"][uploaded_file.name] = df
+            st.session_state["custom_uploads"] = current
 
             st.success("CSV files uploaded successfully.")
 
@@ -111,42 +334,13 @@ else:
         # Set data_in_format for predefined scenarios
         data_in_format = st.session_state.get("data_in_format", {})
 
-    # Display the data (for both predefined and custom scenarios)
-    with st.expander("Click here to view the data"):
-        if data_in_format:
-            for name, df in data_in_format.items():
-                st.subheader(f"{name}")
-                st.dataframe(df)
-        else:
-            st.write("No data available. Please select a scenario or upload data.")
+    # Each panel is a fragment: its widgets rerun only the panel, not the whole script.
+    data_viewer(scenario, data_in_format)
 
     # Retrieve problem, objective, and constraint from session state or leave empty for custom scenario
     problem_statement = st.session_state.get("problem_statement", "") if scenario != "Custom Scenario" else ""
     objective = st.session_state.get("objective", "") if scenario != "Custom Scenario" else ""
     constraints = st.session_state.get("constraints", "") if scenario != "Custom Scenario" else ""
 
-    st.subheader("Optimization Problem")
-    problem_statement_area = st.text_area("Problem Statement", problem_statement, height=200)
-    objective_area = st.text_area("Objective", objective, height=200)
-    constraint_area = st.text_area("Constraint", constraints, height=200)
-
-    # Add spinner on optimization
-    if st.button("Optimize"):
-        with st.spinner("Calculating... Please wait..."):
-            report = solve_optimization_problem(problem_statement_area, objective_area, constraint_area, data_in_format)
-            code = generate_pulp_code_for_problem(scenario, problem_statement_area, objective_area, constraint_area,
-                                                  data_in_format)
-
-            st.session_state["report"] = report
-            st.session_state["code"] = code
-            st.rerun()
-
-    # Code display expander
-    with st.expander("Click Here To View Code"):
-        code = st.session_state.get("code", "")
-        code = st_ace(value=code, language="python", theme="monokai", height=500)
-
-    # Report display expander
-    with st.expander("Click Here To View Optimization Report"):
-        report = st.session_state.get("report", "")
-        st.html(report)
+    optimize_controls(scenario, data_in_format, problem_statement, objective, constraints, use_llm_cache)
+    sensitivity_panel(scenario, data_in_format)
@@ -0,0 +1,16 @@
+from supply_chain_scenarios.custom_order_fullfilment import generate_customer_order_fulfillment_predictions
+from supply_chain_scenarios.demand_supply_matching import generate_demand_supply_matching_predictions
+from supply_chain_scenarios.supplier_risk_management import generate_supplier_risk_predictions
+from supply_chain_scenarios.demand_forecasting import generate_demand_forecasting_predictions
+from supply_chain_scenarios.inventory_optimization import generate_inventory_optimization_predictions
+from supply_chain_scenarios.transportation_optimization import generate_transportation_optimization_predictions
+
+# Scenario name (as shown in the app) -> generator returning problem, objective, constraints, data_in_format
+GENERATORS = {
+    "Customer Order Fulfillment": generate_customer_order_fulfillment_predictions,
+    "Demand-Supply Matching": generate_demand_supply_matching_predictions,
+    "Supplier Risk Assessment": generate_supplier_risk_predictions,
+    "Demand Forecasting": generate_demand_forecasting_predictions,
+    "Inventory Optimization": generate_inventory_optimization_predictions,
+    "Transportation Optimization": generate_transportation_optimization_predictions,
+}
@@ -0,0 +1,123 @@
+"""Process-wide cache of scenario generator outputs shared by all sessions.
+
+Results are keyed by scenario, seed and size parameters and kept in an LRU bounded by the memory the
+DataFrames use (OPTIGENIUS_SCENARIO_CACHE_MB, default 256). Cached frames are backed by read-only arrays,
+so one session can not change the data another session sees; copy a frame before modifying it.
+Concurrent requests for the same key wait for a single generation instead of generating it twice.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from supply_chain_scenarios import GENERATORS
+
+DEFAULT_MAX_MB = 256
+DEFAULT_SEED = 42
+
+
+def freeze_frame(df):
+    columns = {}
+    for position in range(df.shape[1]):
+        values = df.iloc[:, position].to_numpy(copy=True)
+        values.flags.writeable = False
+        columns[position] = values
+    frozen = pd.DataFrame(columns, index=df.index.copy(), copy=False)
+    frozen.columns = df.columns
+    return frozen
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class ScenarioCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (result, size)
+        self._building = {}  # key -> lock held while that key is generated
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "uncacheable": 0}
+
+    @staticmethod
+    def key(scenario, seed, params):
+        return scenario, seed, tuple(sorted(params.items()))
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[0]
+            return None
+
+    def get(self, scenario, seed=DEFAULT_SEED, **params):
+        key = self.key(scenario, seed, params)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+        try:
+            with build_lock:
+                result = self._lookup(key)
+                if result is not None:
+                    return result
+                problem, objective, constraints, data_in_format = GENERATORS[scenario](seed=seed, **params)
+                data_in_format = {name: freeze_frame(df) for name, df in data_in_format.items()}
+                result = problem, objective, constraints, data_in_format
+                self._store(key, result, sum(frame_bytes(df) for df in data_in_format.values()))
+                return result
+        finally:
+            with self._lock:
+                self._building.pop(key, None)
+
+    def _store(self, key, result, size):
+        with self._lock:
+            self.counters["misses"] += 1
+            if size > self.max_bytes:
+                self.counters["uncacheable"] += 1
+                return
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return dict(self.counters, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes,
+                        hit_rate=self.counters["hits"] / lookups if lookups else 0.0)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_scenario_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            max_mb = float(os.environ.get("OPTIGENIUS_SCENARIO_CACHE_MB", DEFAULT_MAX_MB))
+            _cache = ScenarioCache(int(max_mb * 1024 * 1024))
+    return _cache
+
+
+def cached_predictions(scenario, seed=DEFAULT_SEED, **params):
+    """Generator output (problem, objective, constraints, data_in_format) shared across sessions."""
+    return get_scenario_cache().get(scenario, seed=seed, **params)
+
+
+def scenario_cache_stats():
+    return get_scenario_cache().stats()
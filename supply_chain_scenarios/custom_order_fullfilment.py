@@ -1,26 +1,23 @@
 import pandas as pd
 import numpy as np
-from faker import Faker
-
-# Initialize the Faker library
-fake = Faker()
+from supply_chain_scenarios.names import unique_names
 
 
 def generate_customer_order_fulfillment_predictions(num_customers=2, num_warehouses=3, seed=42):
-    np.random.seed(seed)
+    rng = np.random.RandomState(seed)
 
     # Generate random customer names using Faker and add "Customer_" prefix
-    customer_names = [f"Customer_{fake.first_name()}" for _ in range(num_customers)]
+    customer_names = unique_names("Customer_", "first_name", num_customers, seed, salt=1)
 
     # Generate random customer demands (in units)
-    customer_demand = np.random.randint(50, 150, size=num_customers)
+    customer_demand = rng.randint(50, 150, size=num_customers)
 
     # Generate random warehouse supplies (in units)
-    warehouse_ids = [f"Warehouse_{fake.city()}" for j in range(num_warehouses)]
-    warehouse_supply = np.random.randint(100, 300, size=num_warehouses)
+    warehouse_ids = unique_names("Warehouse_", "city", num_warehouses, seed, salt=2)
+    warehouse_supply = rng.randint(100, 300, size=num_warehouses)
 
     # Generate random shipping costs (in USD) from each warehouse to each customer
-    shipping_costs = np.random.randint(1, 10, size=(num_customers, num_warehouses))
+    shipping_costs = rng.randint(1, 10, size=(num_customers, num_warehouses))
 
     # Problem Statement, Objective, and Constraints
     problem_statement = (
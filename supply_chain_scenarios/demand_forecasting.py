@@ -1,28 +1,25 @@
 import pandas as pd
 import numpy as np
-from faker import Faker
-
-# Initialize the Faker library
-fake = Faker()
+from supply_chain_scenarios.names import unique_names
 
 
 def generate_demand_forecasting_predictions(num_products=5, num_months=12, seed=42):
-    np.random.seed(seed)
+    rng = np.random.RandomState(seed)
 
     # Generate random product names using Faker and add "Product_" prefix
-    product_names = [f"Product_{fake.word()}" for _ in range(num_products)]
+    product_names = unique_names("Product_", "word", num_products, seed, salt=1)
 
     # Generate historical sales data (in units) for each product over the past year
-    historical_sales = np.random.randint(1000, 5000, size=(num_products, 12))
+    historical_sales = rng.randint(1000, 5000, size=(num_products, 12))
 
     # Generate random forecasted demand (in units) for the next 12 months
-    forecasted_demand = historical_sales.mean(axis=1) + np.random.randint(-500, 500, size=num_products)
+    forecasted_demand = historical_sales.mean(axis=1) + rng.randint(-500, 500, size=num_products)
 
     # Generate seasonal factors (e.g., seasonal peaks or troughs)
-    seasonal_factors = np.sin(np.linspace(0, 2 * np.pi, num_months)) + np.random.normal(0, 0.1, size=num_months)
+    seasonal_factors = np.sin(np.linspace(0, 2 * np.pi, num_months)) + rng.normal(0, 0.1, size=num_months)
 
     # Adjust forecasted demand based on seasonal factors
-    forecasted_demand_matrix = np.outer(forecasted_demand, seasonal_factors) + np.random.randint(-200, 200, size=(
+    forecasted_demand_matrix = np.outer(forecasted_demand, seasonal_factors) + rng.randint(-200, 200, size=(
     num_products, num_months))
 
     # Problem Statement, Objective, and Constraints
@@ -1,28 +1,25 @@
 import pandas as pd
 import numpy as np
-from faker import Faker
-
-# Initialize the Faker library
-fake = Faker()
+from supply_chain_scenarios.names import unique_names
 
 
 def generate_demand_supply_matching_predictions(num_stores=3, num_plants=3, seed=42):
-    np.random.seed(seed)
+    rng = np.random.RandomState(seed)
 
     # Generate random store names using Faker and add "Store_" prefix
-    store_names = [f"Store_{fake.city()}" for _ in range(num_stores)]
+    store_names = unique_names("Store_", "city", num_stores, seed, salt=1)
 
     # Generate random plant names with "Plant_" prefix
-    plant_names = [f"Plant_{fake.city()}" for _ in range(num_plants)]
+    plant_names = unique_names("Plant_", "city", num_plants, seed, salt=2)
 
     # Generate random demand for stores (in units)
-    store_demand = np.random.randint(100, 500, size=num_stores)
+    store_demand = rng.randint(100, 500, size=num_stores)
 
     # Generate random supply from plants (in units)
-    plant_supply = np.random.randint(200, 600, size=num_plants)
+    plant_supply = rng.randint(200, 600, size=num_plants)
 
     # Generate random distribution costs (in USD) from each plant to each store
-    distribution_costs = np.random.randint(5, 20, size=(num_stores, num_plants))
+    distribution_costs = rng.randint(5, 20, size=(num_stores, num_plants))
 
     # Problem Statement, Objective, and Constraints
     problem_statement = (
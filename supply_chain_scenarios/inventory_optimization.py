@@ -1,23 +1,20 @@
 import pandas as pd
 import numpy as np
-from faker import Faker
-
-fake = Faker()
 
 
 def generate_inventory_optimization_predictions(num_products=5, num_warehouses=3, seed=42):
-    np.random.seed(seed)
+    rng = np.random.RandomState(seed)
 
     # Generate random product names and warehouse names
     product_names = [f"Product_{i+1}" for i in range(num_products)]
     warehouse_names = [f"Warehouse_{j + 1}" for j in range(num_warehouses)]
 
     # Generate random holding costs and capacities
-    holding_costs = np.random.uniform(1, 10, size=num_products)
-    capacities = np.random.randint(500, 2000, size=num_warehouses)
+    holding_costs = rng.uniform(1, 10, size=num_products)
+    capacities = rng.randint(500, 2000, size=num_warehouses)
 
     # Generate random demand forecast for each product at each warehouse
-    demand_forecast = np.random.randint(50, 200, size=(num_products, num_warehouses))
+    demand_forecast = rng.randint(50, 200, size=(num_products, num_warehouses))
 
     # Problem Statement, Objective, and Constraints
     problem_statement = (
@@ -0,0 +1,59 @@
+"""Label pools shared by the scenario generators.
+
+Generators run concurrently for different sessions, so none of them touches global random state: every call
+draws from its own np.random.RandomState(seed), and labels come from unique_names() with its own generator.
+The same seed therefore gives the same data in any session, whatever else is running.
+"""
+import threading
+
+import numpy as np
+from faker import Faker
+
+# Distinct Faker values drawn once per kind; generators sample from these pools instead of calling Faker
+# once per row.
+POOL_SIZE = 1000
+NAME_KINDS = {
+    "first_name": lambda fake: fake.first_name(),
+    "city": lambda fake: fake.city(),
+    "company": lambda fake: fake.company(),
+    "word": lambda fake: fake.word(),
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def name_pool(kind):
+    with _pools_lock:
+        if kind not in _pools:
+            # A private, seeded Faker keeps the pool identical across processes and sessions.
+            fake = Faker()
+            fake.seed_instance(0)
+            values = []
+            seen = set()
+            attempts = 0
+            while len(values) < POOL_SIZE and attempts < POOL_SIZE * 3:
+                value = NAME_KINDS[kind](fake)
+                attempts += 1
+                if value not in seen:
+                    seen.add(value)
+                    values.append(value)
+            _pools[kind] = np.array(values)
+        return _pools[kind]
+
+
+def unique_names(prefix, kind, count, seed, salt=0):
+    """Return `count` distinct labels like "Store_Lake Davidshire" for a seed, without touching global RNG state.
+
+    Past the pool size names repeat with a numeric suffix ("Store_Lake Davidshire 2") so labels stay unique.
+    """
+    pool = name_pool(kind)
+    rng = np.random.default_rng([seed, salt])
+    order = rng.permutation(len(pool))
+    index = np.arange(count)
+    names = np.char.add(prefix, pool[order[index % len(pool)]])
+    if count > len(pool):
+        repeats = index // len(pool)
+        suffixes = np.where(repeats > 0, np.char.add(" ", (repeats + 1).astype(str)), "")
+        names = np.char.add(names, suffixes)
+    return names.tolist()
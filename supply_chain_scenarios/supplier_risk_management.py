@@ -1,25 +1,22 @@
 import pandas as pd
 import numpy as np
-from faker import Faker
-
-# Initialize the Faker library
-fake = Faker()
+from supply_chain_scenarios.names import unique_names
 
 
 def generate_supplier_risk_predictions(num_suppliers=5, demand=1000, risk_threshold=0.2, seed=42):
-    np.random.seed(seed)
+    rng = np.random.RandomState(seed)
 
     # Generate random supplier names using Faker and add "Supplier_" prefix
-    supplier_names = [f"Supplier_{fake.company()}" for _ in range(num_suppliers)]
+    supplier_names = unique_names("Supplier_", "company", num_suppliers, seed, salt=1)
 
     # Generate random supply capacity (in units) for each supplier
-    supplier_capacity = np.random.randint(200, 500, size=num_suppliers)
+    supplier_capacity = rng.randint(200, 500, size=num_suppliers)
 
     # Generate random procurement cost (in USD) per unit for each supplier
-    procurement_costs = np.random.randint(50, 150, size=num_suppliers)
+    procurement_costs = rng.randint(50, 150, size=num_suppliers)
 
     # Generate random risk scores (between 0 and 1) for each supplier
-    supplier_risk = np.random.rand(num_suppliers)
+    supplier_risk = rng.rand(num_suppliers)
 
     # Problem Statement, Objective, and Constraints
     problem_statement = (
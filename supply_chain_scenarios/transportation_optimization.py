@@ -1,23 +1,21 @@
 import pandas as pd
 import numpy as np
-from faker import Faker
-
-fake = Faker()
+from supply_chain_scenarios.names import unique_names
 
 
 def generate_transportation_optimization_predictions(num_customers=5, num_warehouses=3, seed=42):
-    np.random.seed(seed)
+    rng = np.random.RandomState(seed)
 
     # Generate random customer names and warehouse names
-    customer_names = [f"Customer_{fake.first_name()}" for _ in range(num_customers)]
-    warehouse_names = [f"Warehouse_{fake.city()}" for j in range(num_warehouses)]
+    customer_names = unique_names("Customer_", "first_name", num_customers, seed, salt=1)
+    warehouse_names = unique_names("Warehouse_", "city", num_warehouses, seed, salt=2)
 
     # Generate random shipping costs and capacities
-    shipping_costs = np.random.uniform(1, 10, size=(num_customers, num_warehouses))
-    capacities = np.random.randint(200, 1000, size=num_warehouses)
+    shipping_costs = rng.uniform(1, 10, size=(num_customers, num_warehouses))
+    capacities = rng.randint(200, 1000, size=num_warehouses)
 
     # Generate random demand for each customer
-    customer_demand = np.random.randint(100, 500, size=num_customers)
+    customer_demand = rng.randint(100, 500, size=num_customers)
 
     # Problem Statement, Objective, and Constraints
     problem_statement = (
@@ -0,0 +1,353 @@
+"""Per-run latency, token and cost tracing for the LangGraph pipeline and utils.py LLM calls.
+
+Inside ``with trace_run("name") as tracer:`` every LangChain run picks up a PipelineTracer through
+LangChain's callback configure hook, so graph nodes, utils.py calls and the LLM calls they make are recorded
+without threading callbacks through each call. Each record holds wall time, queue time, prompt and
+completion tokens and an estimated cost. Finished traces are appended to a JSON lines file and aggregated
+into a Prometheus text file (see OPTIGENIUS_TRACE_DIR / OPTIGENIUS_TRACE_FORMAT).
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+DEFAULT_TRACE_DIR = os.path.join(".cache", "traces")
+# USD per 1K tokens (gpt-4o list price), override with OPTIGENIUS_PROMPT_PRICE / OPTIGENIUS_COMPLETION_PRICE.
+DEFAULT_PROMPT_PRICE_PER_1K = 0.0025
+DEFAULT_COMPLETION_PRICE_PER_1K = 0.01
+
+_active_tracer = ContextVar("optigenius_tracer", default=None)
+_hook_registered = False
+_hook_lock = threading.Lock()
+
+
+def _register_hook():
+    # LangChain attaches the active tracer to every run. Registered on the first trace, since importing
+    # langchain_core.tracers loads LangSmith, which the app does not need before it calls an LLM.
+    global _hook_registered
+    with _hook_lock:
+        if not _hook_registered:
+            from langchain_core.tracers.context import register_configure_hook
+            register_configure_hook(_active_tracer, inheritable=True)
+            _hook_registered = True
+
+
+def _price(name, default):
+    return float(os.environ.get(name, default))
+
+
+def estimate_cost(prompt_tokens, completion_tokens):
+    return (prompt_tokens * _price("OPTIGENIUS_PROMPT_PRICE", DEFAULT_PROMPT_PRICE_PER_1K)
+            + completion_tokens * _price("OPTIGENIUS_COMPLETION_PRICE", DEFAULT_COMPLETION_PRICE_PER_1K)) / 1000
+
+
+def _token_usage(response):
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            # LangChain replays a cache hit with its original usage and marks it with a zero total_cost; it cost
+            # nothing this time.
+            if usage and usage.get("total_cost") == 0:
+                continue
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if not prompt_tokens and not completion_tokens:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+    return prompt_tokens, completion_tokens
+
+
+class PipelineTracer(BaseCallbackHandler):
+    run_inline = True  # keep timestamps exact for async runs as well
+
+    def __init__(self, run_name):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.run_name = run_name
+        self.started_at = time.time()
+        self.records = []
+        self._start = time.perf_counter()
+        self._runs = {}
+        self._last_node_end = self._start
+        self._lock = threading.Lock()
+
+    def _offset(self, now):
+        return now - self._start
+
+    def _add(self, record):
+        record.setdefault("queue_seconds", 0.0)
+        record.setdefault("prompt_tokens", 0)
+        record.setdefault("completion_tokens", 0)
+        record["cost_usd"] = estimate_cost(record["prompt_tokens"], record["completion_tokens"])
+        record.update({"trace_id": self.trace_id, "run_name": self.run_name})
+        self.records.append(record)
+
+    def _enclosing_node(self, parent_run_id):
+        # Nearest ancestor run that is a graph node or conditional edge.
+        while parent_run_id is not None:
+            run = self._runs.get(parent_run_id)
+            if run is None:
+                return None
+            if run["kind"] in ("node", "edge"):
+                return run
+            parent_run_id = run["parent"]
+        return None
+
+    def _root(self, parent_run_id):
+        run = None
+        while parent_run_id is not None and parent_run_id in self._runs:
+            run = self._runs[parent_run_id]
+            parent_run_id = run["parent"]
+        return run
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None,
+                       **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "chain")
+        node = (metadata or {}).get("langgraph_node")
+        with self._lock:
+            parent = self._runs.get(parent_run_id)
+            if parent_run_id is None:
+                kind = "graph" if name == "LangGraph" else "call"
+            elif node is not None and name == node:
+                kind = "node"
+            elif parent is not None and parent["kind"] == "node" and not name.startswith(("Runnable", "ChannelWrite")):
+                # Conditional edges (e.g. code_reviewer) run as named children of the node before them.
+                kind = "edge"
+            else:
+                kind = "chain"
+            self._runs[run_id] = {"name": name, "kind": kind, "parent": parent_run_id,
+                                  "start": time.perf_counter(), "prompt_tokens": 0, "completion_tokens": 0}
+
+    def _end_chain(self, run_id, error=None):
+        now = time.perf_counter()
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None or run["kind"] == "chain":
+                return
+            record = {
+                "kind": run["kind"],
+                "name": run["name"],
+                "start_seconds": self._offset(run["start"]),
+                "wall_seconds": now - run["start"],
+                "prompt_tokens": run["prompt_tokens"],
+                "completion_tokens": run["completion_tokens"],
+                "status": "error" if error else "ok",
+            }
+            if run["kind"] == "node":
+                # Time between the previous node finishing and this one starting.
+                record["queue_seconds"] = max(0.0, run["start"] - self._last_node_end)
+                self._last_node_end = now
+            if error:
+                record["error"] = repr(error)
+            self._add(record)
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        self._end_chain(run_id)
+
+    def on_chain_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        self._end_chain(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None,
+                            **kwargs):
+        now = time.perf_counter()
+        with self._lock:
+            node = self._enclosing_node(parent_run_id)
+            root = self._root(parent_run_id)
+            parent = self._runs.get(parent_run_id)
+            self._runs[run_id] = {
+                "name": kwargs.get("name") or (serialized or {}).get("name", "llm"),
+                "kind": "llm",
+                "parent": parent_run_id,
+                "start": now,
+                "node": node["name"] if node else None,
+                "call": root["name"] if root else None,
+                # Prompt formatting and scheduling between the enclosing chain starting and the request.
+                "queue": now - parent["start"] if parent else 0.0,
+            }
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, metadata=None,
+                     **kwargs):
+        self.on_chat_model_start(serialized, [], run_id=run_id, parent_run_id=parent_run_id, tags=tags,
+                                 metadata=metadata, **kwargs)
+
+    def _end_llm(self, run_id, response=None, error=None):
+        now = time.perf_counter()
+        prompt_tokens, completion_tokens = _token_usage(response) if response is not None else (0, 0)
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return
+            # Roll tokens up into every enclosing node/call/graph record.
+            parent_id = run["parent"]
+            while parent_id is not None and parent_id in self._runs:
+                ancestor = self._runs[parent_id]
+                if ancestor["kind"] != "chain":
+                    ancestor["prompt_tokens"] += prompt_tokens
+                    ancestor["completion_tokens"] += completion_tokens
+                parent_id = ancestor["parent"]
+
+            record = {
+                "kind": "llm",
+                "name": run["name"],
+                "node": run["node"],
+                "call": run["call"],
+                "start_seconds": self._offset(run["start"]),
+                "wall_seconds": now - run["start"],
+                "queue_seconds": run["queue"],
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "status": "error" if error else "ok",
+            }
+            if error:
+                record["error"] = repr(error)
+            self._add(record)
+
+    def on_llm_end(self, response, *, run_id, parent_run_id=None, **kwargs):
+        self._end_llm(run_id, response=response)
+
+    def on_llm_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        self._end_llm(run_id, error=error)
+
+    def record_step(self, kind, name, wall_seconds, queue_seconds=0.0, **extra):
+        """Record work done outside LangChain runs, e.g. code execution in the worker pool."""
+        with self._lock:
+            self._add({"kind": kind, "name": name, "start_seconds": self._offset(time.perf_counter()) - wall_seconds,
+                       "wall_seconds": wall_seconds, "queue_seconds": queue_seconds, "status": "ok", **extra})
+
+    def summary(self):
+        totals = {"trace_id": self.trace_id, "run_name": self.run_name,
+                  "wall_seconds": time.perf_counter() - self._start, "prompt_tokens": 0, "completion_tokens": 0,
+                  "cost_usd": 0.0, "repair_attempts": 0, "repair_seconds": 0.0, "llm_queue_seconds": 0.0}
+        with self._lock:
+            for record in self.records:
+                if record["kind"] == "llm":
+                    totals["prompt_tokens"] += record["prompt_tokens"]
+                    totals["completion_tokens"] += record["completion_tokens"]
+                    totals["cost_usd"] += record["cost_usd"]
+                elif record["kind"] == "repair":
+                    totals["repair_attempts"] += 1
+                    totals["repair_seconds"] += record["wall_seconds"]
+                elif record["kind"] == "llm_queue":
+                    totals["llm_queue_seconds"] += record["queue_seconds"]
+        return totals
+
+
+def current_tracer():
+    return _active_tracer.get()
+
+
+def record_step(kind, name, wall_seconds, queue_seconds=0.0, **extra):
+    tracer = _active_tracer.get()
+    if tracer is not None:
+        tracer.record_step(kind, name, wall_seconds, queue_seconds, **extra)
+
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _update_metrics(records):
+    with _metrics_lock:
+        for record in records:
+            step = record["name"]
+            if record["kind"] == "llm":
+                step = record.get("node") or record.get("call") or step
+            key = (record["kind"], step)
+            metric = _metrics.setdefault(key, {"count": 0, "errors": 0, "wall_seconds": 0.0, "queue_seconds": 0.0,
+                                               "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+            metric["count"] += 1
+            metric["errors"] += record["status"] == "error"
+            for field in ("wall_seconds", "queue_seconds", "prompt_tokens", "completion_tokens", "cost_usd"):
+                metric[field] += record[field]
+
+
+def prometheus_text():
+    metric_help = [
+        ("steps_total", "count", "counter", "Pipeline steps recorded."),
+        ("step_errors_total", "errors", "counter", "Pipeline steps that raised an error."),
+        ("step_wall_seconds_total", "wall_seconds", "counter", "Wall time spent per pipeline step."),
+        ("step_queue_seconds_total", "queue_seconds", "counter", "Time pipeline steps spent waiting to start."),
+        ("prompt_tokens_total", "prompt_tokens", "counter", "Prompt tokens sent to the LLM."),
+        ("completion_tokens_total", "completion_tokens", "counter", "Completion tokens received from the LLM."),
+        ("cost_usd_total", "cost_usd", "counter", "Estimated LLM cost in USD."),
+    ]
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    lines = []
+    for suffix, field, metric_type, text in metric_help:
+        name = f"optigenius_{suffix}"
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for (kind, step), values in sorted(metrics.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            step = str(step).replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{name}{{kind="{kind}",step="{step}"}} {values[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_trace(tracer, trace_dir=None, formats=None):
+    trace_dir = trace_dir or os.environ.get("OPTIGENIUS_TRACE_DIR", DEFAULT_TRACE_DIR)
+    formats = formats or os.environ.get("OPTIGENIUS_TRACE_FORMAT", "jsonl,prometheus")
+    if not trace_dir or formats == "off":
+        return
+    os.makedirs(trace_dir, exist_ok=True)
+
+    if "jsonl" in formats:
+        with _metrics_lock, open(os.path.join(trace_dir, "traces.jsonl"), "a") as f:
+            for record in tracer.records:
+                f.write(json.dumps(record, default=str) + "\n")
+    if "prometheus" in formats:
+        # Written atomically so a node_exporter textfile collector never reads half a file. Each writer has its
+        # own temporary file, so concurrent runs (and other processes) never write into each other's.
+        path = os.path.join(trace_dir, "optigenius.prom")
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(prometheus_text())
+        os.replace(temporary, path)
+
+
+@contextmanager
+def trace_run(run_name, write=True):
+    """Trace every LangChain run inside the block; nested calls join the already active trace."""
+    active = _active_tracer.get()
+    if active is not None:
+        yield active
+        return
+
+    _register_hook()
+    tracer = PipelineTracer(run_name)
+    token = _active_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _active_tracer.reset(token)
+        _update_metrics(tracer.records)
+        if write:
+            try:
+                write_trace(tracer)
+            except OSError as ex:
+                print(f"Could not write trace: {ex}")
+
+
+def traced(fn):
+    """Trace every call of fn (sync or async) as its own run unless a trace is already active."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with trace_run(fn.__name__):
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with trace_run(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
@@ -1,23 +1,14 @@
-import os
-from langchain_openai import AzureChatOpenAI
+import asyncio
 from langchain_core.prompts import ChatPromptTemplate
-import streamlit as st
+import llm_cache
+import llm_client
+import data_files
+import data_serializer
+import graph_registry
+import tracing
 
-os.environ["AZURE_OPENAI_API_KEY"] = st.secrets["openai_api_key"]
-os.environ["AZURE_OPENAI_ENDPOINT"] = st.secrets["azure_endpoint"]
-os.environ["AZURE_OPENAI_API_VERSION"] = st.secrets["api_version"]
-os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT_NAME"] = st.secrets["deployment_name"]
-os.environ["OPENAI_MODEL_NAME"] = "gpt-4o"
 
-# Initialize Azure OpenAI LLM
-azure_llm = AzureChatOpenAI(
-    openai_api_version=st.secrets["api_version"],
-    azure_deployment=st.secrets["deployment_name"],
-    model="gpt-4o"
-)
-
-
-def generate_pulp_code_for_problem(optimization_task, problem_statment, objective, constraint, data):
+def _build_code_chain():
     sys_prompt = """
     Act as a Python developer. Write a code to solve optimization task using PuLP library.
     Must ensure that the code is properly formatted and wrapped according to Python REPL executor.
@@ -25,6 +16,8 @@ def generate_pulp_code_for_problem(optimization_task, problem_statment, objectiv
     Always recheck the code to fix error. 
     If there is an error arise in your code i will fine you 1000$ and will sue you.
     Just output code and nothing else.
+    Solve the model with `import solvers` and `solvers.solve(prob)` instead of `prob.solve()`; it picks the
+    solver and time limit, and prints the status and objective value.
 
     Following is the optimization task:
     Optimization Task:
@@ -56,27 +49,54 @@ def generate_pulp_code_for_problem(optimization_task, problem_statment, objectiv
         ]
     )
 
-    chain = prompt | azure_llm
+    return prompt | llm_client.get_azure_llm()
 
-    code = chain.invoke(
-        {
-            "optimization_task": optimization_task,
-            "problem_statement": problem_statment,
-            "objective": objective,
-            "constraint": constraint,
-            "data": data
-        }
-    )
+
+@tracing.traced
+def generate_pulp_code_for_problem(optimization_task, problem_statment, objective, constraint, data, use_cache=True):
+    chain = graph_registry.get_chain("utils.code_writer", _build_code_chain)
+
+    with llm_cache.bypass(not use_cache):
+        code = chain.invoke(
+            {
+                "optimization_task": optimization_task,
+                "problem_statement": problem_statment,
+                "objective": objective,
+                "constraint": constraint,
+                "data": data_files.code_prompt_data(data)
+            },
+            config={"run_name": "utils.generate_pulp_code_for_problem"}
+        )
 
     code = code.content
 
     return code
 
 
+@tracing.traced
+async def agenerate_pulp_code_for_problem(optimization_task, problem_statment, objective, constraint, data,
+                                          use_cache=True):
+    chain = graph_registry.get_chain("utils.code_writer", _build_code_chain)
+
+    with llm_cache.bypass(not use_cache):
+        code = await chain.ainvoke(
+            {
+                "optimization_task": optimization_task,
+                "problem_statement": problem_statment,
+                "objective": objective,
+                "constraint": constraint,
+                "data": data_files.code_prompt_data(data)
+            },
+            config={"run_name": "utils.agenerate_pulp_code_for_problem"}
+        )
+
+    return code.content
+
+
 # then you will switch role to
 # being an expert writer and will write the report and conclusion in such a way that layman can understand it.
 # Please write your responses in concise and understandable way and no longer text.
-def solve_optimization_problem(problem_statement, objective, constraints, data):
+def _build_solve_chain():
     # 4. There should be no calculations in the report just text writings.
     template_string = """I want you to act like an Expert Mathematics and Linear Programming Expert who solves 
     optimization problems computationally and the calculations are perfect everytime you solve something. Following 
@@ -110,19 +130,66 @@ def solve_optimization_problem(problem_statement, objective, constraints, data):
     """
     prompt_template = ChatPromptTemplate.from_template(template_string)
 
-    chain = prompt_template | azure_llm
+    return prompt_template | llm_client.get_azure_llm()
 
-    generated_answer = chain.invoke({
-        "problem_statement": problem_statement,
-        "objective": objective,
-        "constraints": constraints,
-        "data": data
-    })
+
+@tracing.traced
+def solve_optimization_problem(problem_statement, objective, constraints, data, use_cache=True):
+    chain = graph_registry.get_chain("utils.solver", _build_solve_chain)
+
+    with llm_cache.bypass(not use_cache):
+        generated_answer = chain.invoke({
+            "problem_statement": problem_statement,
+            "objective": objective,
+            "constraints": constraints,
+            "data": data_serializer.prompt_data(data)
+        }, config={"run_name": "utils.solve_optimization_problem"})
     print(generated_answer.content)
     return generated_answer.content
 
 
-def generate_optimization(scenario, data):
+@tracing.traced
+async def asolve_optimization_problem(problem_statement, objective, constraints, data, use_cache=True):
+    chain = graph_registry.get_chain("utils.solver", _build_solve_chain)
+
+    with llm_cache.bypass(not use_cache):
+        generated_answer = await chain.ainvoke({
+            "problem_statement": problem_statement,
+            "objective": objective,
+            "constraints": constraints,
+            "data": data_serializer.prompt_data(data)
+        }, config={"run_name": "utils.asolve_optimization_problem"})
+    return generated_answer.content
+
+
+async def _labelled(name, coroutine):
+    # Failures are returned rather than raised so one failing call never cancels the other.
+    try:
+        return name, await coroutine, None
+    except Exception as ex:
+        print(f"Exception arised in {name} call: {ex}")
+        return name, None, ex
+
+
+async def optimize_concurrently(optimization_task, problem_statement, objective, constraints, data, use_cache=True,
+                                report_data=None):
+    """Run the report and code LLM calls concurrently, yielding (name, result, error) as each finishes.
+
+    report_data replaces data in the report prompt, e.g. a summary of tables too large to inline.
+    """
+    calls = [
+        _labelled("report", asolve_optimization_problem(problem_statement, objective, constraints,
+                                                        data if report_data is None else report_data,
+                                                        use_cache=use_cache)),
+        _labelled("code", agenerate_pulp_code_for_problem(optimization_task, problem_statement, objective,
+                                                          constraints, data, use_cache=use_cache)),
+    ]
+    for finished in asyncio.as_completed(calls):
+        yield await finished
+
+
+@tracing.traced
+def generate_optimization(scenario, data, use_cache=True):
     sys_prompt = """
     I will give you a data which has been predicted based on a scenario. 
     Just Output data in html format and nothing else. Also don't enclose output in any quotes.
@@ -145,19 +212,22 @@ def generate_optimization(scenario, data):
         ]
     )
 
-    chain = prompt | azure_llm
-    ans = chain.invoke(
-        {
-            "problem": scenario,
-            "data": data,
-            # "input": "I love programming.",
-        }
-    )
+    chain = prompt | llm_client.get_azure_llm()
+    with llm_cache.bypass(not use_cache):
+        ans = chain.invoke(
+            {
+                "problem": scenario,
+                "data": data_serializer.prompt_data(data),
+                # "input": "I love programming.",
+            },
+            config={"run_name": "utils.generate_optimization"}
+        )
 
     return ans.content
 
 
-def explain_solution(problem_statement, result):
+@tracing.traced
+def explain_solution(problem_statement, result, use_cache=True):
     system = """
     I will give you optimization problem which is solved by using linear programming python tool PuLP.
     Give answer to the objective and problem statement by looking at optimization results. Don't output anything extra.
@@ -200,19 +270,22 @@ def explain_solution(problem_statement, result):
         [("system", system), ("human", human_message)]
     )
 
-    chain = prompt | azure_llm
+    chain = prompt | llm_client.get_azure_llm()
 
-    data_in_nl = chain.invoke(
-        {
-            "problem": problem_statement,
-            "result": result
-        }
-    )
+    with llm_cache.bypass(not use_cache):
+        data_in_nl = chain.invoke(
+            {
+                "problem": problem_statement,
+                "result": result
+            },
+            config={"run_name": "utils.explain_solution"}
+        )
 
     return data_in_nl.content
 
 
-def generate_data_info_in_natural_language(scenario, data):
+@tracing.traced
+def generate_data_info_in_natural_language(scenario, data, use_cache=True):
     system = """
     I will give you predictions from Machine Learning Model for a Scenario. Write Predicted data in natural language. 
     """
@@ -227,13 +300,15 @@ def generate_data_info_in_natural_language(scenario, data):
         [("system", system), ("human", human_message)]
     )
 
-    chain = prompt | azure_llm
+    chain = prompt | llm_client.get_azure_llm()
 
-    data_in_nl = chain.invoke(
-        {
-            # "scenario": scenario,
-            "predictions": data
-        }
-    )
+    with llm_cache.bypass(not use_cache):
+        data_in_nl = chain.invoke(
+            {
+                # "scenario": scenario,
+                "predictions": data_serializer.prompt_data(data)
+            },
+            config={"run_name": "utils.generate_data_info_in_natural_language"}
+        )
 
     return data_in_nl.content